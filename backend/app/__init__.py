@@ -1,25 +1,43 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from sqlalchemy import exc as sa_exc
 from config import config
+from app.utils.db_pool import configure_engine_options, pool_metrics, pool_status
+from app.utils.db_routing import RoutingSession, init_replicas, replica_engines
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
+from app.utils.cache import ResponseCache
+from app.utils.compression import init_compression
+from app.utils.json_provider import create_json_provider
+from app.utils.password_hashing import PasswordHasher, PasswordHasherBusy
+from app.utils.due_index import init_due_indexes
+from app.utils.user_context import init_user_contexts
+
+response_cache = ResponseCache()
+password_hasher = PasswordHasher()
+
 
 def create_app(config_name='default'):
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.json = create_json_provider(app)
     
     # Initialize extensions
+    configure_engine_options(app)
+    init_replicas(app)
     db.init_app(app)
-    migrate.init_app(app, db)
     CORS(app, origins=app.config['CORS_ORIGINS'])
     jwt.init_app(app)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    init_user_contexts(app)
+    init_due_indexes(app)
+    init_compression(app)
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -28,6 +46,7 @@ def create_app(config_name='default'):
     from app.routes.reviews import reviews_bp
     from app.routes.study import study_bp
     from app.routes.analytics import analytics_bp
+    from app.routes.sync import sync_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(decks_bp, url_prefix='/api/decks')
@@ -35,6 +54,10 @@ def create_app(config_name='default'):
     app.register_blueprint(reviews_bp, url_prefix='/api/reviews')
     app.register_blueprint(study_bp, url_prefix='/api/study')
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    
+    from app.cli import register_commands
+    register_commands(app)
     
     # Error handlers
     @app.errorhandler(404)
@@ -50,6 +73,19 @@ def create_app(config_name='default'):
     def bad_request(error):
         return {'error': 'Bad request'}, 400
     
+    @app.errorhandler(sa_exc.TimeoutError)
+    def pool_timeout(error):
+        db.session.rollback()
+        return {'error': 'Database busy, please retry'}, 503
+    
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        return {'error': 'Too many sign-in attempts in progress, please retry'}, 503
+    
+    @app.errorhandler(413)
+    def request_too_large(error):
+        return {'error': error.description or 'Request body too large'}, 413
+    
     @app.errorhandler(401)
     def unauthorized(error):
         return {'error': 'Unauthorized'}, 401
@@ -59,5 +95,14 @@ def create_app(config_name='default'):
     def health_check():
         return {'status': 'healthy', 'service': 'NeuroFlash API'}, 200
     
+    # Connection pool state and checkout/timeout metrics
+    @app.route('/api/health/db')
+    def db_health_check():
+        return {
+            'primary': pool_status(db.engine),
+            'replicas': [pool_status(engine) for engine in replica_engines()],
+            'metrics': pool_metrics.snapshot()
+        }, 200
+    
     return app
 
@@ -0,0 +1,107 @@
+"""
+Flask CLI commands for database maintenance
+
+Usage:
+    flask reviews archive [--older-than-days N] [--batch-size N] [--dry-run]
+    flask reviews create-partitions [--months-ahead N]
+    flask notifications run [--once] [--sink SPEC]
+    flask db ...  (Flask-Migrate, loaded on first use)
+"""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+
+class LazyMigrateGroup(click.Group):
+    """
+    `flask db` group that initializes Flask-Migrate on first use.
+
+    Flask-Migrate imports alembic with every DDL dialect and its templating
+    stack, which is a large share of worker startup and only needed by the
+    migration commands.
+    """
+
+    def _migrate_group(self) -> click.Group:
+        from flask_migrate import Migrate
+
+        app = current_app._get_current_object()
+        if 'migrate' not in app.extensions:
+            # Registers the real `db` group on app.cli in place of this one
+            Migrate(app, db)
+        return app.cli.commands['db']
+
+    def list_commands(self, ctx):
+        return self._migrate_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._migrate_group().get_command(ctx, name)
+
+
+reviews_cli = AppGroup('reviews', help='Review history maintenance.')
+notifications_cli = AppGroup('notifications', help='Due-card reminders.')
+
+
+@reviews_cli.command('archive')
+@click.option('--older-than-days', type=int, default=None,
+              help='Archive reviews older than this (default: REVIEW_ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None,
+              help='Reviews per transaction (default: REVIEW_ARCHIVE_BATCH_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Only count the reviews that would be archived.')
+def archive_reviews(older_than_days, batch_size, dry_run):
+    """Compact old reviews into per-card and per-day summaries."""
+    from app.services.review_archive import ReviewArchiveService
+
+    if older_than_days is None:
+        older_than_days = current_app.config['REVIEW_ARCHIVE_AFTER_DAYS']
+    if batch_size is None:
+        batch_size = current_app.config['REVIEW_ARCHIVE_BATCH_SIZE']
+
+    service = ReviewArchiveService(db.session)
+    try:
+        result = service.archive_reviews(older_than_days, batch_size=batch_size, dry_run=dry_run)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    if dry_run:
+        click.echo(f"{result['archived']} reviews would be archived")
+    else:
+        click.echo(f"Archived {result['archived']} reviews in {result['batches']} batches")
+
+
+@reviews_cli.command('create-partitions')
+@click.option('--months-ahead', type=int, default=3, show_default=True,
+              help='Months after the current one to create.')
+def create_partitions(months_ahead):
+    """Create upcoming monthly card_reviews partitions (PostgreSQL)."""
+    from app.services.review_archive import ReviewArchiveService
+
+    created = ReviewArchiveService(db.session).create_partitions(months_ahead)
+    if created:
+        click.echo(f"Created partitions: {', '.join(created)}")
+    else:
+        click.echo("No partitions created")
+
+
+@notifications_cli.command('run')
+@click.option('--once', is_flag=True, help='Process the last completed bucket and exit.')
+@click.option('--sink', default=None, help='Sink spec (default: NOTIFICATION_SINK).')
+def run_notifications(once, sink):
+    """Run the reminder scheduler."""
+    import logging
+    from app.services.notifications import NotificationScheduler, create_sink
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    scheduler = NotificationScheduler(
+        db.session,
+        create_sink(sink or current_app.config['NOTIFICATION_SINK']),
+        bucket_minutes=current_app.config['NOTIFICATION_BUCKET_MINUTES'],
+        batch_size=current_app.config['NOTIFICATION_BATCH_SIZE']
+    )
+    scheduler.run(once=once)
+
+
+def register_commands(app) -> None:
+    """Register CLI command groups on the app."""
+    app.cli.add_command(LazyMigrateGroup('db', help='Perform database migrations.'))
+    app.cli.add_command(reviews_cli)
+    app.cli.add_command(notifications_cli)
@@ -9,7 +9,9 @@ from app.models.user_preferences import UserPreferences
 from app.models.deck import Deck
 from app.models.card import Card, CardType
 from app.models.card_review import CardReview
+from app.models.card_state import CardState
 from app.models.study_session import StudySession
+from app.models.review_archive import CardReviewSummary, ReviewDailyActivity
 
 __all__ = [
     'User',
@@ -18,5 +20,8 @@ __all__ = [
     'Card',
     'CardType',
     'CardReview',
-    'StudySession'
+    'CardState',
+    'StudySession',
+    'CardReviewSummary',
+    'ReviewDailyActivity'
 ]
@@ -30,6 +30,7 @@ class Card(db.Model):
         back_content: Back side content of the card
         card_type: Type of card (basic, cloze, image_occlusion)
         created_at: Creation timestamp
+        updated_at: Last modification timestamp
         media_attachments: JSON array of media file references
     
     Relationships:
@@ -53,6 +54,7 @@ class Card(db.Model):
         nullable=False
     )
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     media_attachments = db.Column(db.JSON, default=list, nullable=False)
     # Card-specific data (cloze deletions, occlusion regions, multiple choice options, etc.)
     card_data = db.Column(db.JSON, default=dict, nullable=False)
@@ -64,6 +66,18 @@ class Card(db.Model):
         lazy='dynamic',
         cascade='all, delete-orphan'
     )
+    review_summaries = db.relationship(
+        'CardReviewSummary',
+        backref='card',
+        lazy='dynamic',
+        cascade='all, delete-orphan'
+    )
+    states = db.relationship(
+        'CardState',
+        backref='card',
+        lazy='dynamic',
+        cascade='all, delete-orphan'
+    )
     
     # Indexes
     __table_args__ = (
@@ -153,12 +167,18 @@ class Card(db.Model):
     
     def get_review_count(self) -> int:
         """
-        Get the number of reviews for this card.
+        Get the number of reviews for this card, including archived ones.
         
         Returns:
             Number of reviews
         """
-        return self.reviews.count() if hasattr(self, 'reviews') else 0
+        if not hasattr(self, 'reviews'):
+            return 0
+        from app.models.review_archive import CardReviewSummary
+        archived = self.review_summaries.with_entities(
+            db.func.sum(CardReviewSummary.review_count)
+        ).scalar()
+        return self.reviews.count() + (archived or 0)
     
     def to_dict(self, include_reviews: bool = False) -> Dict[str, Any]:
         """
@@ -179,7 +199,8 @@ class Card(db.Model):
             'media_attachments': self.media_attachments or [],
             'card_data': self.card_data or {},
             'review_count': self.get_review_count(),
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
         
         if include_reviews:
@@ -34,14 +34,12 @@ class CardReview(db.Model):
     card_id = db.Column(
         db.Integer,
         db.ForeignKey('cards.id', ondelete='CASCADE'),
-        nullable=False,
-        index=True
+        nullable=False
     )
     user_id = db.Column(
         db.Integer,
         db.ForeignKey('users.id', ondelete='CASCADE'),
-        nullable=False,
-        index=True
+        nullable=False
     )
     quality = db.Column(db.Integer, nullable=False)  # 0-5 rating
     reviewed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -50,13 +48,20 @@ class CardReview(db.Model):
     ease_factor = db.Column(db.Float, default=2.5, nullable=False)
     interval = db.Column(db.Integer, default=1, nullable=False)
     repetitions = db.Column(db.Integer, default=0, nullable=False)
-    next_review = db.Column(db.DateTime, nullable=True, index=True)
+    next_review = db.Column(db.DateTime, nullable=True)
     
-    # Indexes for performance
+    # Indexes for performance (user_id and card_id lookups use the composite prefixes)
     __table_args__ = (
-        db.Index('idx_review_user_card', 'user_id', 'card_id'),
+        # Latest review per card (due cards, scheduling); INCLUDE makes
+        # max(next_review) index-only on PostgreSQL
+        db.Index(
+            'idx_review_user_card_time', 'user_id', 'card_id', 'reviewed_at',
+            postgresql_include=['next_review']
+        ),
         db.Index('idx_review_next_review', 'user_id', 'next_review'),
         db.Index('idx_review_deck_next', 'card_id', 'next_review'),
+        # Reviews per user and day (reviewed today, streaks)
+        db.Index('idx_review_user_day', 'user_id', db.text('date(reviewed_at)')),
     )
     
     def validate(self) -> tuple:
@@ -0,0 +1,81 @@
+"""
+CardState model holding the current scheduling state of a card for a user.
+
+card_reviews is an append-only log; this table keeps one row per (user, card)
+with the SM-2 parameters after the latest review. The version column is used
+for optimistic concurrency control: every update is conditional on the version
+read, so two concurrent reviews of the same card cannot both build on the same
+state (see SpacedRepetitionService.process_review).
+"""
+from datetime import datetime
+from typing import Dict, Any
+from app import db
+
+
+class CardState(db.Model):
+    """
+    Current SM-2 state of a card for a user.
+    
+    Attributes:
+        id: Primary key
+        user_id: Foreign key to User
+        card_id: Foreign key to Card (indexed)
+        ease_factor: SM-2 ease factor after the latest review
+        interval: Days until next review
+        repetitions: Number of successful reviews in a row
+        next_review: Scheduled next review date
+        last_reviewed_at: Timestamp of the latest review
+        version: Incremented on every update; updates fail if it changed
+        updated_at: Last update timestamp
+    """
+    __tablename__ = 'card_states'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    card_id = db.Column(
+        db.Integer,
+        db.ForeignKey('cards.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    ease_factor = db.Column(db.Float, default=2.5, nullable=False)
+    interval = db.Column(db.Integer, default=1, nullable=False)
+    repetitions = db.Column(db.Integer, default=0, nullable=False)
+    next_review = db.Column(db.DateTime, nullable=True)
+    last_reviewed_at = db.Column(db.DateTime, nullable=True)
+    version = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'card_id', name='uq_card_state_user_card'),
+        # Due cards of a user in next_review order, without touching the table
+        db.Index('idx_card_state_due', 'user_id', 'next_review', 'card_id'),
+    )
+    
+    # UPDATEs include "WHERE version = <loaded version>" and raise StaleDataError
+    # when no row matched
+    __mapper_args__ = {'version_id_col': version}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert state to dictionary for API responses.
+        
+        Returns:
+            Dictionary representation of state
+        """
+        return {
+            'card_id': self.card_id,
+            'ease_factor': self.ease_factor,
+            'interval': self.interval,
+            'repetitions': self.repetitions,
+            'next_review': self.next_review.isoformat() if self.next_review else None,
+            'last_reviewed_at': self.last_reviewed_at.isoformat() if self.last_reviewed_at else None,
+            'version': self.version
+        }
+    
+    def __repr__(self) -> str:
+        return f'<CardState user {self.user_id}, card {self.card_id} v{self.version}>'
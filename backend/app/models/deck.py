@@ -21,6 +21,7 @@ class Deck(db.Model):
         description: Optional deck description
         is_public: Whether deck is publicly visible
         created_at: Creation timestamp
+        updated_at: Last modification timestamp
         tags: JSON array of tags for categorization
     
     Relationships:
@@ -41,6 +42,7 @@ class Deck(db.Model):
     description = db.Column(db.Text, nullable=True)
     is_public = db.Column(db.Boolean, default=False, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     tags = db.Column(db.JSON, default=list, nullable=False)
     
     # Relationships
@@ -149,7 +151,8 @@ class Deck(db.Model):
             'is_public': self.is_public,
             'tags': self.tags or [],
             'card_count': self.get_card_count(),
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
         
         if include_cards:
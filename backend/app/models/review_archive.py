@@ -0,0 +1,103 @@
+"""
+Compacted review history models.
+
+Reviews older than the archival horizon are removed from card_reviews and folded
+into these tables: per-card totals (CardReviewSummary) keep review counts and
+accuracy correct, and per-day totals (ReviewDailyActivity) keep streaks correct.
+The latest review of every card is never archived, so scheduling is unaffected.
+"""
+from datetime import datetime
+from typing import Dict, Any
+from app import db
+
+
+class CardReviewSummary(db.Model):
+    """
+    Archived review totals for one user and card.
+
+    Attributes:
+        id: Primary key
+        user_id: Foreign key to User
+        card_id: Foreign key to Card (indexed)
+        review_count: Number of archived reviews
+        correct_count: Number of archived reviews with quality >= 3
+        quality_sum: Sum of archived quality ratings
+        first_reviewed_at: Earliest archived review
+        last_reviewed_at: Latest archived review
+        updated_at: Last archival run touching this row
+    """
+    __tablename__ = 'card_review_summaries'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    card_id = db.Column(
+        db.Integer,
+        db.ForeignKey('cards.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    review_count = db.Column(db.Integer, default=0, nullable=False)
+    correct_count = db.Column(db.Integer, default=0, nullable=False)
+    quality_sum = db.Column(db.Integer, default=0, nullable=False)
+    first_reviewed_at = db.Column(db.DateTime, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'card_id', name='uq_review_summary_user_card'),
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert summary to dictionary for API responses.
+
+        Returns:
+            Dictionary representation of summary
+        """
+        return {
+            'user_id': self.user_id,
+            'card_id': self.card_id,
+            'review_count': self.review_count,
+            'correct_count': self.correct_count,
+            'average_quality': round(self.quality_sum / self.review_count, 2) if self.review_count else None,
+            'first_reviewed_at': self.first_reviewed_at.isoformat() if self.first_reviewed_at else None,
+            'last_reviewed_at': self.last_reviewed_at.isoformat() if self.last_reviewed_at else None
+        }
+
+    def __repr__(self) -> str:
+        return f'<CardReviewSummary user {self.user_id}, card {self.card_id}: {self.review_count}>'
+
+
+class ReviewDailyActivity(db.Model):
+    """
+    Archived review totals for one user and day.
+
+    Attributes:
+        id: Primary key
+        user_id: Foreign key to User
+        activity_date: Day of the reviews (UTC)
+        review_count: Number of archived reviews that day
+        correct_count: Number of archived reviews with quality >= 3 that day
+    """
+    __tablename__ = 'review_daily_activity'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    activity_date = db.Column(db.Date, nullable=False)
+    review_count = db.Column(db.Integer, default=0, nullable=False)
+    correct_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'activity_date', name='uq_review_activity_user_date'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<ReviewDailyActivity user {self.user_id}, {self.activity_date}: {self.review_count}>'
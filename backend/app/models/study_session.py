@@ -32,8 +32,7 @@ class StudySession(db.Model):
     user_id = db.Column(
         db.Integer,
         db.ForeignKey('users.id', ondelete='CASCADE'),
-        nullable=False,
-        index=True
+        nullable=False
     )
     deck_id = db.Column(
         db.Integer,
@@ -50,6 +49,12 @@ class StudySession(db.Model):
     __table_args__ = (
         db.Index('idx_session_user_deck', 'user_id', 'deck_id'),
         db.Index('idx_session_user_start', 'user_id', 'start_time'),
+        # Active session lookup (few rows per user have no end_time)
+        db.Index(
+            'idx_session_active', 'user_id', 'start_time',
+            postgresql_where=db.text('end_time IS NULL'),
+            sqlite_where=db.text('end_time IS NULL')
+        ),
     )
     
     def validate(self) -> tuple:
@@ -6,8 +6,7 @@ settings, and relationships to decks, study sessions, and preferences.
 """
 from datetime import datetime
 from typing import Dict, Any, Optional
-from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app import db, password_hasher
 import json
 
 
@@ -65,6 +64,21 @@ class User(db.Model):
         lazy='dynamic',
         cascade='all, delete-orphan'
     )
+    review_summaries = db.relationship(
+        'CardReviewSummary',
+        lazy='dynamic',
+        cascade='all, delete-orphan'
+    )
+    review_activity = db.relationship(
+        'ReviewDailyActivity',
+        lazy='dynamic',
+        cascade='all, delete-orphan'
+    )
+    card_states = db.relationship(
+        'CardState',
+        lazy='dynamic',
+        cascade='all, delete-orphan'
+    )
     
     def set_password(self, password: str) -> None:
         """
@@ -75,7 +89,7 @@ class User(db.Model):
         """
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters long")
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password: str) -> bool:
         """
@@ -87,7 +101,22 @@ class User(db.Model):
         Returns:
             True if password matches, False otherwise
         """
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def rehash_password_if_needed(self, password: str) -> bool:
+        """
+        Re-hash a verified password if the hashing algorithm or cost changed.
+        
+        Args:
+            password: Plain text password that was just verified
+        
+        Returns:
+            True if the stored hash was replaced
+        """
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.password_hash = password_hasher.hash(password)
+        return True
     
     def update_last_login(self) -> None:
         """Update last login timestamp to current time."""
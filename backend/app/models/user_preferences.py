@@ -6,6 +6,7 @@ timezone, and notification settings in a one-to-one relationship with User.
 """
 from datetime import datetime
 from typing import Dict, Any, Optional
+from sqlalchemy import event
 from app import db
 import json
 
@@ -21,6 +22,8 @@ class UserPreferences(db.Model):
         new_cards_per_day: Maximum new cards to introduce per day
         timezone: User's timezone (e.g., 'UTC', 'America/New_York')
         notification_settings: JSON object for notification preferences
+        reminder_minute: Local daily reminder time in minutes after midnight, or None
+            when daily reminders are off (derived from notification_settings, indexed)
     
     Relationships:
         - One-to-one with User
@@ -39,6 +42,12 @@ class UserPreferences(db.Model):
     new_cards_per_day = db.Column(db.Integer, default=20, nullable=False)
     timezone = db.Column(db.String(50), default='UTC', nullable=False)
     notification_settings = db.Column(db.JSON, default=dict, nullable=False)
+    reminder_minute = db.Column(db.SmallInteger, nullable=True)
+    
+    # Reminder scheduler selects users by local reminder time
+    __table_args__ = (
+        db.Index('idx_prefs_reminder', 'reminder_minute', 'timezone'),
+    )
     
     def validate(self) -> tuple:
         """
@@ -59,6 +68,9 @@ class UserPreferences(db.Model):
         if self.notification_settings and not isinstance(self.notification_settings, dict):
             return False, "Notification settings must be a dictionary"
         
+        if self.get_notification_setting('daily_reminder') and self.get_reminder_minute() is None:
+            return False, "Reminder time must be in HH:MM format"
+        
         return True, None
     
     def get_notification_setting(self, key: str, default: Any = None) -> Any:
@@ -84,9 +96,26 @@ class UserPreferences(db.Model):
             key: Setting key
             value: Setting value
         """
-        if not self.notification_settings:
-            self.notification_settings = {}
-        self.notification_settings[key] = value
+        # Reassign so the change to the JSON column is detected
+        self.notification_settings = {**(self.notification_settings or {}), key: value}
+    
+    def get_reminder_minute(self) -> Optional[int]:
+        """
+        Get the local daily reminder time in minutes after midnight.
+        
+        Returns:
+            Minutes after midnight, or None if daily reminders are off or the
+            reminder time is not a valid HH:MM value
+        """
+        if not self.get_notification_setting('daily_reminder', False):
+            return None
+        try:
+            hours, minutes = (int(part) for part in str(self.get_notification_setting('reminder_time')).split(':'))
+        except ValueError:
+            return None
+        if not (0 <= hours < 24 and 0 <= minutes < 60):
+            return None
+        return hours * 60 + minutes
     
     def update_daily_limits(self, review_limit: Optional[int] = None, new_cards: Optional[int] = None) -> None:
         """
@@ -148,3 +177,10 @@ class UserPreferences(db.Model):
     
     def __repr__(self) -> str:
         return f'<UserPreferences user_id={self.user_id}>'
+
+
+@event.listens_for(UserPreferences, 'before_insert')
+@event.listens_for(UserPreferences, 'before_update')
+def _sync_reminder_minute(mapper, connection, target):
+    """Keep reminder_minute in sync with notification_settings."""
+    target.reminder_minute = target.get_reminder_minute()
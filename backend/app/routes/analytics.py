@@ -2,21 +2,27 @@
 Analytics endpoints
 """
 from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta
-from app import db
+from datetime import date, datetime, timedelta
+from typing import List
+from app import db, response_cache
 from app.models.deck import Deck
-from app.models.card import Card
-from app.models.card_review import CardReview
 from app.models.study_session import StudySession
+from app.services.analytics import AnalyticsService, current_streak
 from app.services.spaced_repetition import SpacedRepetitionService
+from app.services.review_archive import ReviewArchiveService
 from flask_jwt_extended import jwt_required
 from app.utils.auth import get_current_user_id
+from app.utils.db_pool import statement_timeout
+from app.utils.db_routing import read_replica
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
 @analytics_bp.route('/overview', methods=['GET'])
 @jwt_required()
+@read_replica
+@response_cache.cached('reviews', 'cards', 'decks', 'sessions', 'preferences')
+@statement_timeout('analytics')
 def get_overview():
     """
     Get study overview statistics
@@ -25,63 +31,15 @@ def get_overview():
         - 200: Overview statistics
     """
     user_id = get_current_user_id()
-    service = SpacedRepetitionService(db.session)
-    
-    # Get basic stats
-    stats = service.get_review_stats(user_id)
-    
-    # Get study sessions today
-    today = datetime.utcnow().date()
-    sessions_today = StudySession.query.filter(
-        StudySession.user_id == user_id,
-        db.func.date(StudySession.start_time) == today
-    ).count()
-    
-    # Get total study time today (in minutes)
-    sessions_today_query = StudySession.query.filter(
-        StudySession.user_id == user_id,
-        db.func.date(StudySession.start_time) == today,
-        StudySession.end_time.isnot(None)
-    )
-    
-    total_seconds = 0
-    for session in sessions_today_query.all():
-        duration = session.get_duration_seconds()
-        if duration:
-            total_seconds += duration
+    overview = AnalyticsService(db.session).get_overview(user_id)
     
-    total_minutes = total_seconds // 60
-    
-    # Get average accuracy today
-    reviews_today = CardReview.query.join(Card).join(Deck).filter(
-        Deck.user_id == user_id,
-        CardReview.user_id == user_id,
-        db.func.date(CardReview.reviewed_at) == today
-    ).all()
-    
-    if reviews_today:
-        correct_reviews = sum(1 for r in reviews_today if r.quality >= 3)
-        avg_accuracy = (correct_reviews / len(reviews_today)) * 100
-    else:
-        avg_accuracy = 0
-    
-    # Get streak (consecutive days with reviews)
-    streak = _calculate_streak(user_id)
-    
-    return jsonify({
-        'total_cards': stats['total_cards'],
-        'due_cards': stats['due_cards'],
-        'new_cards': stats['new_cards'],
-        'reviewed_today': stats['reviewed_today'],
-        'sessions_today': sessions_today,
-        'study_time_today_minutes': total_minutes,
-        'average_accuracy_today': round(avg_accuracy, 2),
-        'streak_days': streak
-    }), 200
+    return jsonify(overview), 200
 
 
 @analytics_bp.route('/deck/<int:deck_id>', methods=['GET'])
 @jwt_required()
+@read_replica
+@statement_timeout('analytics')
 def get_deck_stats(deck_id):
     """
     Get deck-specific statistics
@@ -111,15 +69,11 @@ def get_deck_stats(deck_id):
         s.get_duration_seconds() or 0 for s in sessions if s.end_time
     )
     
-    # Get average accuracy for this deck
-    reviews = CardReview.query.join(Card).filter(
-        Card.deck_id == deck_id,
-        CardReview.user_id == user_id
-    ).all()
+    # Get average accuracy for this deck (including archived reviews)
+    total_reviews, correct_reviews = ReviewArchiveService(db.session).get_review_accuracy(user_id, deck_id)
     
-    if reviews:
-        correct_reviews = sum(1 for r in reviews if r.quality >= 3)
-        avg_accuracy = (correct_reviews / len(reviews)) * 100
+    if total_reviews:
+        avg_accuracy = (correct_reviews / total_reviews) * 100
     else:
         avg_accuracy = 0
     
@@ -158,6 +112,8 @@ def get_deck_stats(deck_id):
 
 @analytics_bp.route('/streak', methods=['GET'])
 @jwt_required()
+@read_replica
+@statement_timeout('analytics')
 def get_streak():
     """
     Get user streak data
@@ -166,32 +122,14 @@ def get_streak():
         - 200: Streak information
     """
     user_id = get_current_user_id()
+    review_dates = ReviewArchiveService(db.session).get_review_dates(user_id)
     
-    streak = _calculate_streak(user_id)
-    
-    # Get streak start date
-    if streak > 0:
-        # Find the earliest review in the streak
-        today = datetime.utcnow().date()
-        streak_start = today - timedelta(days=streak - 1)
-        
-        # Verify streak is continuous
-        for i in range(streak):
-            check_date = streak_start + timedelta(days=i)
-            has_review = CardReview.query.join(Card).join(Deck).filter(
-                Deck.user_id == user_id,
-                CardReview.user_id == user_id,
-                db.func.date(CardReview.reviewed_at) == check_date
-            ).first()
-            
-            if not has_review:
-                streak = i
-                break
-    else:
-        streak_start = None
+    today = datetime.utcnow().date()
+    streak = current_streak(review_dates, today)
+    streak_start = today - timedelta(days=streak - 1) if streak > 0 else None
     
     # Get longest streak
-    longest_streak = _calculate_longest_streak(user_id)
+    longest_streak = _longest_streak(review_dates)
     
     return jsonify({
         'current_streak': streak,
@@ -200,52 +138,19 @@ def get_streak():
     }), 200
 
 
-def _calculate_streak(user_id: int) -> int:
-    """Calculate current consecutive days with reviews"""
-    today = datetime.utcnow().date()
-    streak = 0
-    
-    # Check backwards from today
-    for i in range(365):  # Max 1 year
-        check_date = today - timedelta(days=i)
-        has_review = CardReview.query.join(Card).join(Deck).filter(
-            Deck.user_id == user_id,
-            CardReview.user_id == user_id,
-            db.func.date(CardReview.reviewed_at) == check_date
-        ).first()
-        
-        if has_review:
-            streak += 1
-        else:
-            break
-    
-    return streak
-
-
-def _calculate_longest_streak(user_id: int) -> int:
-    """Calculate longest streak in user's history"""
-    # Get all unique review dates
-    review_dates = db.session.query(
-        db.func.date(CardReview.reviewed_at).label('review_date')
-    ).join(Card).join(Deck).filter(
-        Deck.user_id == user_id,
-        CardReview.user_id == user_id
-    ).distinct().order_by('review_date').all()
-    
+def _longest_streak(review_dates: List[date]) -> int:
+    """Calculate longest run of consecutive days in sorted review dates"""
     if not review_dates:
         return 0
     
-    dates = [row.review_date for row in review_dates]
-    
     longest = 1
     current = 1
     
-    for i in range(1, len(dates)):
-        if (dates[i] - dates[i-1]).days == 1:
+    for i in range(1, len(review_dates)):
+        if (review_dates[i] - review_dates[i-1]).days == 1:
             current += 1
             longest = max(longest, current)
         else:
             current = 1
     
     return longest
-
@@ -16,6 +16,7 @@ from flask_jwt_extended import (
     unset_refresh_cookies
 )
 from app.utils.auth import get_current_user_id
+from app.utils.user_context import get_user_context
 from marshmallow import ValidationError
 
 auth_bp = Blueprint('auth', __name__)
@@ -97,6 +98,7 @@ def login():
     Returns:
         - 200: Login successful
         - 401: Invalid credentials
+        - 503: Password hashing pool saturated
     """
     schema = LoginSchema()
     
@@ -110,6 +112,9 @@ def login():
     if not user or not user.check_password(data['password']):
         return jsonify({'error': 'Invalid username or password'}), 401
     
+    # Upgrade hashes made with an older algorithm or cost
+    user.rehash_password_if_needed(data['password'])
+    
     # Update last login
     user.update_last_login()
     db.session.commit()
@@ -158,11 +163,9 @@ def get_current_user():
         - 404: User not found
     """
     user_id = get_current_user_id()
-    user = User.query.get(user_id)
+    context = get_user_context(user_id)
     
-    if not user:
+    if not context:
         return jsonify({'error': 'User not found'}), 404
     
-    user_data = user.to_dict(include_sensitive=True)
-    
-    return jsonify(user_data), 200
+    return jsonify(context.to_dict()), 200
@@ -2,14 +2,20 @@
 Card operations endpoints
 """
 import json
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from app import db
 from app.models.card import Card, CardType
 from app.models.deck import Deck
 from app.schemas.card import CardCreateSchema, CardUpdateSchema, CardBatchSchema
-from app.utils.pagination import paginate_query
+from app.services.card_projection import parse_card_fields, select_deck_cards
+from app.services.deck_state import get_deck_content_state
+from app.utils.pagination import paginate_select
+from app.utils.conditional import conditional_get
 from flask_jwt_extended import jwt_required
 from app.utils.auth import get_current_user_id
+from app.utils.user_context import owns_deck
+from app.utils.db_pool import statement_timeout
+from app.utils.db_routing import read_replica
 from marshmallow import ValidationError
 
 cards_bp = Blueprint('cards', __name__)
@@ -17,6 +23,7 @@ cards_bp = Blueprint('cards', __name__)
 
 @cards_bp.route('/decks/<int:deck_id>/cards', methods=['GET'])
 @jwt_required()
+@conditional_get(get_deck_content_state)
 def get_deck_cards(deck_id):
     """
     List cards in a deck with pagination
@@ -24,20 +31,28 @@ def get_deck_cards(deck_id):
     Query parameters:
         - page: Page number (default: 1)
         - per_page: Items per page (default: 20, max: 100)
+        - fields: Comma-separated card fields to return (optional, e.g. id,front_content,card_type)
+        - projection: 'full' (default) or 'summary' (ids, type and truncated previews)
     
     Returns:
         - 200: List of cards with pagination
+        - 304: Not modified (If-None-Match matches the ETag)
+        - 400: Unknown field or projection
         - 404: Deck not found
     """
     user_id = get_current_user_id()
     
     # Verify deck ownership
-    deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-    if not deck:
+    if not owns_deck(user_id, deck_id):
         return jsonify({'error': 'Deck not found'}), 404
     
-    query = Card.query.filter_by(deck_id=deck_id).order_by(Card.created_at.desc())
-    result = paginate_query(query)
+    try:
+        fields = parse_card_fields(request.args.get('fields'), request.args.get('projection'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    stmt = select_deck_cards(deck_id, fields).order_by(Card.created_at.desc(), Card.id.desc())
+    result = paginate_select(stmt, db.session)
     
     return jsonify(result), 200
 
@@ -62,8 +77,7 @@ def create_card(deck_id):
     user_id = get_current_user_id()
     
     # Verify deck ownership
-    deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-    if not deck:
+    if not owns_deck(user_id, deck_id):
         return jsonify({'error': 'Deck not found'}), 404
     
     schema = CardCreateSchema()
@@ -235,8 +249,7 @@ def batch_create_cards():
     deck_id = data['deck_id']
     
     # Verify deck ownership
-    deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-    if not deck:
+    if not owns_deck(user_id, deck_id):
         return jsonify({'error': 'Deck not found'}), 404
     
     cards = []
@@ -309,9 +322,7 @@ def generate_multiple_choice_cards(deck_id):
     from app.services.card_generation import MultipleChoiceService
     
     user_id = get_current_user_id()
-    deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-    
-    if not deck:
+    if not owns_deck(user_id, deck_id):
         return jsonify({'error': 'Deck not found'}), 404
     
     data = request.get_json() or {}
@@ -363,10 +374,17 @@ def get_card_views(card_id):
 @cards_bp.route('/decks/<int:deck_id>/import', methods=['POST'])
 @jwt_required()
 def import_cards(deck_id):
-    """Import cards from JSON or CSV format"""
+    """
+    Import cards from JSON or CSV format
+    
+    Takes either a JSON body ({"format", "data"}) or a multipart/form-data
+    file upload, which is parsed and inserted as it is read.
+    """
     from app.services.card_import_export import CardImportExportService
     
     user_id = get_current_user_id()
+    if request.mimetype == 'multipart/form-data':
+        return _import_upload(deck_id, user_id)
     data = request.get_json() or {}
     
     format_type = data.get('format', 'json').lower()
@@ -398,28 +416,72 @@ def import_cards(deck_id):
         return jsonify({'error': str(e)}), 500
 
 
+def _import_upload(deck_id, user_id):
+    """
+    Stream a multipart CSV/JSON file upload into the deck.
+    
+    The format is taken from ?format=, a "format" form field sent before the
+    file, or the file extension. The body is read from request.stream rather
+    than request.files, so the file is never spooled to memory or disk.
+    """
+    from app.services.card_import_export import CardImportExportService, PartialImportError
+    from app.utils.multipart import open_file_part
+    
+    if not owns_deck(user_id, deck_id):
+        return jsonify({'error': 'Deck not found or access denied'}), 400
+    
+    upload = open_file_part(request.stream, request.headers.get('Content-Type', ''))
+    format_type = request.args.get('format') or upload.fields.get('format')
+    if not format_type and upload.filename and '.' in upload.filename:
+        format_type = upload.filename.rsplit('.', 1)[1]
+    format_type = (format_type or '').lower()
+    if format_type not in ('json', 'csv'):
+        return jsonify({'error': 'Invalid format. Use "json" or "csv"'}), 400
+    
+    try:
+        imported, skipped = CardImportExportService.import_card_stream(
+            deck_id, format_type, upload.chunks, user_id
+        )
+    except PartialImportError as e:
+        # Batches before the malformed row or broken upload were committed
+        return jsonify({'error': str(e), 'imported': e.imported, 'skipped': e.skipped}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'message': f'{imported} cards imported successfully',
+        'imported': imported,
+        'skipped': skipped
+    }), 201
+
+
 @cards_bp.route('/decks/<int:deck_id>/export', methods=['GET'])
 @jwt_required()
+@read_replica
+@statement_timeout('export')
 def export_cards(deck_id):
-    """Export deck cards to JSON, CSV, or Anki format"""
+    """
+    Export deck cards to JSON, CSV, or Anki format
+    
+    JSON and CSV exports are streamed as the cards are read (and gzipped chunk
+    by chunk for clients accepting gzip), so large decks are not buffered.
+    """
     from app.services.card_import_export import CardImportExportService
     
     user_id = get_current_user_id()
-    deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-    
-    if not deck:
+    if not owns_deck(user_id, deck_id):
         return jsonify({'error': 'Deck not found'}), 404
     
     format_type = request.args.get('format', 'json').lower()
     
     try:
         if format_type == 'json':
-            data = CardImportExportService.export_deck_to_json(deck_id)
-            return jsonify(data), 200
+            chunks = CardImportExportService.stream_deck_json(deck_id)
+            return Response(stream_with_context(chunks), mimetype='application/json')
         elif format_type == 'csv':
-            csv_data = CardImportExportService.export_deck_to_csv(deck_id)
+            chunks = CardImportExportService.stream_deck_csv(deck_id)
             return Response(
-                csv_data,
+                stream_with_context(chunks),
                 mimetype='text/csv',
                 headers={'Content-Disposition': f'attachment; filename=deck_{deck_id}.csv'}
             )
@@ -2,13 +2,17 @@
 Deck management endpoints
 """
 from flask import Blueprint, request, jsonify
-from app import db
+from app import db, response_cache
 from app.models.deck import Deck
 from app.models.card import Card
 from app.schemas.deck import DeckCreateSchema, DeckUpdateSchema
+from app.services.card_projection import get_deck_card_rows, parse_card_fields
+from app.services.deck_state import get_deck_list_state, get_deck_content_state
 from app.utils.pagination import paginate_query
+from app.utils.conditional import conditional_get
 from flask_jwt_extended import jwt_required
 from app.utils.auth import get_current_user_id
+from app.utils.db_routing import read_replica
 from marshmallow import ValidationError
 from sqlalchemy import or_
 
@@ -17,6 +21,8 @@ decks_bp = Blueprint('decks', __name__)
 
 @decks_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional_get(get_deck_list_state)
+@response_cache.cached('decks', 'cards')
 def get_decks():
     """
     List user's decks with pagination
@@ -27,6 +33,7 @@ def get_decks():
     
     Returns:
         - 200: List of decks with pagination metadata
+        - 304: Not modified (If-None-Match matches the ETag)
     """
     user_id = get_current_user_id()
     query = Deck.query.filter_by(user_id=user_id).order_by(Deck.created_at.desc())
@@ -84,12 +91,19 @@ def create_deck():
 
 @decks_bp.route('/<int:deck_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(get_deck_content_state)
 def get_deck(deck_id):
     """
     Get deck details with cards
     
+    Query parameters:
+        - fields: Comma-separated card fields to return (optional)
+        - projection: 'full' (default) or 'summary' for the cards
+    
     Returns:
         - 200: Deck data with cards
+        - 304: Not modified (If-None-Match matches the ETag)
+        - 400: Unknown field or projection
         - 404: Deck not found
     """
     user_id = get_current_user_id()
@@ -98,7 +112,15 @@ def get_deck(deck_id):
     if not deck:
         return jsonify({'error': 'Deck not found'}), 404
     
-    return jsonify(deck.to_dict(include_cards=True)), 200
+    try:
+        fields = parse_card_fields(request.args.get('fields'), request.args.get('projection'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    data = deck.to_dict()
+    data['cards'] = get_deck_card_rows(deck_id, fields)
+    
+    return jsonify(data), 200
 
 
 @decks_bp.route('/<int:deck_id>', methods=['PUT'])
@@ -184,6 +206,7 @@ def delete_deck(deck_id):
 
 @decks_bp.route('/public', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_public_decks():
     """
     Browse public decks with pagination
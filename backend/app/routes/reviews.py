@@ -1,17 +1,22 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
-from app import db
+from app import db, response_cache
 from app.models.card import Card
 from app.models.deck import Deck
 from app.models.card_review import CardReview
-from app.services.spaced_repetition import SpacedRepetitionService
+from app.services.spaced_repetition import ReviewConflictError, SpacedRepetitionService
 from flask_jwt_extended import jwt_required
 from app.utils.auth import get_current_user_id
+from app.utils.db_pool import statement_timeout
+from app.utils.db_routing import read_replica
+from app.utils.conditional import body_etag
 
 reviews_bp = Blueprint('reviews', __name__)
 
 
 @reviews_bp.route('', methods=['POST'])
 @jwt_required()
+@statement_timeout('study')
 def create_review():
     """Create a review for a card and update spaced repetition parameters"""
     user_id = get_current_user_id()
@@ -24,12 +29,25 @@ def create_review():
     if not isinstance(quality, int) or quality < 0 or quality > 5:
         return jsonify({'error': 'Quality must be an integer between 0 and 5'}), 400
     
+    expected_version = data.get('expected_version')
+    if expected_version is not None and (not isinstance(expected_version, int) or expected_version < 0):
+        return jsonify({'error': 'expected_version must be a non-negative integer'}), 400
+    
+    reviewed_at = data.get('reviewed_at')
+    if reviewed_at is not None:
+        try:
+            reviewed_at = datetime.fromisoformat(reviewed_at)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'reviewed_at must be an ISO 8601 datetime'}), 400
+    
     try:
         service = SpacedRepetitionService(db.session)
         result = service.process_review(
             card_id=data['card_id'],
             user_id=user_id,
-            quality=quality
+            quality=quality,
+            expected_version=expected_version,
+            reviewed_at=reviewed_at
         )
         
         # Get updated card
@@ -41,14 +59,19 @@ def create_review():
                 'card_id': result['card_id'],
                 'user_id': result['user_id'],
                 'quality': result['quality'],
+                'reviewed_at': result['reviewed_at'],
                 'ease_factor': result['ease_factor'],
                 'interval': result['interval'],
                 'repetitions': result['repetitions'],
-                'next_review': result['next_review']
+                'next_review': result['next_review'],
+                'version': result['version']
             },
             'card': card.to_dict() if card else None,
-            'previous_state': result['previous_state']
+            'previous_state': result['previous_state'],
+            'replayed_reviews': result['replayed_reviews']
         }), 201
+    except ReviewConflictError as e:
+        return jsonify({'error': str(e), 'current_state': e.current_state}), 409
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -58,12 +81,33 @@ def create_review():
 
 @reviews_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached('reviews', 'cards', 'decks', 'preferences')
+@statement_timeout('analytics')
 def get_review_stats():
-    """Get review statistics"""
+    """
+    Get review statistics
+    
+    Query params:
+        - deck_id: Only count cards of this deck
+        - group_by: 'deck' to return {'decks': [...]} with the counts of every deck
+    
+    Returns:
+        - 200: Review statistics
+        - 400: Unknown group_by value
+    """
     user_id = get_current_user_id()
     deck_id = request.args.get('deck_id', type=int)
+    group_by = request.args.get('group_by')
     
     service = SpacedRepetitionService(db.session)
+    if group_by == 'deck':
+        by_deck = service.get_review_stats_by_deck(user_id)
+        return jsonify({
+            'decks': [dict(stats, deck_id=deck) for deck, stats in sorted(by_deck.items())]
+        }), 200
+    if group_by is not None:
+        return jsonify({'error': f"Unknown group_by: {group_by}"}), 400
+    
     stats = service.get_review_stats(user_id, deck_id)
     
     return jsonify(stats), 200
@@ -71,6 +115,8 @@ def get_review_stats():
 
 @reviews_bp.route('/history', methods=['GET'])
 @jwt_required()
+@read_replica
+@statement_timeout('analytics')
 def get_review_history():
     """Get review history for cards"""
     user_id = get_current_user_id()
@@ -96,6 +142,9 @@ def get_review_history():
 
 @reviews_bp.route('/queue', methods=['GET'])
 @jwt_required()
+@body_etag
+@response_cache.cached('reviews', 'cards', 'decks', 'preferences', ttl=30)
+@statement_timeout('study')
 def get_study_queue():
     """Get optimized study queue with due and new cards"""
     user_id = get_current_user_id()
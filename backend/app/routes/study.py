@@ -3,14 +3,18 @@ Study session endpoints
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from app import db
+from app import db, response_cache
 from app.models.study_session import StudySession
-from app.models.deck import Deck
-from app.services.spaced_repetition import SpacedRepetitionService
+from app.services.spaced_repetition import ReviewConflictError, SpacedRepetitionService
+from app.services.study_session import StudySessionService
 from app.schemas.study import ReviewSchema, StudySessionStartSchema
 from app.utils.rate_limit import rate_limit
+from app.utils.compact import compact_response
+from app.utils.conditional import body_etag
 from flask_jwt_extended import jwt_required
 from app.utils.auth import get_current_user_id
+from app.utils.user_context import owns_deck
+from app.utils.db_pool import statement_timeout
 from marshmallow import ValidationError
 
 study_bp = Blueprint('study', __name__)
@@ -19,28 +23,40 @@ study_bp = Blueprint('study', __name__)
 @study_bp.route('/queue', methods=['GET'])
 @jwt_required()
 @rate_limit(max_requests=60, window_seconds=60, per_user=True)
+@body_etag
+@response_cache.cached('reviews', 'cards', 'decks', 'preferences', ttl=30)
+@statement_timeout('study')
 def get_study_queue():
     """
     Get due cards for study (optimized queue)
     
     Query parameters:
         - deck_id: integer (optional) - Filter by deck
+        - preview: 'true' or '1' (optional) - Add to each card the interval and
+          ease factor every quality (0-5) would give:
+          {'intervals': [...], 'ease_factors': [...]}, indexed by quality
+    
+    Accept: application/json (default), or the columnar layouts of
+    app.utils.compact (application/vnd.neuroflash.columnar+json, application/msgpack)
     
     Returns:
         - 200: Study queue with due and new cards
+        - 304: Not modified (If-None-Match matches the ETag)
     """
     user_id = get_current_user_id()
     deck_id = request.args.get('deck_id', type=int)
+    preview = request.args.get('preview', '').lower() in ('1', 'true')
     
     service = SpacedRepetitionService(db.session)
-    queue = service.get_study_queue(user_id, deck_id)
+    queue = service.get_study_queue(user_id, deck_id, preview=preview)
     
-    return jsonify(queue), 200
+    return compact_response(queue, 200)
 
 
 @study_bp.route('/review', methods=['POST'])
 @jwt_required()
 @rate_limit(max_requests=120, window_seconds=60, per_user=True)
+@statement_timeout('study')
 def submit_review():
     """
     Submit a card review
@@ -48,10 +64,13 @@ def submit_review():
     Request body:
         - card_id: integer (required)
         - quality: integer (required, 0-5)
+        - expected_version: integer (optional) - Card state version the review is based on
+        - reviewed_at: ISO 8601 datetime (optional) - When an offline client made the review
     
     Returns:
         - 201: Review submitted successfully
-        - 400: Validation error
+        - 400: Validation error, or reviewed_at within the card's archived history
+        - 409: Card state changed concurrently (body carries current_state)
     """
     user_id = get_current_user_id()
     schema = ReviewSchema()
@@ -66,21 +85,18 @@ def submit_review():
         result = service.process_review(
             card_id=data['card_id'],
             user_id=user_id,
-            quality=data['quality']
+            quality=data['quality'],
+            commit=False,
+            expected_version=data['expected_version'],
+            reviewed_at=data['reviewed_at']
         )
         
-        # Update current study session if exists
-        session = StudySession.query.filter_by(
-            user_id=user_id,
-            end_time=None
-        ).first()
-        
-        if session:
-            if data['quality'] >= 3:  # Correct answer
-                session.increment_correct()
-            else:
-                session.increment_incorrect()
-            db.session.commit()
+        # Count the review in the active session within the same transaction
+        StudySessionService(db.session).record_review(
+            user_id,
+            correct=data['quality'] >= 3
+        )
+        db.session.commit()
         
         return jsonify({
             'message': 'Review submitted successfully',
@@ -88,13 +104,18 @@ def submit_review():
                 'id': result['review_id'],
                 'card_id': result['card_id'],
                 'quality': result['quality'],
+                'reviewed_at': result['reviewed_at'],
                 'ease_factor': result['ease_factor'],
                 'interval': result['interval'],
                 'repetitions': result['repetitions'],
-                'next_review': result['next_review']
+                'next_review': result['next_review'],
+                'version': result['version']
             },
-            'previous_state': result['previous_state']
+            'previous_state': result['previous_state'],
+            'replayed_reviews': result['replayed_reviews']
         }), 201
+    except ReviewConflictError as e:
+        return jsonify({'error': str(e), 'current_state': e.current_state}), 409
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -159,8 +180,7 @@ def start_session():
         }), 400
     
     # Verify deck ownership
-    deck = Deck.query.filter_by(id=data['deck_id'], user_id=user_id).first()
-    if not deck:
+    if not owns_deck(user_id, data['deck_id']):
         return jsonify({'error': 'Deck not found'}), 404
     
     # Create new session
@@ -172,6 +192,7 @@ def start_session():
     try:
         db.session.add(session)
         db.session.commit()
+        StudySessionService(db.session).remember_active_session(user_id, session.id)
         return jsonify({
             'message': 'Session started',
             'session': session.to_dict()
@@ -206,6 +227,7 @@ def end_session():
     
     try:
         db.session.commit()
+        StudySessionService(db.session).forget_active_session(user_id)
         return jsonify({
             'message': 'Session ended',
             'session': session.to_dict()
@@ -0,0 +1,133 @@
+"""
+Offline sync endpoints for mobile clients
+"""
+from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
+from marshmallow import ValidationError
+from werkzeug.http import dump_options_header
+from flask_jwt_extended import jwt_required
+from app import db, response_cache
+from app.schemas.study import ReviewBatchSchema
+from app.services.spaced_repetition import ReviewConflictError, SpacedRepetitionService, utc_naive
+from app.utils.auth import get_current_user_id
+from app.utils.compact import FORMAT_MIMETYPES, compact_response, negotiate_format
+from app.utils.conditional import body_etag
+from app.utils.db_pool import statement_timeout
+from app.utils.rate_limit import rate_limit
+from app.utils.user_context import get_user_context
+
+sync_bp = Blueprint('sync', __name__)
+
+# Scopes whose versions identify the content of a study pack
+PACK_SCOPES = ('reviews', 'cards', 'decks', 'preferences')
+
+
+@sync_bp.route('/study-pack', methods=['GET'])
+@jwt_required()
+@rate_limit(max_requests=30, window_seconds=60, per_user=True)
+@body_etag
+@response_cache.cached(*PACK_SCOPES, ttl=300)
+@statement_timeout('export')
+def get_study_pack():
+    """
+    Download everything needed to study offline for the next days
+    
+    Query parameters:
+        - days: integer (optional, default 7) - Days the pack covers
+    
+    Accept: application/json (default) or a columnar layout of app.utils.compact.
+    Every layout is sent as a gzip file (application/gzip, never with a
+    Content-Encoding) whose layout parameter names the media type inside, e.g.
+    application/gzip; layout="application/vnd.neuroflash.columnar+json"
+    
+    Returns:
+        - 200: Compressed pack with decks, the cards due or introduced in the
+          window and their SM-2 states
+        - 304: Not modified (If-None-Match matches the ETag)
+        - 400: Invalid days
+    """
+    user_id = get_current_user_id()
+    max_days = current_app.config.get('STUDY_PACK_MAX_DAYS', 30)
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        days = None
+    if days is None or not 1 <= days <= max_days:
+        return jsonify({'error': f'days must be an integer between 1 and {max_days}'}), 400
+    
+    context = get_user_context(user_id)
+    new_cards_per_day = context.preference('new_cards_per_day', 20) if context else 20
+    versions = dict(zip(PACK_SCOPES, response_cache.versions(user_id, PACK_SCOPES)))
+    
+    from app.services.study_pack import StudyPackService
+    
+    layout = negotiate_format()
+    pack = StudyPackService(db.session).build_pack(user_id, days, new_cards_per_day, versions, layout=layout)
+    response = current_app.response_class(pack, status=200)
+    response.content_type = dump_options_header('application/gzip', {'layout': FORMAT_MIMETYPES[layout]})
+    response.vary.add('Accept')
+    return response
+
+
+@sync_bp.route('/reviews', methods=['POST'])
+@jwt_required()
+@rate_limit(max_requests=30, window_seconds=60, per_user=True)
+@statement_timeout('study')
+def upload_reviews():
+    """
+    Upload reviews made offline
+    
+    Reviews are applied in reviewed_at order, each in its own transaction, so
+    one rejected review does not discard the others. Each of those transactions
+    runs under the 'study' statement timeout. Reviews older than a card's latest
+    review are merged into its history.
+    
+    Request body:
+        - reviews: list (required, 1-1000) of objects with card_id, quality,
+          reviewed_at and optionally expected_version
+    
+    Accept: as for /study-pack; the columnar layouts encode results as one table
+    
+    Returns:
+        - 200: One result per review, in request order, with status
+          'applied' (and the review), 'conflict' (and current_state) or
+          'rejected' (and error)
+        - 400: Validation error
+    """
+    user_id = get_current_user_id()
+    schema = ReviewBatchSchema()
+    
+    try:
+        data = schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify({'error': 'Validation failed', 'messages': err.messages}), 400
+    
+    service = SpacedRepetitionService(db.session)
+    reviews = data['reviews']
+    # Oldest first, so most reviews append to the history instead of merging into it
+    order = sorted(
+        range(len(reviews)),
+        key=lambda i: (reviews[i]['reviewed_at'] is None, utc_naive(reviews[i]['reviewed_at'] or datetime.min), i)
+    )
+    results = [None] * len(reviews)
+    for i in order:
+        review = reviews[i]
+        try:
+            result = service.process_review(
+                card_id=review['card_id'],
+                user_id=user_id,
+                quality=review['quality'],
+                expected_version=review['expected_version'],
+                reviewed_at=review['reviewed_at']
+            )
+            results[i] = {'status': 'applied', 'review': result}
+        except ReviewConflictError as e:
+            results[i] = {'status': 'conflict', 'error': str(e), 'current_state': e.current_state}
+        except ValueError as e:
+            db.session.rollback()
+            results[i] = {'status': 'rejected', 'error': str(e)}
+    
+    return compact_response({
+        'results': results,
+        'applied': sum(1 for result in results if result['status'] == 'applied')
+    }, 200)
@@ -4,7 +4,7 @@ Marshmallow schemas for request validation
 from app.schemas.auth import RegisterSchema, LoginSchema
 from app.schemas.deck import DeckCreateSchema, DeckUpdateSchema
 from app.schemas.card import CardCreateSchema, CardUpdateSchema, CardBatchSchema
-from app.schemas.study import ReviewSchema, StudySessionStartSchema
+from app.schemas.study import ReviewSchema, ReviewBatchSchema, StudySessionStartSchema
 
 __all__ = [
     'RegisterSchema',
@@ -15,6 +15,7 @@ __all__ = [
     'CardUpdateSchema',
     'CardBatchSchema',
     'ReviewSchema',
+    'ReviewBatchSchema',
     'StudySessionStartSchema'
 ]
 
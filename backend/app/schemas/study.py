@@ -8,6 +8,15 @@ class ReviewSchema(Schema):
     """Schema for submitting a card review"""
     card_id = fields.Int(required=True)
     quality = fields.Int(required=True, validate=validate.Range(min=0, max=5))
+    # Card state version the client showed; a stale version is rejected with 409
+    expected_version = fields.Int(load_default=None, validate=validate.Range(min=0))
+    # When an offline client made the review; older than the card's latest review merges it into the history
+    reviewed_at = fields.DateTime(load_default=None)
+
+
+class ReviewBatchSchema(Schema):
+    """Schema for uploading reviews made offline"""
+    reviews = fields.List(fields.Nested(ReviewSchema), required=True, validate=validate.Length(min=1, max=1000))
 
 
 class StudySessionStartSchema(Schema):
@@ -0,0 +1,130 @@
+"""
+Study overview analytics.
+
+The overview combines review counts, today's sessions and accuracy, and the
+current streak. Everything except the streak is folded into one statement: the
+review stats aggregate of SpacedRepetitionService with today's session count,
+study time and review accuracy added as scalar subqueries, all computed in SQL.
+The streak needs the distinct review days; only the last STREAK_WINDOW_DAYS
+days are read (live and archived), not the whole history.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List
+from app import db
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.deck import Deck
+from app.models.study_session import StudySession
+from app.services.review_archive import ReviewArchiveService
+from app.services.spaced_repetition import SpacedRepetitionService
+
+# Current streaks are counted up to a year
+STREAK_WINDOW_DAYS = 365
+
+
+def current_streak(review_dates: List[date], today: date) -> int:
+    """
+    Count consecutive review days ending today.
+
+    Args:
+        review_dates: Days with reviews
+        today: Last day of the streak
+
+    Returns:
+        Streak length in days, at most STREAK_WINDOW_DAYS
+    """
+    days = set(review_dates)
+    check_date = today
+    streak = 0
+
+    # Check backwards from today
+    while check_date in days and streak < STREAK_WINDOW_DAYS:
+        streak += 1
+        check_date -= timedelta(days=1)
+
+    return streak
+
+
+class AnalyticsService:
+    """Service for study overview statistics"""
+
+    def __init__(self, db_session):
+        """
+        Initialize service with database session.
+
+        Args:
+            db_session: SQLAlchemy database session
+        """
+        self.db = db_session
+
+    def _session_seconds(self):
+        """Duration of a finished session in seconds, as a SQL expression."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return db.func.extract('epoch', StudySession.end_time - StudySession.start_time)
+        if dialect == 'mysql':
+            return db.func.timestampdiff(db.text('SECOND'), StudySession.start_time, StudySession.end_time)
+        return (db.func.julianday(StudySession.end_time) - db.func.julianday(StudySession.start_time)) * 86400
+
+    def get_overview(self, user_id: int) -> Dict[str, Any]:
+        """
+        Get the study overview of a user.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Dictionary with review counts, today's sessions, study time and
+            accuracy, and the current streak
+        """
+        today = datetime.utcnow().date()
+        day_start = datetime.combine(today, time.min)
+        day_end = day_start + timedelta(days=1)
+
+        in_today = (
+            StudySession.user_id == user_id,
+            StudySession.start_time >= day_start,
+            StudySession.start_time < day_end
+        )
+        session_count = db.select(db.func.count(StudySession.id)).where(*in_today)
+        study_seconds = db.select(
+            db.func.coalesce(db.func.sum(self._session_seconds()), 0)
+        ).where(*in_today, StudySession.end_time.isnot(None))
+        # The review stats already count today's reviews; only the correct ones are added
+        correct_today = db.select(
+            db.func.coalesce(db.func.sum(db.case((CardReview.quality >= 3, 1), else_=0)), 0)
+        ).join(Card, Card.id == CardReview.card_id).join(
+            Deck, Deck.id == Card.deck_id
+        ).where(
+            Deck.user_id == user_id,
+            CardReview.user_id == user_id,
+            db.func.date(CardReview.reviewed_at) == today
+        )
+
+        service = SpacedRepetitionService(self.db)
+        row = service.review_counts_query(user_id).add_columns(
+            session_count.scalar_subquery().label('sessions_today'),
+            study_seconds.scalar_subquery().label('study_seconds'),
+            correct_today.scalar_subquery().label('correct_today')
+        ).one()
+        stats = service.stats_from_counts(user_id, row)
+
+        # julianday arithmetic is floating point; round to whole seconds
+        total_minutes = int(round(float(row.study_seconds))) // 60
+        reviews = stats['reviewed_today']
+        avg_accuracy = int(row.correct_today) / reviews * 100 if reviews else 0
+
+        review_dates = ReviewArchiveService(self.db).get_review_dates(
+            user_id, since=today - timedelta(days=STREAK_WINDOW_DAYS)
+        )
+
+        return {
+            'total_cards': stats['total_cards'],
+            'due_cards': stats['due_cards'],
+            'new_cards': stats['new_cards'],
+            'reviewed_today': stats['reviewed_today'],
+            'sessions_today': row.sessions_today,
+            'study_time_today_minutes': total_minutes,
+            'average_accuracy_today': round(avg_accuracy, 2),
+            'streak_days': current_streak(review_dates, today)
+        }
@@ -3,13 +3,272 @@ Card import/export service for bulk operations.
 
 Supports importing/exporting cards in various formats (JSON, CSV, Anki format).
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import exc as sa_exc
+from werkzeug.exceptions import HTTPException
 from app.models.card import Card, CardType
 from app.models.deck import Deck
+from app.services.card_projection import get_deck_card_rows, select_deck_cards
+from app.utils.cache import invalidate_on_commit
+from app.utils.db_pool import QUERY_CANCELED, pool_metrics
+from app.utils.user_context import owns_deck
 from app import db
+import codecs
 import csv
 import io
 import json
+import logging
+import re
+
+
+# Cards fetched and written at a time by the streaming exports
+EXPORT_PARTITION_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+# Cards inserted per statement by the streaming imports
+IMPORT_BATCH_SIZE = 500
+
+# Largest single card object accepted by the incremental JSON parser
+MAX_JSON_ITEM_SIZE = 16 * 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _export_interrupted(error: sa_exc.SQLAlchemyError, deck_id: int) -> str:
+    """
+    Handle a database error raised while a streamed export was being sent.
+
+    The status line has already gone out, so the error cannot become a 503; the
+    stream ends with an error marker instead (see stream_deck_json/stream_deck_csv).
+
+    Returns:
+        Message for the marker
+    """
+    db.session.rollback()
+    if getattr(getattr(error, 'orig', None), 'pgcode', None) == QUERY_CANCELED:
+        pool_metrics.record_statement_timeout('export')
+        message = 'Export interrupted: query timed out'
+    else:
+        message = 'Export interrupted: database error'
+    logger.error("Streamed export of deck %s failed: %s", deck_id, error)
+    return message
+
+
+class PartialImportError(ValueError):
+    """
+    A streamed import stopped at a malformed row or document, or because the
+    upload itself was truncated, invalid or too large.
+
+    Attributes:
+        imported: Cards committed before the error
+        skipped: Incomplete or invalid rows skipped before the error
+        status: HTTP status for the error (413 for an oversized upload)
+    """
+
+    def __init__(self, message: str, imported: int, skipped: int, status: int = 400):
+        super().__init__(message)
+        self.imported = imported
+        self.skipped = skipped
+        self.status = status
+
+
+def _card_type(value: Any) -> CardType:
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid card type {value!r}. Must be one of: {[t.value for t in CardType]}")
+    try:
+        return CardType[value.strip().upper()]
+    except KeyError:
+        raise ValueError(f"Invalid card type '{value}'. Must be one of: {[t.value for t in CardType]}")
+
+
+def _card_from_json(deck_id: int, card_data: Dict[str, Any]) -> Optional[Card]:
+    """Card of a JSON import item, or None if it does not validate."""
+    if not all(isinstance(card_data.get(field, ''), str) for field in ('front_content', 'back_content')):
+        return None
+    card = Card(
+        deck_id=deck_id,
+        front_content=card_data.get('front_content', ''),
+        back_content=card_data.get('back_content', ''),
+        card_type=_card_type(card_data.get('card_type', 'basic')),
+        media_attachments=card_data.get('media_attachments', []),
+        card_data=card_data.get('card_data', {})
+    )
+    
+    # Validate card
+    is_valid, error_msg = card.validate()
+    if not is_valid:
+        return None
+    return card
+
+
+def _card_from_csv_row(deck_id: int, row: List[str]) -> Optional[Card]:
+    """Card of a CSV import row (front, back, type, media), or None for incomplete rows."""
+    if len(row) < 2:
+        return None
+    
+    front = row[0].strip()
+    back = row[1].strip()
+    card_type = _card_type(row[2]) if len(row) > 2 and row[2].strip() else CardType.BASIC
+    
+    if not front or not back:
+        return None
+    
+    card = Card(
+        deck_id=deck_id,
+        front_content=front,
+        back_content=back,
+        card_type=card_type
+    )
+    
+    # Parse media attachments if provided
+    if len(row) > 3 and row[3].strip():
+        try:
+            card.media_attachments = json.loads(row[3])
+        except:
+            pass
+    return card
+
+
+def _decode_chunks(chunks: Iterable[bytes], encoding: str) -> Iterator[str]:
+    """Decode byte chunks to text; multi-byte characters may span chunks."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def iter_csv_rows(chunks: Iterable[bytes], encoding: str = 'utf-8-sig') -> Iterator[List[str]]:
+    """
+    Parse CSV rows from a stream of byte chunks.
+    
+    Lines are handed to the csv reader as they complete (keeping their line
+    ends, so quoted fields spanning lines and chunks parse as one field).
+    
+    Args:
+        chunks: Iterable of raw CSV bytes
+        encoding: Text encoding; the default strips a byte order mark
+    
+    Returns:
+        Iterator of rows
+    """
+    def lines():
+        pending = ''
+        for text in _decode_chunks(chunks, encoding):
+            *complete, pending = (pending + text).split('\n')
+            for line in complete:
+                yield line + '\n'
+        if pending:
+            yield pending
+    
+    return csv.reader(lines())
+
+
+class _JSONStream:
+    """Text buffer over a stream of chunks, read one JSON token or value at a time."""
+    
+    def __init__(self, texts: Iterator[str]):
+        self.texts = texts
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Drop the consumed text and append the next chunk; False at the end of the stream."""
+        text = next(self.texts, None)
+        if text is None:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        if len(self.buffer) > MAX_JSON_ITEM_SIZE:
+            raise ValueError(f'Invalid JSON: a value exceeds {MAX_JSON_ITEM_SIZE // (1024 * 1024)} MB')
+        return True
+    
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}'")
+        self.pos += 1
+    
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more chunks while it is cut off."""
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError(f'Invalid JSON: {e}')
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_cards(chunks: Iterable[bytes], encoding: str = 'utf-8-sig') -> Iterator[Dict[str, Any]]:
+    """
+    Parse card objects from a stream of JSON byte chunks.
+    
+    Accepts a top-level array of cards or an object with a "cards" array (the
+    JSON export document). Cards are decoded one at a time as their text
+    arrives; other keys before "cards" are skipped and nothing after the
+    array is read.
+    
+    Args:
+        chunks: Iterable of raw JSON bytes
+        encoding: Text encoding
+    
+    Returns:
+        Iterator of card dictionaries
+    
+    Raises:
+        ValueError: If the document is malformed
+    """
+    stream = _JSONStream(_decode_chunks(chunks, encoding))
+    if stream.peek() == '{':
+        stream.pos += 1
+        while True:
+            if stream.peek() != '"':
+                raise ValueError('JSON import object has no "cards" array')
+            key = stream.value()
+            stream.expect(':')
+            if key == 'cards':
+                break
+            stream.value()
+            if stream.peek() == ',':
+                stream.pos += 1
+    
+    stream.expect('[')
+    if stream.peek() == ']':
+        return
+    while True:
+        item = stream.value()
+        if not isinstance(item, dict):
+            raise ValueError('Each imported card must be a JSON object')
+        yield item
+        separator = stream.peek()
+        stream.pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError("Invalid JSON: expected ',' or ']'")
 
 
 class CardImportExportService:
@@ -30,7 +289,7 @@ class CardImportExportService:
         if not deck:
             raise ValueError(f"Deck {deck_id} not found")
         
-        cards = Card.query.filter_by(deck_id=deck_id).all()
+        cards = get_deck_card_rows(deck_id)
         
         return {
             'deck': {
@@ -38,10 +297,58 @@ class CardImportExportService:
                 'description': deck.description,
                 'tags': deck.tags
             },
-            'cards': [card.to_dict() for card in cards],
+            'cards': cards,
             'total_cards': len(cards)
         }
     
+    @staticmethod
+    def stream_deck_json(deck_id: int) -> Iterator[str]:
+        """
+        Export deck cards to JSON format as a stream of text chunks.
+        
+        Produces the same document as export_deck_to_json. The cards query runs
+        when this is called; its rows are then read and encoded a partition at
+        a time as the iterator is consumed, so the export is never held in
+        memory as a whole.
+        
+        Partitions fetched after the response has started cannot fail with an
+        error status: if reading them fails (e.g. the statement timeout cancels
+        the query), the document is closed with an "error" key and without
+        "total_cards".
+        
+        Args:
+            deck_id: Deck ID to export
+        
+        Returns:
+            Iterator of JSON text chunks
+        """
+        deck = Deck.query.get(deck_id)
+        if not deck:
+            raise ValueError(f"Deck {deck_id} not found")
+        
+        result = db.session.execute(
+            select_deck_cards(deck_id).order_by(Card.id)
+            .execution_options(yield_per=EXPORT_PARTITION_SIZE)
+        )
+        dumps = current_app.json.dumps
+        head = dumps({'deck': {'title': deck.title, 'description': deck.description, 'tags': deck.tags}})
+        
+        def generate():
+            yield head[:-1] + ', "cards": ['
+            total = 0
+            try:
+                for partition in result.mappings().partitions():
+                    encoded = dumps([dict(row) for row in partition])[1:-1]
+                    yield encoded if total == 0 else ', ' + encoded
+                    total += len(partition)
+            except sa_exc.SQLAlchemyError as e:
+                result.close()
+                yield '], "error": ' + dumps(_export_interrupted(e, deck_id)) + '}'
+                return
+            yield f'], "total_cards": {total}}}'
+        
+        return generate()
+    
     @staticmethod
     def import_cards_from_json(deck_id: int, json_data: Dict[str, Any], user_id: int) -> List[Card]:
         """
@@ -56,26 +363,15 @@ class CardImportExportService:
             List of created Card instances
         """
         # Verify deck ownership
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-        if not deck:
+        if not owns_deck(user_id, deck_id):
             raise ValueError("Deck not found or access denied")
         
         cards_data = json_data.get('cards', [])
         created_cards = []
         
         for card_data in cards_data:
-            card = Card(
-                deck_id=deck_id,
-                front_content=card_data.get('front_content', ''),
-                back_content=card_data.get('back_content', ''),
-                card_type=CardType[card_data.get('card_type', 'basic').upper()],
-                media_attachments=card_data.get('media_attachments', []),
-                card_data=card_data.get('card_data', {})
-            )
-            
-            # Validate card
-            is_valid, error_msg = card.validate()
-            if not is_valid:
+            card = _card_from_json(deck_id, card_data)
+            if card is None:
                 continue  # Skip invalid cards
             
             db.session.add(card)
@@ -119,6 +415,51 @@ class CardImportExportService:
         
         return output.getvalue()
     
+    @staticmethod
+    def stream_deck_csv(deck_id: int) -> Iterator[str]:
+        """
+        Export deck cards to CSV format as a stream of text chunks.
+        
+        Produces the same rows as export_deck_to_csv. The query runs when this
+        is called; rows are written a partition at a time as the iterator is
+        consumed. If reading a later partition fails, the CSV ends with a
+        ['#ERROR', message] row.
+        
+        Args:
+            deck_id: Deck ID to export
+        
+        Returns:
+            Iterator of CSV text chunks
+        """
+        deck = Deck.query.get(deck_id)
+        if not deck:
+            raise ValueError(f"Deck {deck_id} not found")
+        
+        result = db.session.execute(
+            db.select(Card.front_content, Card.back_content, Card.card_type, Card.media_attachments)
+            .where(Card.deck_id == deck_id).order_by(Card.id)
+            .execution_options(yield_per=EXPORT_PARTITION_SIZE)
+        )
+        
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(['Front', 'Back', 'Type', 'Media Attachments'])
+            try:
+                for partition in result.partitions():
+                    for front, back, card_type, media in partition:
+                        writer.writerow([front, back, card_type.value, json.dumps(media) if media else ''])
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate()
+            except sa_exc.SQLAlchemyError as e:
+                result.close()
+                writer.writerow(['#ERROR', _export_interrupted(e, deck_id)])
+            if output.tell():
+                yield output.getvalue()
+        
+        return generate()
+    
     @staticmethod
     def import_cards_from_csv(deck_id: int, csv_content: str, user_id: int) -> List[Card]:
         """
@@ -133,8 +474,7 @@ class CardImportExportService:
             List of created Card instances
         """
         # Verify deck ownership
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-        if not deck:
+        if not owns_deck(user_id, deck_id):
             raise ValueError("Deck not found or access denied")
         
         reader = csv.reader(io.StringIO(csv_content))
@@ -143,36 +483,97 @@ class CardImportExportService:
         created_cards = []
         
         for row in reader:
-            if len(row) < 2:
-                continue
-            
-            front = row[0].strip()
-            back = row[1].strip()
-            card_type = CardType[row[2].strip().upper()] if len(row) > 2 and row[2].strip() else CardType.BASIC
-            
-            if not front or not back:
+            card = _card_from_csv_row(deck_id, row)
+            if card is None:
                 continue
             
-            card = Card(
-                deck_id=deck_id,
-                front_content=front,
-                back_content=back,
-                card_type=card_type
-            )
-            
-            # Parse media attachments if provided
-            if len(row) > 3 and row[3].strip():
-                try:
-                    card.media_attachments = json.loads(row[3])
-                except:
-                    pass
-            
             db.session.add(card)
             created_cards.append(card)
         
         db.session.commit()
         return created_cards
     
+    @staticmethod
+    def import_card_stream(deck_id: int, file_format: str, chunks: Iterable[bytes],
+                           user_id: int) -> Tuple[int, int]:
+        """
+        Import cards from an uploaded CSV or JSON file as it is read.
+        
+        Rows are parsed from the chunks incrementally and inserted
+        IMPORT_BATCH_SIZE at a time with multi-row INSERTs, so memory stays
+        bounded by one batch whatever the file size. Rows are checked as in
+        import_cards_from_csv/import_cards_from_json.
+        
+        No transaction is open while the upload is read: each batch is parsed
+        first, then inserted and committed on its own, so a slow client never
+        holds database locks. Batches committed before a malformed row or a
+        broken upload stay imported (PartialImportError reports how many).
+        
+        Args:
+            deck_id: Deck ID to import into
+            file_format: 'csv' or 'json'
+            chunks: Iterable of the file's bytes
+            user_id: User ID for validation
+        
+        Returns:
+            Tuple of (imported, skipped) card counts
+        
+        Raises:
+            ValueError: If the deck is not the user's or the format is unknown
+            PartialImportError: If the file is malformed, or reading the upload
+                fails (truncated or invalid body, decompression limit)
+        """
+        if not owns_deck(user_id, deck_id):
+            raise ValueError("Deck not found or access denied")
+        # End the ownership check's transaction before reading from the client
+        db.session.commit()
+        
+        if file_format == 'csv':
+            rows = iter_csv_rows(chunks)
+            next(rows, None)  # Skip header
+            cards = (_card_from_csv_row(deck_id, row) for row in rows)
+        elif file_format == 'json':
+            cards = (_card_from_json(deck_id, item) for item in iter_json_cards(chunks))
+        else:
+            raise ValueError('Invalid format. Use "json" or "csv"')
+        
+        def insert(batch: List[Dict[str, Any]]) -> None:
+            try:
+                db.session.execute(db.insert(Card), batch)
+                invalidate_on_commit(db.session, user_id, ['cards'])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        
+        imported = skipped = 0
+        batch = []
+        try:
+            for card in cards:
+                if card is None:
+                    skipped += 1
+                    continue
+                batch.append({
+                    'deck_id': deck_id,
+                    'front_content': card.front_content,
+                    'back_content': card.back_content,
+                    'card_type': card.card_type,
+                    'media_attachments': card.media_attachments or [],
+                    'card_data': card.card_data or {},
+                })
+                if len(batch) == IMPORT_BATCH_SIZE:
+                    insert(batch)
+                    imported += len(batch)
+                    batch = []
+        except ValueError as e:
+            raise PartialImportError(str(e), imported, skipped) from e
+        except HTTPException as e:
+            raise PartialImportError(e.description, imported, skipped, e.code) from e
+        if batch:
+            insert(batch)
+            imported += len(batch)
+        return imported, skipped
+    
     @staticmethod
     def export_to_anki_format(deck_id: int) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,142 @@
+"""
+Column-projected card loading for large API payloads.
+
+Selects card columns (plus the review count) in a single statement and returns
+result rows instead of ORM entities. Rows are serialized directly by the app's
+JSON provider, which skips per-object to_dict calls and the per-card review
+count query that Card.to_dict issues.
+
+Clients can narrow the payload with field selection (?fields=id,front_content)
+or the summary projection (?projection=summary), in which case only those
+columns are read and content previews are truncated in SQL.
+"""
+from typing import List, Optional
+from sqlalchemy.engine import RowMapping
+from app import db
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.review_archive import CardReviewSummary
+
+
+# Length of front/back previews in the summary projection
+SUMMARY_PREVIEW_LENGTH = 100
+
+
+def _review_count():
+    """Correlated review count (live plus archived) for the enclosing card row."""
+    live = db.select(db.func.count(CardReview.id)).where(
+        CardReview.card_id == Card.id
+    ).correlate(Card).scalar_subquery()
+    archived = db.select(
+        db.func.coalesce(db.func.sum(CardReviewSummary.review_count), 0)
+    ).where(
+        CardReviewSummary.card_id == Card.id
+    ).correlate(Card).scalar_subquery()
+    return live + archived
+
+
+CARD_FIELDS = {
+    'id': lambda: Card.id,
+    'deck_id': lambda: Card.deck_id,
+    'front_content': lambda: Card.front_content,
+    'back_content': lambda: Card.back_content,
+    'card_type': lambda: Card.card_type,
+    'media_attachments': lambda: Card.media_attachments,
+    'card_data': lambda: Card.card_data,
+    'review_count': lambda: _review_count().label('review_count'),
+    'created_at': lambda: Card.created_at,
+    'updated_at': lambda: Card.updated_at,
+}
+
+PROJECTIONS = {
+    'full': list(CARD_FIELDS),
+    'summary': ['id', 'deck_id', 'front_preview', 'back_preview', 'card_type', 'created_at', 'updated_at'],
+}
+
+PREVIEW_FIELDS = {
+    'front_preview': lambda: db.func.substr(
+        Card.front_content, 1, SUMMARY_PREVIEW_LENGTH
+    ).label('front_preview'),
+    'back_preview': lambda: db.func.substr(
+        Card.back_content, 1, SUMMARY_PREVIEW_LENGTH
+    ).label('back_preview'),
+}
+
+
+def card_api_columns(fields: Optional[List[str]] = None) -> list:
+    """
+    Get the labelled columns for the requested card fields.
+
+    Args:
+        fields: Field names (defaults to all keys of Card.to_dict())
+
+    Returns:
+        List of column expressions for a select()
+
+    Raises:
+        ValueError: If a field name is unknown
+    """
+    columns = []
+    for field in fields or PROJECTIONS['full']:
+        factory = CARD_FIELDS.get(field) or PREVIEW_FIELDS.get(field)
+        if factory is None:
+            raise ValueError(
+                f"Unknown field '{field}'. Must be one of: {sorted(CARD_FIELDS) + sorted(PREVIEW_FIELDS)}"
+            )
+        columns.append(factory())
+    return columns
+
+
+def parse_card_fields(fields: Optional[str] = None, projection: Optional[str] = None) -> List[str]:
+    """
+    Resolve ?fields= and ?projection= query parameters to field names.
+
+    Args:
+        fields: Comma-separated field names
+        projection: Named projection ('full' or 'summary')
+
+    Returns:
+        List of field names
+
+    Raises:
+        ValueError: If the projection or a field is unknown
+    """
+    if fields:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        card_api_columns(names)  # Validate names
+        return names
+
+    projection = projection or 'full'
+    if projection not in PROJECTIONS:
+        raise ValueError(f"Unknown projection '{projection}'. Must be one of: {sorted(PROJECTIONS)}")
+    return PROJECTIONS[projection]
+
+
+def select_deck_cards(deck_id: int, fields: Optional[List[str]] = None):
+    """
+    Build a select() of a deck's cards restricted to the given fields.
+
+    Args:
+        deck_id: Deck ID
+        fields: Field names (defaults to all)
+
+    Returns:
+        SQLAlchemy Select statement
+    """
+    return db.select(*card_api_columns(fields)).where(Card.deck_id == deck_id)
+
+
+def get_deck_card_rows(deck_id: int, fields: Optional[List[str]] = None) -> List[RowMapping]:
+    """
+    Load all cards of a deck as serializable rows.
+
+    Args:
+        deck_id: Deck ID
+        fields: Field names (defaults to all keys of Card.to_dict())
+
+    Returns:
+        List of row mappings
+    """
+    stmt = select_deck_cards(deck_id, fields).order_by(Card.id)
+
+    return db.session.execute(stmt).mappings().all()
@@ -0,0 +1,72 @@
+"""
+Cheap deck content validators for conditional GETs.
+
+Each function returns a small tuple that changes whenever the corresponding API
+payload would change, computed with aggregate queries only (no entity loading or
+serialization). They back the ETags of the deck and card listing endpoints.
+"""
+from typing import Any, Optional, Tuple
+from app import db
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.deck import Deck
+
+
+def get_deck_list_state(user_id: int, **kwargs) -> Tuple[Any, ...]:
+    """
+    Get the validator state of a user's deck list.
+
+    Covers deck fields (via updated_at) and per-deck card counts: any insert,
+    update or delete of the user's decks or cards changes a count or a max.
+
+    Args:
+        user_id: Owner of the decks
+
+    Returns:
+        Tuple of (deck count, latest deck update, card count, latest card update)
+    """
+    row = db.session.query(
+        db.func.count(db.distinct(Deck.id)),
+        db.func.max(Deck.updated_at),
+        db.func.count(Card.id),
+        db.func.max(Card.updated_at)
+    ).outerjoin(Card, Card.deck_id == Deck.id).filter(
+        Deck.user_id == user_id
+    ).one()
+
+    return tuple(row)
+
+
+def get_deck_content_state(user_id: int, deck_id: int, **kwargs) -> Optional[Tuple[Any, ...]]:
+    """
+    Get the validator state of a deck and its cards.
+
+    Card payloads include review counts, so the number and latest id of the
+    deck's reviews are part of the state as well.
+
+    Args:
+        user_id: Owner of the deck
+        deck_id: Deck ID
+
+    Returns:
+        Validator tuple, or None if the deck does not exist or is not owned by the user
+    """
+    card_filter = Card.deck_id == deck_id
+    review_cards = db.select(Card.id).where(card_filter)
+
+    row = db.session.query(
+        Deck.updated_at,
+        db.select(db.func.count(Card.id)).where(card_filter).scalar_subquery(),
+        db.select(db.func.max(Card.updated_at)).where(card_filter).scalar_subquery(),
+        db.select(db.func.count(CardReview.id)).where(
+            CardReview.card_id.in_(review_cards)
+        ).scalar_subquery(),
+        db.select(db.func.max(CardReview.id)).where(
+            CardReview.card_id.in_(review_cards)
+        ).scalar_subquery()
+    ).filter(
+        Deck.id == deck_id,
+        Deck.user_id == user_id
+    ).first()
+
+    return tuple(row) if row else None
@@ -0,0 +1,289 @@
+"""
+Due-card reminder scheduling.
+
+The scheduler runs in its own process (`flask notifications run`) and wakes up at
+every bucket boundary (NOTIFICATION_BUCKET_MINUTES). For the bucket that just
+ended it converts the UTC window into each user timezone's local time, selects
+users whose reminder_minute falls into it, computes due counts for a whole batch
+of users with a single aggregate query, and hands the resulting notifications to
+a pluggable sink. The number of queries depends on the number of batches, not
+on the number of users.
+"""
+import importlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app import db
+from app.models.card import Card
+from app.models.card_state import CardState
+from app.models.deck import Deck
+from app.models.user_preferences import UserPreferences
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class NotificationSink:
+    """Base class for pluggable notification sinks."""
+
+    def send(self, notifications: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+
+class LogSink(NotificationSink):
+    """Sink writing one log line per notification (local development)."""
+
+    def send(self, notifications: List[Dict[str, Any]]) -> None:
+        for notification in notifications:
+            logger.info(
+                "Reminder for user %s: %s cards due",
+                notification['user_id'], notification['due_cards']
+            )
+
+
+class FileSink(NotificationSink):
+    """Sink appending notifications to a JSON lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notifications: List[Dict[str, Any]]) -> None:
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            for notification in notifications:
+                f.write(json.dumps(notification) + '\n')
+
+
+def create_sink(spec: str) -> NotificationSink:
+    """
+    Build a sink from a NOTIFICATION_SINK value.
+
+    Args:
+        spec: 'log', 'file:<path>' or 'package.module:ClassName' for a custom
+            NotificationSink subclass taking no arguments
+
+    Returns:
+        Notification sink
+
+    Raises:
+        ValueError: If the spec is not recognized
+    """
+    if spec == 'log':
+        return LogSink()
+    if spec.startswith('file:'):
+        return FileSink(spec[len('file:'):])
+    if ':' in spec:
+        module_name, class_name = spec.split(':', 1)
+        return getattr(importlib.import_module(module_name), class_name)()
+    raise ValueError(f"Unknown notification sink: {spec}")
+
+
+def _zone(name: str):
+    """Resolve a timezone name, falling back to UTC for unknown names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown timezone %r, using UTC", name)
+        return dt_timezone.utc
+
+
+def _local_ranges(start: datetime, end: datetime, zone) -> List[Tuple[int, int]]:
+    """Local minute-of-day ranges [from, to) covered by a UTC window."""
+    local_start = start.astimezone(zone)
+    local_end = end.astimezone(zone)
+    first = local_start.hour * 60 + local_start.minute
+    last = local_end.hour * 60 + local_end.minute
+    if local_end.date() == local_start.date():
+        return [(first, last)] if last > first else []
+    # Window crosses local midnight
+    return [r for r in ((first, MINUTES_PER_DAY), (0, last)) if r[1] > r[0]]
+
+
+class NotificationScheduler:
+    """Computes due-card reminders per reminder-time bucket"""
+
+    def __init__(self, db_session, sink: NotificationSink,
+                 bucket_minutes: int = 15, batch_size: int = 1000):
+        """
+        Initialize scheduler.
+
+        Args:
+            db_session: SQLAlchemy database session
+            sink: Destination of the notifications
+            bucket_minutes: Length of a reminder bucket (divides an hour)
+            batch_size: Users per due-count query
+        """
+        if bucket_minutes < 1 or 60 % bucket_minutes:
+            raise ValueError("bucket_minutes must divide 60")
+        self.db = db_session
+        self.sink = sink
+        self.bucket_minutes = bucket_minutes
+        self.batch_size = batch_size
+
+    def bucket_start(self, moment: datetime) -> datetime:
+        """Start of the bucket containing a UTC moment."""
+        moment = moment.astimezone(dt_timezone.utc)
+        return moment.replace(
+            minute=moment.minute - moment.minute % self.bucket_minutes,
+            second=0,
+            microsecond=0
+        )
+
+    def _reminder_filter(self, start: datetime, end: datetime):
+        """
+        Filter selecting preferences whose local reminder time falls in [start, end).
+
+        Timezones with the same local ranges (same UTC offset) share one clause,
+        so the filter has a few dozen clauses at most.
+        """
+        timezones = self.db.execute(
+            db.select(UserPreferences.timezone).where(
+                UserPreferences.reminder_minute.isnot(None)
+            ).distinct()
+        ).scalars().all()
+
+        by_ranges: Dict[Tuple[Tuple[int, int], ...], List[str]] = {}
+        for name in timezones:
+            ranges = tuple(_local_ranges(start, end, _zone(name)))
+            if ranges:
+                by_ranges.setdefault(ranges, []).append(name)
+
+        clauses = [
+            db.and_(
+                UserPreferences.timezone.in_(names),
+                UserPreferences.reminder_minute >= low,
+                UserPreferences.reminder_minute < high
+            )
+            for ranges, names in by_ranges.items()
+            for low, high in ranges
+        ]
+        return db.or_(*clauses) if clauses else None
+
+    def get_due_counts(self, user_ids: Iterable[int], now: datetime) -> Dict[int, Tuple[int, int]]:
+        """
+        Count due and unscheduled cards for a batch of users in one query.
+
+        Uses the same rule as SpacedRepetitionService.get_due_cards: a card is due
+        when its card_states next_review is in the past, and new when it has no
+        scheduled state.
+
+        Args:
+            user_ids: User IDs
+            now: Current UTC time (naive)
+
+        Returns:
+            Dict mapping user ID to (due count, new count)
+        """
+        user_ids = list(user_ids)
+        rows = self.db.execute(
+            db.select(
+                Deck.user_id,
+                db.func.sum(db.case((CardState.next_review <= now, 1), else_=0)),
+                db.func.sum(db.case((CardState.next_review.is_(None), 1), else_=0))
+            ).select_from(Card).join(
+                Deck, Deck.id == Card.deck_id
+            ).outerjoin(
+                CardState,
+                db.and_(CardState.card_id == Card.id, CardState.user_id == Deck.user_id)
+            ).where(
+                Deck.user_id.in_(user_ids)
+            ).group_by(Deck.user_id)
+        ).all()
+
+        return {user_id: (int(due or 0), int(new or 0)) for user_id, due, new in rows}
+
+    def run_window(self, start: datetime, end: datetime) -> int:
+        """
+        Send reminders for users whose local reminder time falls in [start, end).
+
+        Args:
+            start: Window start (timezone-aware)
+            end: Window end (timezone-aware, at most one day after start)
+
+        Returns:
+            Number of notifications sent
+        """
+        if end - start > timedelta(days=1):
+            raise ValueError("Window must not exceed one day")
+
+        reminder_filter = self._reminder_filter(start, end)
+        if reminder_filter is None:
+            return 0
+
+        now = end.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        sent = 0
+        last_user_id = 0
+        while True:
+            # Keyset pagination over the bucket's users
+            batch = self.db.execute(
+                db.select(
+                    UserPreferences.user_id,
+                    UserPreferences.timezone,
+                    UserPreferences.reminder_minute,
+                    UserPreferences.daily_review_limit
+                ).where(
+                    reminder_filter,
+                    UserPreferences.user_id > last_user_id
+                ).order_by(UserPreferences.user_id).limit(self.batch_size)
+            ).all()
+            if not batch:
+                break
+            last_user_id = batch[-1].user_id
+
+            counts = self.get_due_counts([row.user_id for row in batch], now)
+            notifications = []
+            for row in batch:
+                due, new = counts.get(row.user_id, (0, 0))
+                due_cards = min(due + new, row.daily_review_limit)
+                if due_cards:
+                    notifications.append({
+                        'user_id': row.user_id,
+                        'due_cards': due_cards,
+                        'timezone': row.timezone,
+                        'reminder_time': f'{row.reminder_minute // 60:02d}:{row.reminder_minute % 60:02d}',
+                        'scheduled_for': end.astimezone(dt_timezone.utc).isoformat()
+                    })
+
+            if notifications:
+                self.sink.send(notifications)
+                sent += len(notifications)
+
+        return sent
+
+    def run(self, stop_event: Optional[threading.Event] = None, once: bool = False) -> None:
+        """
+        Process reminder buckets as they end.
+
+        Args:
+            stop_event: Event that stops the loop when set
+            once: Process only the most recently ended bucket and return
+        """
+        stop_event = stop_event or threading.Event()
+        bucket = timedelta(minutes=self.bucket_minutes)
+        window_end = self.bucket_start(datetime.now(dt_timezone.utc))
+
+        if once:
+            self._run_logged(window_end - bucket, window_end)
+            return
+
+        while not stop_event.is_set():
+            next_end = window_end + bucket
+            wait = (next_end - datetime.now(dt_timezone.utc)).total_seconds()
+            if wait > 0 and stop_event.wait(wait):
+                break
+            self._run_logged(window_end, next_end)
+            window_end = next_end
+
+    def _run_logged(self, start: datetime, end: datetime) -> None:
+        try:
+            sent = self.run_window(start, end)
+            logger.info("Reminder bucket %s-%s: %d notifications", start, end, sent)
+        except Exception:
+            logger.exception("Reminder bucket %s-%s failed", start, end)
+        finally:
+            # Release the connection and identity map between buckets
+            self.db.close()
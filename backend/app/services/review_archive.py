@@ -0,0 +1,292 @@
+"""
+Review history archival and partition maintenance.
+
+card_reviews grows by every review ever made. Rows older than a configurable
+horizon are compacted into per-card summaries and per-day activity rows
+(see app.models.review_archive) and deleted, keeping the table and its indexes
+small. The latest review of each card is always kept because scheduling reads
+it. Readers of review history (streaks, accuracy, review counts) combine live
+and archived rows through this service.
+
+On PostgreSQL card_reviews is range-partitioned by month on reviewed_at;
+create_partitions adds upcoming monthly partitions.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.deck import Deck
+from app.models.review_archive import CardReviewSummary, ReviewDailyActivity
+
+
+def _correct_count(column):
+    """Number of rows with a passing quality (>= 3)."""
+    return db.func.coalesce(db.func.sum(db.case((column >= 3, 1), else_=0)), 0)
+
+
+def _review_date():
+    """Calendar day of a review as a Date on every backend."""
+    return db.func.date(CardReview.reviewed_at, type_=db.Date)
+
+
+def partition_name(month_start: date) -> str:
+    """Name of the card_reviews partition holding a month."""
+    return f'card_reviews_y{month_start.year:04d}m{month_start.month:02d}'
+
+
+def _add_months(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class ReviewArchiveService:
+    """Service for compacting cold review history and reading combined history"""
+
+    def __init__(self, db_session):
+        """
+        Initialize service with database session.
+
+        Args:
+            db_session: SQLAlchemy database session
+        """
+        self.db = db_session
+
+    def _archivable_reviews(self, cutoff: datetime):
+        """Select reviews older than cutoff that have a newer review of the same card."""
+        newer = aliased(CardReview)
+        has_newer = db.select(newer.id).where(
+            newer.user_id == CardReview.user_id,
+            newer.card_id == CardReview.card_id,
+            newer.reviewed_at > CardReview.reviewed_at
+        ).exists()
+        return db.select(CardReview.id).where(
+            CardReview.reviewed_at < cutoff,
+            has_newer
+        )
+
+    def archive_reviews(self, older_than_days: int, batch_size: int = 5000,
+                        dry_run: bool = False) -> Dict[str, int]:
+        """
+        Compact reviews older than the horizon into summary rows.
+
+        Each batch is folded into the summaries and deleted in one transaction,
+        so an interrupted run leaves consistent totals and can be resumed.
+
+        Args:
+            older_than_days: Archive reviews older than this many days (>= 1)
+            batch_size: Reviews per transaction
+            dry_run: Only count the reviews that would be archived
+
+        Returns:
+            Dictionary with the number of archived reviews and batches
+
+        Raises:
+            ValueError: If older_than_days or batch_size is not positive
+        """
+        if older_than_days < 1:
+            raise ValueError("older_than_days must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        candidates = self._archivable_reviews(cutoff)
+
+        if dry_run:
+            count = self.db.execute(
+                db.select(db.func.count()).select_from(candidates.subquery())
+            ).scalar()
+            return {'archived': count, 'batches': 0}
+
+        totals = {'archived': 0, 'batches': 0}
+        batch_query = candidates.order_by(CardReview.id).limit(batch_size)
+        while True:
+            review_ids = self.db.execute(batch_query).scalars().all()
+            if not review_ids:
+                break
+            self._archive_batch(review_ids)
+            self.db.commit()
+            totals['archived'] += len(review_ids)
+            totals['batches'] += 1
+
+        return totals
+
+    def _archive_batch(self, review_ids: List[int]) -> None:
+        """Fold a batch of reviews into the summary tables and delete them."""
+        in_batch = CardReview.id.in_(review_ids)
+
+        per_card = self.db.execute(
+            db.select(
+                CardReview.user_id,
+                CardReview.card_id,
+                db.func.count(CardReview.id),
+                _correct_count(CardReview.quality),
+                db.func.sum(CardReview.quality),
+                db.func.min(CardReview.reviewed_at),
+                db.func.max(CardReview.reviewed_at)
+            ).where(in_batch).group_by(CardReview.user_id, CardReview.card_id)
+        ).all()
+
+        summaries = {
+            (s.user_id, s.card_id): s
+            for s in self.db.query(CardReviewSummary).filter(
+                CardReviewSummary.user_id.in_({row[0] for row in per_card}),
+                CardReviewSummary.card_id.in_({row[1] for row in per_card})
+            )
+        }
+        for user_id, card_id, count, correct, quality_sum, first, last in per_card:
+            summary = summaries.get((user_id, card_id))
+            if summary is None:
+                summary = CardReviewSummary(
+                    user_id=user_id,
+                    card_id=card_id,
+                    review_count=0,
+                    correct_count=0,
+                    quality_sum=0,
+                    first_reviewed_at=first,
+                    last_reviewed_at=last
+                )
+                self.db.add(summary)
+            summary.review_count += count
+            summary.correct_count += correct
+            summary.quality_sum += quality_sum
+            summary.first_reviewed_at = min(summary.first_reviewed_at, first)
+            summary.last_reviewed_at = max(summary.last_reviewed_at, last)
+
+        # Streaks only count reviews of the user's own decks
+        review_date = _review_date()
+        per_day = self.db.execute(
+            db.select(
+                CardReview.user_id,
+                review_date,
+                db.func.count(CardReview.id),
+                _correct_count(CardReview.quality)
+            ).join(Card, Card.id == CardReview.card_id).join(
+                Deck, Deck.id == Card.deck_id
+            ).where(
+                in_batch,
+                Deck.user_id == CardReview.user_id
+            ).group_by(CardReview.user_id, review_date)
+        ).all()
+
+        activity = {
+            (a.user_id, a.activity_date): a
+            for a in self.db.query(ReviewDailyActivity).filter(
+                ReviewDailyActivity.user_id.in_({row[0] for row in per_day}),
+                ReviewDailyActivity.activity_date.in_({row[1] for row in per_day})
+            )
+        }
+        for user_id, activity_date, count, correct in per_day:
+            day = activity.get((user_id, activity_date))
+            if day is None:
+                day = ReviewDailyActivity(
+                    user_id=user_id,
+                    activity_date=activity_date,
+                    review_count=0,
+                    correct_count=0
+                )
+                self.db.add(day)
+            day.review_count += count
+            day.correct_count += correct
+
+        self.db.execute(
+            db.delete(CardReview).where(in_batch).execution_options(synchronize_session=False)
+        )
+
+    def get_review_dates(self, user_id: int, since: Optional[date] = None) -> List[date]:
+        """
+        Get the distinct days on which a user reviewed cards of their own decks.
+
+        Args:
+            user_id: User ID
+            since: Optional first day to include
+
+        Returns:
+            Sorted list of dates, including archived history
+        """
+        review_date = _review_date()
+        live = db.select(review_date).join(Card, Card.id == CardReview.card_id).join(
+            Deck, Deck.id == Card.deck_id
+        ).where(
+            Deck.user_id == user_id,
+            CardReview.user_id == user_id
+        ).distinct()
+        archived = db.select(ReviewDailyActivity.activity_date).where(
+            ReviewDailyActivity.user_id == user_id
+        )
+        if since is not None:
+            live = live.where(review_date >= since)
+            archived = archived.where(ReviewDailyActivity.activity_date >= since)
+
+        days = set(self.db.execute(live).scalars().all())
+        days.update(self.db.execute(archived).scalars().all())
+        return sorted(days)
+
+    def get_review_accuracy(self, user_id: int, deck_id: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Get a user's total and correct review counts, including archived history.
+
+        Args:
+            user_id: User ID
+            deck_id: Optional deck ID to restrict to
+
+        Returns:
+            Tuple of (total reviews, correct reviews)
+        """
+        live_query = db.select(
+            db.func.count(CardReview.id),
+            _correct_count(CardReview.quality)
+        ).join(Card, Card.id == CardReview.card_id).where(CardReview.user_id == user_id)
+        archived_query = db.select(
+            db.func.coalesce(db.func.sum(CardReviewSummary.review_count), 0),
+            db.func.coalesce(db.func.sum(CardReviewSummary.correct_count), 0)
+        ).join(Card, Card.id == CardReviewSummary.card_id).where(CardReviewSummary.user_id == user_id)
+
+        if deck_id is not None:
+            live_query = live_query.where(Card.deck_id == deck_id)
+            archived_query = archived_query.where(Card.deck_id == deck_id)
+
+        live_total, live_correct = self.db.execute(live_query).one()
+        archived_total, archived_correct = self.db.execute(archived_query).one()
+        return live_total + archived_total, live_correct + archived_correct
+
+    def create_partitions(self, months_ahead: int = 3, start: Optional[date] = None) -> List[str]:
+        """
+        Create monthly card_reviews partitions from the current month onwards.
+
+        Only applies to PostgreSQL databases where card_reviews is partitioned;
+        other databases are left unchanged. Run it regularly (e.g. daily) so new
+        reviews never land in the default partition.
+
+        Args:
+            months_ahead: Number of months after the current one to create
+            start: First month to create (defaults to the current month)
+
+        Returns:
+            Names of the partitions that were created
+        """
+        if self.db.get_bind().dialect.name != 'postgresql':
+            return []
+        is_partitioned = self.db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('card_reviews')"
+        )).scalar()
+        if not is_partitioned:
+            return []
+
+        month = (start or datetime.utcnow().date()).replace(day=1)
+        created = []
+        for offset in range(months_ahead + 1):
+            month_start = _add_months(month, offset)
+            name = partition_name(month_start)
+            if self.db.execute(text('SELECT to_regclass(:name)'), {'name': name}).scalar():
+                continue
+            self.db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF card_reviews "
+                f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{_add_months(month_start, 1).isoformat()}')"
+            ))
+            created.append(name)
+
+        self.db.commit()
+        return created
@@ -12,16 +12,47 @@ Quality Mapping:
 - 4: Very Easy
 - 5: Perfect
 """
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from app import db
 from app.models.card import Card
 from app.models.card_review import CardReview
+from app.models.card_state import CardState
 from app.models.deck import Deck
-from app.models.user_preferences import UserPreferences
+from app.models.review_archive import CardReviewSummary
+from app.utils.due_index import get_due_index, schedule_on_commit
+from app.utils.user_context import get_user_context
 
 
-def calculate_sm2(quality: int, ease_factor: float, interval: int, repetitions: int) -> Dict[str, Any]:
+class ReviewConflictError(Exception):
+    """
+    Raised when a review cannot be applied because the card's state changed concurrently.
+    
+    Attributes:
+        current_state: Current CardState as a dictionary (None if the card has no state)
+    """
+    
+    def __init__(self, message: str, current_state: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.current_state = current_state
+
+
+class _StateChanged(Exception):
+    """Internal signal: the version-checked state write matched no row."""
+
+
+def utc_naive(value: datetime) -> datetime:
+    """Convert a datetime to the naive UTC form stored in the database (naive values are kept)."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def calculate_sm2(quality: int, ease_factor: float, interval: int, repetitions: int,
+                  reviewed_at: Optional[datetime] = None) -> Dict[str, Any]:
     """
     Calculate SM-2 algorithm parameters.
     
@@ -30,6 +61,7 @@ def calculate_sm2(quality: int, ease_factor: float, interval: int, repetitions:
         ease_factor: Current ease factor
         interval: Current interval in days
         repetitions: Current repetition count
+        reviewed_at: Time of the review the next review is counted from (default now)
     
     Returns:
         Dictionary with updated ease_factor, interval, repetitions, and next_review date
@@ -63,7 +95,7 @@ def calculate_sm2(quality: int, ease_factor: float, interval: int, repetitions:
     new_ease_factor = max(1.3, ease_factor + ease_factor_delta)
     
     # Calculate next review date
-    next_review = datetime.utcnow() + timedelta(days=new_interval)
+    next_review = (reviewed_at or datetime.utcnow()) + timedelta(days=new_interval)
     
     return {
         'ease_factor': round(new_ease_factor, 2),
@@ -73,6 +105,51 @@ def calculate_sm2(quality: int, ease_factor: float, interval: int, repetitions:
     }
 
 
+# Ease factor change of each quality (0-5), as computed by calculate_sm2
+_EASE_DELTAS = tuple(0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02) for quality in range(6))
+
+# State of a card that has never been reviewed, as used by process_review
+NEW_CARD_STATE = (2.5, 1, 0)
+
+
+def preview_sm2_batch(states: Sequence[Tuple[float, int, int]]) -> List[Dict[str, List[Any]]]:
+    """
+    Project the SM-2 result of every quality for a batch of card states.
+    
+    Gives the intervals and ease factors calculate_sm2 would return for
+    qualities 0-5, computed column-wise instead of with six calls per card:
+    failed recalls (0-2) always restart at one day and successful ones (3-5)
+    share one interval, so a state needs one interval and six additions of
+    precomputed ease deltas. Identical states (all new cards, for instance)
+    are computed once per batch.
+    
+    Args:
+        states: (ease_factor, interval, repetitions) of each card
+    
+    Returns:
+        One {'intervals': [...], 'ease_factors': [...]} dict per state, with
+        the values for quality q at index q
+    """
+    computed: Dict[Tuple[float, int, int], Dict[str, List[Any]]] = {}
+    previews = []
+    for state in states:
+        preview = computed.get(state)
+        if preview is None:
+            ease_factor, interval, repetitions = state
+            if repetitions == 0:
+                passed = 1
+            elif repetitions == 1:
+                passed = 6
+            else:
+                passed = round(interval * ease_factor)
+            preview = computed[state] = {
+                'intervals': [1, 1, 1, passed, passed, passed],
+                'ease_factors': [round(max(1.3, ease_factor + delta), 2) for delta in _EASE_DELTAS]
+            }
+        previews.append(preview)
+    return previews
+
+
 class SpacedRepetitionService:
     """
     Service for managing spaced repetition using SM-2 algorithm.
@@ -89,20 +166,44 @@ class SpacedRepetitionService:
         """
         self.db = db_session or db.session
     
-    def process_review(self, card_id: int, user_id: int, quality: int) -> Dict[str, Any]:
+    def process_review(self, card_id: int, user_id: int, quality: int,
+                       commit: bool = True, expected_version: Optional[int] = None,
+                       reviewed_at: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Process a card review and update spaced repetition parameters.
         
+        The card's CardState row is updated with a version check. If another review
+        of the same card was written since the state was read, the transaction is
+        rolled back and the review is recomputed from the new state, up to
+        REVIEW_CONFLICT_RETRIES times. Clients that display a state and want their
+        review rejected if it is outdated pass expected_version instead.
+        
+        Offline clients pass the time the review was made. A review older than
+        the card's latest one is merged into the history: SM-2 is replayed from
+        the insertion point over the card's later reviews only, which are
+        rewritten in the same transaction along with the card state.
+        
         Args:
             card_id: ID of the card being reviewed
             user_id: ID of the user performing the review
             quality: Quality rating (0-5)
+            commit: Commit the review; pass False to only flush it so the caller
+                can add more work to the same transaction (a retried conflict rolls
+                back work added before this call)
+            expected_version: Version of the card state the review was based on
+                (0 for a card that was never reviewed); None to always apply
+            reviewed_at: When the review was made (naive UTC or timezone-aware;
+                default and upper bound: now)
         
         Returns:
-            Dictionary with updated card state and review information
+            Dictionary with the new review, the card state version and the
+            number of later reviews replayed
         
         Raises:
-            ValueError: If quality is invalid or card not found
+            ValueError: If quality is invalid, card not found, or reviewed_at
+                falls within the card's archived history
+            ReviewConflictError: If expected_version is not the current version,
+                or the state kept changing while retrying
         """
         if quality < 0 or quality > 5:
             raise ValueError("Quality must be between 0 and 5")
@@ -116,68 +217,226 @@ class SpacedRepetitionService:
         if not card:
             raise ValueError(f"Card {card_id} not found or does not belong to user {user_id}")
         
-        # Get latest review for current state
-        latest_review = CardReview.query.filter(
-            CardReview.card_id == card_id,
-            CardReview.user_id == user_id
-        ).order_by(CardReview.reviewed_at.desc()).first()
-        
-        # Get current state from latest review or use defaults
-        if latest_review:
-            current_ease = latest_review.ease_factor
-            current_interval = latest_review.interval
-            current_repetitions = latest_review.repetitions
-        else:
-            # First review - use defaults
-            current_ease = 2.5
-            current_interval = 1
-            current_repetitions = 0
-        
-        # Apply SM-2 algorithm
-        result = calculate_sm2(
-            quality=quality,
-            ease_factor=current_ease,
-            interval=current_interval,
-            repetitions=current_repetitions
+        now = datetime.utcnow()
+        # Clocks of offline devices may run ahead
+        reviewed_at = min(utc_naive(reviewed_at) if reviewed_at else now, now)
+        
+        retries = current_app.config.get('REVIEW_CONFLICT_RETRIES', 3)
+        for _ in range(retries + 1):
+            try:
+                result = self._apply_review(card_id, card.deck_id, user_id, quality, expected_version,
+                                            reviewed_at)
+            except _StateChanged:
+                self.db.rollback()
+                continue
+            if commit:
+                self.db.commit()
+            return result
+        
+        raise ReviewConflictError(
+            f"Card {card_id} was reviewed concurrently, please retry",
+            self._current_state(card_id, user_id)
         )
+    
+    def _current_state(self, card_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Committed scheduling state of a card, as returned in conflict responses."""
+        state = CardState.query.filter_by(card_id=card_id, user_id=user_id).first()
+        return state.to_dict() if state else None
+    
+    def _apply_review(self, card_id: int, deck_id: int, user_id: int, quality: int,
+                      expected_version: Optional[int], reviewed_at: datetime) -> Dict[str, Any]:
+        """Write one review and its state update (flushed, not committed)."""
+        state = CardState.query.filter_by(card_id=card_id, user_id=user_id).first()
+        is_new_state = state is None
+        
+        if expected_version is not None and (state.version if state else 0) != expected_version:
+            raise ReviewConflictError(
+                f"Card {card_id} state has changed (expected version {expected_version})",
+                state.to_dict() if state else None
+            )
         
-        # Create new CardReview record
-        card_review = CardReview(
-            card_id=card_id,
-            user_id=user_id,
-            quality=quality,
-            reviewed_at=datetime.utcnow(),
-            ease_factor=result['ease_factor'],
-            interval=result['interval'],
-            repetitions=result['repetitions'],
-            next_review=result['next_review']
-        )
+        if state is None:
+            # Never reviewed, or reviewed before card states existed
+            latest_review = CardReview.query.filter(
+                CardReview.card_id == card_id,
+                CardReview.user_id == user_id
+            ).order_by(CardReview.reviewed_at.desc()).first()
+            state = CardState(card_id=card_id, user_id=user_id)
+            if latest_review:
+                state.ease_factor = latest_review.ease_factor
+                state.interval = latest_review.interval
+                state.repetitions = latest_review.repetitions
+                state.last_reviewed_at = latest_review.reviewed_at
+            else:
+                # First review - use defaults
+                state.ease_factor = 2.5
+                state.interval = 1
+                state.repetitions = 0
+            self.db.add(state)
+        
+        replayed = 0
+        if state.last_reviewed_at is not None and reviewed_at < state.last_reviewed_at:
+            card_review, previous_state, replayed = self._merge_late_review(
+                state, card_id, user_id, quality, reviewed_at
+            )
+        else:
+            previous_state = {
+                'ease_factor': state.ease_factor,
+                'interval': state.interval,
+                'repetitions': state.repetitions
+            }
+            
+            # Apply SM-2 algorithm
+            result = calculate_sm2(
+                quality=quality,
+                ease_factor=state.ease_factor,
+                interval=state.interval,
+                repetitions=state.repetitions,
+                reviewed_at=reviewed_at
+            )
+            
+            # Create new CardReview record
+            card_review = CardReview(
+                card_id=card_id,
+                user_id=user_id,
+                quality=quality,
+                reviewed_at=reviewed_at,
+                ease_factor=result['ease_factor'],
+                interval=result['interval'],
+                repetitions=result['repetitions'],
+                next_review=result['next_review']
+            )
+            
+            state.ease_factor = result['ease_factor']
+            state.interval = result['interval']
+            state.repetitions = result['repetitions']
+            state.next_review = result['next_review']
+            state.last_reviewed_at = reviewed_at
         
         # Validate review
         is_valid, error_msg = card_review.validate()
         if not is_valid:
             raise ValueError(f"Invalid review data: {error_msg}")
         
-        # Save to database
+        # Save to database; the state UPDATE only matches the version read above
         self.db.add(card_review)
-        self.db.commit()
+        try:
+            self.db.flush()
+        except StaleDataError:
+            raise _StateChanged()
+        except IntegrityError:
+            if not is_new_state:
+                raise
+            # Another request created the state first
+            raise _StateChanged()
+        
+        # Keep this process's due index in step once the review commits
+        schedule_on_commit(
+            self.db, user_id, card_id, deck_id, state.next_review,
+            state.ease_factor, state.interval, state.repetitions
+        )
         
         return {
             'card_id': card_id,
             'user_id': user_id,
             'quality': quality,
             'review_id': card_review.id,
-            'ease_factor': result['ease_factor'],
-            'interval': result['interval'],
-            'repetitions': result['repetitions'],
-            'next_review': result['next_review'].isoformat(),
-            'previous_state': {
-                'ease_factor': current_ease,
-                'interval': current_interval,
-                'repetitions': current_repetitions
-            }
+            'reviewed_at': card_review.reviewed_at.isoformat(),
+            'ease_factor': card_review.ease_factor,
+            'interval': card_review.interval,
+            'repetitions': card_review.repetitions,
+            'next_review': card_review.next_review.isoformat(),
+            'version': state.version,
+            'previous_state': previous_state,
+            'replayed_reviews': replayed
         }
     
+    def _merge_late_review(self, state: CardState, card_id: int, user_id: int, quality: int,
+                           reviewed_at: datetime):
+        """
+        Insert a review made before the card's latest one and replay the history after it.
+        
+        Each stored review holds the SM-2 state it produced, so the state at the
+        insertion point is that of the review just before it. From there SM-2 is
+        replayed in memory over the later reviews only (read in reviewed_at order
+        through idx_review_user_card_time), which are updated along with the card
+        state; the caller flushes everything in its transaction.
+        
+        Args:
+            state: The card's current state (updated in place)
+            card_id: Reviewed card
+            user_id: Reviewing user
+            quality: Quality of the late review
+            reviewed_at: When the late review was made
+        
+        Returns:
+            Tuple of (new CardReview, state the review was based on, number of
+            later reviews replayed)
+        
+        Raises:
+            ValueError: If reviews before reviewed_at have been archived
+        """
+        history = (CardReview.user_id == user_id, CardReview.card_id == card_id)
+        before = CardReview.query.filter(
+            *history, CardReview.reviewed_at <= reviewed_at
+        ).order_by(CardReview.reviewed_at.desc(), CardReview.id.desc()).first()
+        
+        if before is not None:
+            ease_factor, interval, repetitions = before.ease_factor, before.interval, before.repetitions
+        else:
+            archived = self.db.execute(
+                db.select(CardReviewSummary.first_reviewed_at).where(
+                    CardReviewSummary.user_id == user_id,
+                    CardReviewSummary.card_id == card_id,
+                    CardReviewSummary.first_reviewed_at <= reviewed_at
+                )
+            ).first()
+            if archived is not None:
+                raise ValueError(
+                    f"Review of card {card_id} at {reviewed_at.isoformat()} is older than its archived history"
+                )
+            ease_factor, interval, repetitions = NEW_CARD_STATE
+        previous_state = {'ease_factor': ease_factor, 'interval': interval, 'repetitions': repetitions}
+        
+        later = CardReview.query.filter(
+            *history, CardReview.reviewed_at > reviewed_at
+        ).order_by(CardReview.reviewed_at, CardReview.id).all()
+        
+        result = calculate_sm2(quality, ease_factor, interval, repetitions, reviewed_at=reviewed_at)
+        card_review = CardReview(
+            card_id=card_id,
+            user_id=user_id,
+            quality=quality,
+            reviewed_at=reviewed_at,
+            ease_factor=result['ease_factor'],
+            interval=result['interval'],
+            repetitions=result['repetitions'],
+            next_review=result['next_review']
+        )
+        
+        for review in later:
+            result = calculate_sm2(
+                review.quality, result['ease_factor'], result['interval'], result['repetitions'],
+                reviewed_at=review.reviewed_at
+            )
+            review.ease_factor = result['ease_factor']
+            review.interval = result['interval']
+            review.repetitions = result['repetitions']
+            review.next_review = result['next_review']
+        
+        state.ease_factor = result['ease_factor']
+        state.interval = result['interval']
+        state.repetitions = result['repetitions']
+        state.next_review = result['next_review']
+        # The card's latest review is unchanged; bump the row so its version moves on
+        state.updated_at = datetime.utcnow()
+        return card_review, previous_state, len(later)
+    
+    def _preference(self, user_id: int, name: str, default: Any) -> Any:
+        """A user's preference value, from the cached user context."""
+        context = get_user_context(user_id)
+        return context.preference(name, default) if context else default
+    
     def get_due_cards(self, user_id: int, deck_id: Optional[int] = None, 
                       limit: Optional[int] = None) -> List[Card]:
         """
@@ -192,6 +451,13 @@ class SpacedRepetitionService:
         2. Due today (next_review == today)
         3. New cards (no reviews)
         
+        Scheduled cards are read from card_states in next_review order through
+        idx_card_state_due, so the scan stops after limit rows; new cards fill
+        the remainder with a second bounded scan. The cost depends on the limit,
+        not on the size of the collection. When the user's due index is in
+        memory (app.utils.due_index), both come from it and only the selected
+        cards are loaded.
+        
         Args:
             user_id: User ID to filter cards
             deck_id: Optional deck ID to filter by specific deck
@@ -200,67 +466,89 @@ class SpacedRepetitionService:
         Returns:
             List of Card objects that are due for review
         """
-        # Get user preferences for daily limit
-        user_prefs = UserPreferences.query.filter_by(user_id=user_id).first()
-        daily_limit = user_prefs.daily_review_limit if user_prefs else 100
-        
         # Use provided limit or user's daily limit
-        query_limit = limit if limit is not None else daily_limit
+        if limit is not None:
+            query_limit = limit
+        else:
+            query_limit = self._preference(user_id, 'daily_review_limit', 100)
         
-        # Get the most recent review for each card
-        subquery = self.db.query(
-            CardReview.card_id,
-            db.func.max(CardReview.reviewed_at).label('latest_review'),
-            db.func.max(CardReview.next_review).label('latest_next_review')
-        ).filter(
-            CardReview.user_id == user_id
-        ).group_by(CardReview.card_id).subquery()
+        index = get_due_index(user_id)
+        if index is not None:
+            due_cards = self._cards_in_order(
+                index.due_card_ids(datetime.utcnow(), query_limit, deck_id or None)
+            )
+        else:
+            # Most overdue first is next_review ascending
+            query = Card.query.join(
+                CardState,
+                db.and_(CardState.card_id == Card.id, CardState.user_id == user_id)
+            ).join(Deck).filter(
+                Deck.user_id == user_id,
+                CardState.next_review <= datetime.utcnow()
+            )
+            
+            if deck_id:
+                query = query.filter(Card.deck_id == deck_id)
+            
+            query = query.order_by(CardState.next_review.asc(), CardState.card_id.asc())
+            
+            # Apply limit
+            if query_limit:
+                query = query.limit(query_limit)
+            
+            due_cards = query.all()
+        if query_limit and len(due_cards) >= query_limit:
+            return due_cards
+        
+        remaining = query_limit - len(due_cards) if query_limit else None
+        return due_cards + self.get_new_cards(user_id, deck_id, remaining)
+    
+    def get_new_cards(self, user_id: int, deck_id: Optional[int] = None,
+                      limit: Optional[int] = None) -> List[Card]:
+        """
+        Get cards the user has not scheduled yet (no reviews).
         
-        # Query cards that are due
-        query = Card.query.join(Deck).filter(Deck.user_id == user_id)
+        Cards are returned in deck and creation order, which the deck and card
+        indexes already provide, so the scan stops after limit rows.
         
-        # Join with subquery to check next_review
-        query = query.outerjoin(
-            subquery,
-            Card.id == subquery.c.card_id
-        )
+        Args:
+            user_id: User ID to filter cards
+            deck_id: Optional deck ID to filter by specific deck
+            limit: Optional maximum number of cards
         
-        # Filter for due cards
-        now = datetime.utcnow()
-        query = query.filter(
-            db.or_(
-                subquery.c.latest_next_review <= now,  # Due or overdue
-                subquery.c.latest_next_review.is_(None)  # New cards (no reviews)
-            )
+        Returns:
+            List of new Card objects
+        """
+        index = get_due_index(user_id)
+        if index is not None:
+            return self._cards_in_order(index.new_card_ids(limit, deck_id or None))
+        
+        scheduled = db.exists().where(
+            CardState.card_id == Card.id,
+            CardState.user_id == user_id,
+            CardState.next_review.isnot(None)
         )
+        query = Card.query.join(Deck).filter(Deck.user_id == user_id, ~scheduled)
         
         if deck_id:
             query = query.filter(Card.deck_id == deck_id)
         
-        # Order by priority: overdue first, then due today, then new cards
-        query = query.order_by(
-            # Overdue cards first (negative days overdue)
-            db.case(
-                (
-                    db.and_(
-                        subquery.c.latest_next_review.isnot(None),
-                        subquery.c.latest_next_review < now
-                    ),
-                    (now - subquery.c.latest_next_review).label('days_overdue')
-                ),
-                else_=timedelta(days=0)
-            ).desc(),
-            # Then by next_review date (ascending)
-            subquery.c.latest_next_review.asc().nulls_last()
-        )
-        
-        # Apply limit
-        if query_limit:
-            query = query.limit(query_limit)
+        query = query.order_by(Deck.id.asc(), Card.id.asc())
+        if limit:
+            query = query.limit(limit)
         
         return query.all()
     
-    def get_study_queue(self, user_id: int, deck_id: Optional[int] = None) -> Dict[str, Any]:
+    def _cards_in_order(self, card_ids: List[int]) -> List[Card]:
+        """Load cards by primary key, in the order of card_ids."""
+        if not card_ids:
+            return []
+        cards = {card.id: card for card in Card.query.filter(Card.id.in_(card_ids))}
+        # A card deleted since the index was loaded is skipped
+        return [cards[card_id] for card_id in card_ids if card_id in cards]
+    
+    def get_study_queue(self, user_id: int, deck_id: Optional[int] = None,
+                        preview: bool = False) -> Dict[str, Any]:
         """
         Get optimized study queue combining due reviews and new cards.
         
@@ -271,6 +559,8 @@ class SpacedRepetitionService:
         Args:
             user_id: User ID to get study queue for
             deck_id: Optional deck ID to filter by specific deck
+            preview: Add to each card the intervals and ease factors each
+                quality would give (see preview_sm2_batch)
         
         Returns:
             Dictionary with study queue and metadata:
@@ -283,60 +573,71 @@ class SpacedRepetitionService:
             }
         """
         # Get user preferences
-        user_prefs = UserPreferences.query.filter_by(user_id=user_id).first()
-        daily_review_limit = user_prefs.daily_review_limit if user_prefs else 100
-        new_cards_per_day = user_prefs.new_cards_per_day if user_prefs else 20
+        daily_review_limit = self._preference(user_id, 'daily_review_limit', 100)
+        new_cards_per_day = self._preference(user_id, 'new_cards_per_day', 20)
         
         # Get due cards (reviews)
         due_cards = self.get_due_cards(user_id, deck_id, limit=daily_review_limit)
         
-        # Get cards already reviewed today (to avoid double-counting)
-        today = datetime.utcnow().date()
-        reviewed_today = self.db.query(CardReview.card_id).filter(
-            CardReview.user_id == user_id,
-            db.func.date(CardReview.reviewed_at) == today
-        ).subquery()
-        
-        # Get new cards (cards with no reviews)
-        new_cards_query = Card.query.join(Deck).filter(
-            Deck.user_id == user_id
-        ).outerjoin(
-            CardReview,
-            db.and_(
-                Card.id == CardReview.card_id,
-                CardReview.user_id == user_id
-            )
-        ).filter(
-            CardReview.id.is_(None)  # No reviews exist
-        )
-        
-        # Exclude cards reviewed today
-        new_cards_query = new_cards_query.outerjoin(
-            reviewed_today,
-            Card.id == reviewed_today.c.card_id
-        ).filter(
-            reviewed_today.c.card_id.is_(None)
-        )
-        
-        if deck_id:
-            new_cards_query = new_cards_query.filter(Card.deck_id == deck_id)
-        
-        # Limit new cards by user preference
-        new_cards = new_cards_query.limit(new_cards_per_day).all()
+        # Get new cards (cards with no reviews; a card reviewed today has a state)
+        new_cards = self.get_new_cards(user_id, deck_id, new_cards_per_day)
         
         # Combine and create optimized order
         # Priority: due cards first, then new cards
         study_queue = list(due_cards) + list(new_cards)
         
+        previews = {}
+        if preview and study_queue:
+            # One batch over the distinct queued cards
+            card_ids = list(dict.fromkeys(card.id for card in study_queue))
+            states = self.get_card_states(user_id, card_ids)
+            previews = dict(zip(card_ids, preview_sm2_batch(
+                [states.get(card_id, NEW_CARD_STATE) for card_id in card_ids]
+            )))
+        
+        def serialize(card: Card) -> Dict[str, Any]:
+            data = card.to_dict()
+            if preview:
+                data['preview'] = previews[card.id]
+            return data
+        
         return {
-            'due_cards': [card.to_dict() for card in due_cards],
-            'new_cards': [card.to_dict() for card in new_cards],
+            'due_cards': [serialize(card) for card in due_cards],
+            'new_cards': [serialize(card) for card in new_cards],
             'total_cards': len(study_queue),
             'due_count': len(due_cards),
             'new_count': len(new_cards),
-            'queue': [card.to_dict() for card in study_queue]
+            'queue': [serialize(card) for card in study_queue]
         }
     
+    def get_card_states(self, user_id: int, card_ids: List[int]) -> Dict[int, Tuple[float, int, int]]:
+        """
+        Get the SM-2 state of cards for a user.
+        
+        Scheduled cards are read from the due index when it is loaded; the rest
+        come from card_states in one query.
+        
+        Args:
+            user_id: User ID
+            card_ids: Card IDs
+        
+        Returns:
+            Dict mapping card ID to (ease_factor, interval, repetitions); cards
+            without a state are left out
+        """
+        index = get_due_index(user_id)
+        states = index.states(card_ids) if index is not None else {}
+        missing = [card_id for card_id in card_ids if card_id not in states]
+        if missing:
+            rows = self.db.execute(
+                db.select(
+                    CardState.card_id, CardState.ease_factor, CardState.interval, CardState.repetitions
+                ).where(CardState.user_id == user_id, CardState.card_id.in_(missing))
+            )
+            states.update((card_id, (ease_factor, interval, repetitions))
+                          for card_id, ease_factor, interval, repetitions in rows)
+        return states
+    
     def get_latest_review(self, card_id: int, user_id: int) -> Optional[CardReview]:
         """
         Get the latest review for a card by a user.
@@ -353,56 +654,115 @@ class SpacedRepetitionService:
             CardReview.user_id == user_id
         ).order_by(CardReview.reviewed_at.desc()).first()
     
-    def get_review_stats(self, user_id: int, deck_id: Optional[int] = None) -> Dict[str, Any]:
+    def review_counts_query(self, user_id: int, deck_id: Optional[int] = None, by_deck: bool = False):
         """
-        Get statistics about reviews.
+        Build the single aggregate query behind get_review_stats.
+        
+        The user's card_states rows give the scheduling of each card (the same
+        source as get_due_cards) and a CTE counts today's reviews per card; both
+        are left-joined to the user's decks and cards so every count comes out of
+        one statement without loading any entity or scanning the review history.
+        Callers may add columns to it (see AnalyticsService.get_overview).
         
         Args:
-            user_id: User ID to filter stats
-            deck_id: Optional deck ID to filter by deck
+            user_id: User ID
+            deck_id: Optional deck ID to restrict to
+            by_deck: Group the counts by deck (adds a deck_id column)
         
         Returns:
-            Dictionary with review statistics
+            Query yielding rows for stats_from_counts
         """
-        # Get total cards
-        cards_query = Card.query.join(Deck).filter(Deck.user_id == user_id)
-        if deck_id:
-            cards_query = cards_query.filter(Card.deck_id == deck_id)
-        
-        total_cards = cards_query.count()
-        
-        # Get due cards
-        due_cards = self.get_due_cards(user_id, deck_id)
-        due_count = len(due_cards)
-        
-        # Get cards reviewed today
         today = datetime.utcnow().date()
-        today_reviews_query = CardReview.query.join(Card).join(Deck).filter(
-            Deck.user_id == user_id,
+        now = datetime.utcnow()
+        
+        today_per_card = self.db.query(
+            CardReview.card_id.label('card_id'),
+            db.func.count(CardReview.id).label('reviewed_today')
+        ).filter(
             CardReview.user_id == user_id,
             db.func.date(CardReview.reviewed_at) == today
-        )
-        if deck_id:
-            today_reviews_query = today_reviews_query.filter(Card.deck_id == deck_id)
-        today_reviews_count = today_reviews_query.count()
+        ).group_by(CardReview.card_id).cte('today_per_card')
         
-        # Get cards with reviews
-        cards_with_reviews_query = Card.query.join(Deck).join(
-            CardReview, Card.id == CardReview.card_id
-        ).filter(
-            Deck.user_id == user_id,
-            CardReview.user_id == user_id
-        ).distinct()
+        scheduled = CardState.next_review.isnot(None)
+        is_due = db.and_(
+            Card.id.isnot(None),
+            db.or_(CardState.next_review.is_(None), CardState.next_review <= now)
+        )
+        columns = [
+            db.func.count(Card.id).label('total_cards'),
+            db.func.coalesce(db.func.sum(db.case((scheduled, 1), else_=0)), 0).label('cards_with_reviews'),
+            db.func.coalesce(db.func.sum(db.case((is_due, 1), else_=0)), 0).label('due_cards'),
+            db.func.coalesce(db.func.sum(today_per_card.c.reviewed_today), 0).label('reviewed_today')
+        ]
+        if by_deck:
+            columns.insert(0, Deck.id.label('deck_id'))
+        
+        query = self.db.query(*columns).select_from(Deck).outerjoin(
+            Card, Card.deck_id == Deck.id
+        ).outerjoin(
+            CardState, db.and_(CardState.card_id == Card.id, CardState.user_id == user_id)
+        ).outerjoin(
+            today_per_card, today_per_card.c.card_id == Card.id
+        ).filter(Deck.user_id == user_id)
         
         if deck_id:
-            cards_with_reviews_query = cards_with_reviews_query.filter(Card.deck_id == deck_id)
+            query = query.filter(Deck.id == deck_id)
+        if by_deck:
+            query = query.group_by(Deck.id)
+        return query
+    
+    def stats_from_counts(self, user_id: int, row) -> Dict[str, Any]:
+        """
+        Shape a review_counts_query row as a get_review_stats result.
         
-        cards_with_reviews = cards_with_reviews_query.count()
+        Args:
+            user_id: User ID the counts belong to
+            row: Row of review_counts_query
         
+        Returns:
+            Dictionary with review statistics
+        """
+        due_count = int(row.due_cards)
+        due_limit = self._preference(user_id, 'daily_review_limit', 100)
+        if due_limit:
+            # The study queue serves at most daily_review_limit due cards
+            due_count = min(due_count, due_limit)
         return {
-            'total_cards': total_cards,
+            'total_cards': row.total_cards,
             'due_cards': due_count,
-            'reviewed_today': today_reviews_count,
-            'cards_with_reviews': cards_with_reviews,
-            'new_cards': total_cards - cards_with_reviews
+            'reviewed_today': int(row.reviewed_today),
+            'cards_with_reviews': int(row.cards_with_reviews),
+            'new_cards': row.total_cards - int(row.cards_with_reviews)
+        }
+    
+    def get_review_stats(self, user_id: int, deck_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get statistics about reviews.
+        
+        All counts come from one aggregate query. due_cards is capped at the
+        user's daily_review_limit, the most the study queue serves.
+        
+        Args:
+            user_id: User ID to filter stats
+            deck_id: Optional deck ID to filter by deck
+        
+        Returns:
+            Dictionary with review statistics
+        """
+        return self.stats_from_counts(user_id, self.review_counts_query(user_id, deck_id).one())
+    
+    def get_review_stats_by_deck(self, user_id: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Get review statistics for each of a user's decks with one grouped query.
+        
+        Args:
+            user_id: User ID
+        
+        Returns:
+            Dictionary mapping deck ID to statistics shaped like get_review_stats
+            (decks without cards included)
+        """
+        return {
+            row.deck_id: self.stats_from_counts(user_id, row)
+            for row in self.review_counts_query(user_id, by_deck=True)
         }
@@ -0,0 +1,181 @@
+"""
+Offline study packs for mobile clients.
+
+A study pack holds everything a client needs to study for the next N days
+without connectivity: the user's decks, every card that comes due or would be
+introduced as new in that window (content, type data and media references),
+and the current SM-2 state of the scheduled ones. Reviews made offline are
+uploaded afterwards (POST /api/sync/reviews) and merged into the history.
+
+The pack is a gzip-compressed JSON document, or a columnar JSON or MessagePack
+document (app.utils.compact). Each entity type is read with one streaming query
+and encoded partition by partition straight into the compressor, so neither the
+ORM objects nor the uncompressed JSON of a large pack are ever held in memory.
+MessagePack only buffers the packed tables of one entity type at a time.
+"""
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from flask import current_app
+from app import db
+from app.models.card import Card
+from app.models.card_state import CardState
+from app.models.deck import Deck
+from app.utils.compact import columnar_table, msgpack_packer, to_columnar
+
+
+# Version of the pack layout, bumped on incompatible changes
+STUDY_PACK_FORMAT = 1
+
+# Rows fetched and encoded at a time
+STUDY_PACK_PARTITION_SIZE = 500
+
+DECK_COLUMNS = (Deck.id, Deck.title)
+
+CARD_COLUMNS = (
+    Card.id, Card.deck_id, Card.front_content, Card.back_content,
+    Card.card_type, Card.card_data, Card.media_attachments,
+)
+
+STATE_COLUMNS = (
+    CardState.card_id, CardState.ease_factor, CardState.interval, CardState.repetitions,
+    CardState.next_review, CardState.last_reviewed_at, CardState.version,
+)
+
+
+class StudyPackService:
+    """Service building offline study packs"""
+
+    def __init__(self, db_session):
+        """
+        Initialize service with database session.
+
+        Args:
+            db_session: SQLAlchemy database session
+        """
+        self.db = db_session
+
+    def _due_by(self, user_id: int, until: datetime) -> tuple:
+        """Conditions on card_states selecting the user's cards due by until."""
+        return (CardState.user_id == user_id, CardState.next_review <= until)
+
+    def _new_card_ids(self, user_id: int, limit: int):
+        """Select of the first limit unscheduled cards, in study queue order."""
+        scheduled = db.exists().where(
+            CardState.card_id == Card.id,
+            CardState.user_id == user_id,
+            CardState.next_review.isnot(None)
+        )
+        return db.select(Card.id).join(Deck).where(
+            Deck.user_id == user_id, ~scheduled
+        ).order_by(Deck.id, Card.id).limit(limit)
+
+    def _partitions(self, stmt) -> Iterator[List[Dict[str, Any]]]:
+        """Stream the rows of a select as lists of dicts, one partition at a time."""
+        result = self.db.execute(stmt.execution_options(yield_per=STUDY_PACK_PARTITION_SIZE))
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    def _entities(self, user_id: int, until: datetime, new_limit: int) -> List[Tuple[str, Any]]:
+        """(name, select) of each entity type of a pack, in pack order."""
+        due_by = self._due_by(user_id, until)
+        in_pack = db.or_(
+            Card.id.in_(db.select(CardState.card_id).where(*due_by)),
+            Card.id.in_(self._new_card_ids(user_id, new_limit))
+        )
+        return [
+            ('decks', db.select(*DECK_COLUMNS).where(Deck.user_id == user_id).order_by(Deck.id)),
+            ('cards', db.select(*CARD_COLUMNS).join(Deck).where(Deck.user_id == user_id, in_pack)
+                .order_by(Deck.id, Card.id)),
+            # In idx_card_state_due order: the order the cards come due
+            ('states', db.select(*STATE_COLUMNS).where(*due_by)
+                .order_by(CardState.next_review, CardState.card_id)),
+        ]
+
+    def iter_pack(self, user_id: int, days: int, new_cards_per_day: int,
+                  versions: Optional[Dict[str, int]] = None,
+                  now: Optional[datetime] = None, layout: str = 'json') -> Iterator[bytes]:
+        """
+        Generate an uncompressed study pack in fragments.
+
+        Cards come in deck and creation order; the new ones (those without a
+        state) are listed in the order the study queue introduces them.
+
+        In the 'json' layout each entity type is a list of row objects. In the
+        'columnar' and 'msgpack' layouts (see app.utils.compact) it is a list of
+        tables, one per streamed partition.
+
+        Args:
+            user_id: Owner of the pack
+            days: Number of days the pack covers
+            new_cards_per_day: New cards introduced per day
+            versions: Content versions the pack was built from, echoed for the client
+            now: Start of the window (default now)
+            layout: 'json', 'columnar' or 'msgpack'
+
+        Yields:
+            Encoded fragments of the pack document
+        """
+        now = now or datetime.utcnow()
+        until = now + timedelta(days=days)
+        header = {
+            'format': STUDY_PACK_FORMAT,
+            'layout': 'rows' if layout == 'json' else 'columnar',
+            'generated_at': now,
+            'until': until,
+            'days': days,
+            'new_cards_per_day': new_cards_per_day,
+            'versions': versions or {},
+        }
+        entities = self._entities(user_id, until, new_cards_per_day * days)
+
+        if layout == 'msgpack':
+            # MessagePack arrays are length-prefixed, so each entity's tables are packed before it is written
+            packer = msgpack_packer()
+            yield packer.pack_map_header(len(header) + len(entities))
+            for key, value in to_columnar(header).items():
+                yield packer.pack(key) + packer.pack(value)
+            for name, stmt in entities:
+                tables = [packer.pack(columnar_table(rows)) for rows in self._partitions(stmt)]
+                yield packer.pack(name) + packer.pack_array_header(len(tables))
+                yield from tables
+            return
+
+        dumps = current_app.json.dumps
+        if layout == 'columnar':
+            yield dumps(to_columnar(header))[:-1].encode()
+        else:
+            yield dumps(header)[:-1].encode()
+        for name, stmt in entities:
+            yield f',"{name}":['.encode()
+            for i, rows in enumerate(self._partitions(stmt)):
+                encoded = dumps(columnar_table(rows)) if layout == 'columnar' else dumps(rows)[1:-1]
+                yield (encoded if i == 0 else ',' + encoded).encode()
+            yield b']'
+        yield b'}'
+
+    def build_pack(self, user_id: int, days: int, new_cards_per_day: int,
+                   versions: Optional[Dict[str, int]] = None,
+                   now: Optional[datetime] = None, layout: str = 'json', level: int = 6) -> bytes:
+        """
+        Build a gzip-compressed study pack.
+
+        Args:
+            user_id: Owner of the pack
+            days: Number of days the pack covers
+            new_cards_per_day: New cards introduced per day
+            versions: Content versions the pack was built from
+            now: Start of the window (default now)
+            layout: 'json', 'columnar' or 'msgpack'
+            level: zlib compression level
+
+        Returns:
+            Gzip file contents
+        """
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        chunks = [
+            compressor.compress(fragment)
+            for fragment in self.iter_pack(user_id, days, new_cards_per_day, versions, now, layout)
+        ]
+        chunks.append(compressor.flush())
+        return b''.join(chunks)
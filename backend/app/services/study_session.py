@@ -0,0 +1,106 @@
+"""
+Study session accounting.
+
+Review submission is the highest-traffic write path, so session counters are
+updated with a single atomic UPDATE inside the review's transaction instead of
+a load / increment / commit round trip. The active session id of each user is
+cached (see app.utils.cache.shared_store) so the lookup query is skipped too.
+Only positive lookups are cached: an id that turns out to be ended is dropped
+and looked up again, so a stale entry never loses a review.
+"""
+from typing import Optional
+from flask import current_app
+from app import db
+from app.models.study_session import StudySession
+from app.utils.cache import invalidate_on_commit, shared_store
+
+
+def _cache_key(user_id: int) -> str:
+    return f'active-session:{user_id}'
+
+
+class StudySessionService:
+    """Service for active study session lookup and counters"""
+
+    def __init__(self, db_session):
+        """
+        Initialize service with database session.
+
+        Args:
+            db_session: SQLAlchemy database session
+        """
+        self.db = db_session
+
+    def get_active_session_id(self, user_id: int) -> Optional[int]:
+        """
+        Get the id of a user's active session.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Session ID, or None if the user has no active session
+        """
+        store = shared_store()
+        session_id = store.get(_cache_key(user_id))
+        if session_id is not None:
+            return session_id
+
+        session_id = self.db.execute(
+            db.select(StudySession.id).where(
+                StudySession.user_id == user_id,
+                StudySession.end_time.is_(None)
+            ).order_by(StudySession.start_time.desc()).limit(1)
+        ).scalar()
+        if session_id is not None:
+            self.remember_active_session(user_id, session_id)
+        return session_id
+
+    def remember_active_session(self, user_id: int, session_id: int) -> None:
+        """Cache a user's active session id (after the session is committed)."""
+        ttl = current_app.config.get('ACTIVE_SESSION_CACHE_TTL', 3600)
+        shared_store().set(_cache_key(user_id), session_id, ttl)
+
+    def forget_active_session(self, user_id: int) -> None:
+        """Drop a user's cached active session id."""
+        shared_store().delete(_cache_key(user_id))
+
+    def record_review(self, user_id: int, correct: bool) -> bool:
+        """
+        Count a review in the user's active session, if any.
+
+        Issues an atomic increment in the current transaction without
+        committing, so it commits together with the review.
+
+        Args:
+            user_id: User ID
+            correct: Whether the answer was correct (quality >= 3)
+
+        Returns:
+            True if an active session was updated
+        """
+        session_id = self.get_active_session_id(user_id)
+        if session_id is None:
+            return False
+
+        if not self._increment(session_id, correct):
+            # Cached session was ended elsewhere; look up the current one
+            self.forget_active_session(user_id)
+            session_id = self.get_active_session_id(user_id)
+            if session_id is None or not self._increment(session_id, correct):
+                return False
+
+        invalidate_on_commit(self.db, user_id, ('sessions',))
+        return True
+
+    def _increment(self, session_id: int, correct: bool) -> bool:
+        result = self.db.execute(
+            db.update(StudySession).where(
+                StudySession.id == session_id,
+                StudySession.end_time.is_(None)
+            ).values(
+                cards_studied=StudySession.cards_studied + 1,
+                correct_count=StudySession.correct_count + (1 if correct else 0)
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
@@ -0,0 +1,466 @@
+"""
+Response caching utilities
+
+Memoizes read endpoint responses keyed by (user_id, endpoint, params, Accept). Entries are
+invalidated precisely through per-user version counters, one per data scope
+('reviews', 'cards', 'decks', 'sessions', 'preferences', 'profile'), which are bumped
+whenever a transaction that touched that user's rows commits.
+"""
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event, inspect, select
+
+
+CACHE_SCOPES = ('reviews', 'cards', 'decks', 'sessions', 'preferences', 'profile')
+
+# Response headers stored with cached bodies
+CACHED_HEADERS = ('Content-Encoding', 'Vary')
+
+
+class CacheBackend:
+    """Base class for pluggable cache backends."""
+
+    # Whether entries and version counters are seen by every worker process
+    shared = False
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def get_versions(self, user_id: int, scopes: Iterable[str]) -> Tuple[int, ...]:
+        raise NotImplementedError
+
+    def bump_versions(self, user_id: int, scopes: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class NullCacheBackend(CacheBackend):
+    """Backend that never stores anything (caching disabled)."""
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def get_versions(self, user_id: int, scopes: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(0 for _ in scopes)
+
+    def bump_versions(self, user_id: int, scopes: Iterable[str]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU cache with per-entry TTL.
+
+    Version counters are kept outside the LRU so they are never evicted; evicting
+    a counter would reset it and make stale entries addressable again.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_versions(self, user_id: int, scopes: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get((user_id, scope), 0) for scope in scopes)
+
+    def bump_versions(self, user_id: int, scopes: Iterable[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._versions[(user_id, scope)] = self._versions.get((user_id, scope), 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Shared local cache stored in a SQLite file.
+
+    All worker processes on a host can point at the same file, so a write handled
+    by one worker invalidates entries cached by the others.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._sets_since_trim = 0
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_versions ('
+                'user_id INTEGER NOT NULL, scope TEXT NOT NULL, version INTEGER NOT NULL, '
+                'PRIMARY KEY (user_id, scope))'
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl)
+        )
+        self._sets_since_trim += 1
+        if self._sets_since_trim >= 100:
+            self._sets_since_trim = 0
+            self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries and the soonest-expiring ones above max_entries."""
+        conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def get_versions(self, user_id: int, scopes: Iterable[str]) -> Tuple[int, ...]:
+        scopes = tuple(scopes)
+        rows = self._connection().execute(
+            'SELECT scope, version FROM cache_versions WHERE user_id = ?', (user_id,)
+        ).fetchall()
+        versions = dict(rows)
+        return tuple(versions.get(scope, 0) for scope in scopes)
+
+    def bump_versions(self, user_id: int, scopes: Iterable[str]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO cache_versions (user_id, scope, version) VALUES (?, ?, 1) '
+                'ON CONFLICT (user_id, scope) DO UPDATE SET version = version + 1',
+                [(user_id, scope) for scope in scopes]
+            )
+
+    def clear(self) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM cache_entries')
+            conn.execute('DELETE FROM cache_versions')
+
+
+def create_backend(config: Dict[str, Any]) -> CacheBackend:
+    """
+    Build a cache backend from application config.
+
+    Args:
+        config: Flask config mapping
+
+    Returns:
+        Configured CacheBackend instance
+    """
+    backend = config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    max_entries = config.get('RESPONSE_CACHE_MAX_ENTRIES', 10000)
+
+    if backend == 'memory':
+        return MemoryCacheBackend(max_entries=max_entries)
+    if backend == 'sqlite':
+        return SQLiteCacheBackend(config['RESPONSE_CACHE_PATH'], max_entries=max_entries)
+    if backend in ('null', 'none', None):
+        return NullCacheBackend()
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+class ResponseCache:
+    """
+    Flask extension memoizing read endpoint responses per user.
+
+    Usage:
+        @response_cache.cached('reviews', 'cards')
+        def view(): ...
+    """
+
+    def __init__(self, app=None):
+        self.backend: CacheBackend = NullCacheBackend()
+        self.default_ttl = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        """Configure the backend from app config and hook session commits."""
+        self.backend = create_backend(app.config)
+        self.default_ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+        app.extensions['response_cache'] = self
+        _register_session_events()
+
+    def bump(self, user_id: int, scopes: Iterable[str]) -> None:
+        """
+        Invalidate every cached response of a user that depends on the given scopes.
+
+        Only needed for writes that bypass the ORM unit of work (bulk UPDATE/DELETE);
+        ORM flushes are tracked automatically.
+        """
+        self.backend.bump_versions(user_id, scopes)
+
+    def versions(self, user_id: int, scopes: Iterable[str]) -> Tuple[int, ...]:
+        """Get the current version counters of a user for the given scopes."""
+        return self.backend.get_versions(user_id, scopes)
+
+    def cached(self, *scopes: str, ttl: Optional[int] = None):
+        """
+        Decorator caching a JWT-protected GET view's successful responses.
+
+        Args:
+            scopes: Data scopes the response depends on
+            ttl: Entry lifetime in seconds (defaults to RESPONSE_CACHE_TTL)
+        """
+        for scope in scopes:
+            if scope not in CACHE_SCOPES:
+                raise ValueError(f"Unknown cache scope: {scope}")
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                from app.utils.auth import get_current_user_id
+
+                user_id = get_current_user_id()
+                key = self._make_key(user_id, scopes, kwargs)
+
+                entry = self.backend.get(key)
+                if entry is not None:
+                    body, status, content_type = entry[:3]
+                    response = current_app.response_class(body, status=status, content_type=content_type)
+                    # Entries written before headers were stored have three fields
+                    response.headers.extend(entry[3] if len(entry) > 3 else ())
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    headers = tuple(
+                        (name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers
+                    )
+                    self.backend.set(
+                        key,
+                        (response.get_data(), response.status_code, response.content_type, headers),
+                        ttl or self.default_ttl
+                    )
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return decorated_function
+        return decorator
+
+    def _make_key(self, user_id: int, scopes: Tuple[str, ...], view_args: Dict[str, Any]) -> str:
+        """Build a cache key from user, endpoint, params and scope versions."""
+        versions = self.backend.get_versions(user_id, scopes)
+        params = sorted(request.args.items(multi=True))
+        # Views may negotiate the response format (app.utils.compact)
+        accept = request.headers.get('Accept', '')
+        # Set by conditional_get, so the body always matches the ETag sent with it
+        validator_state = g.get('validator_state')
+        raw = repr((
+            request.endpoint, sorted(view_args.items()), params, accept, scopes, versions, validator_state
+        ))
+        return f'resp:{user_id}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+# Model tablename -> invalidated scope
+_TABLE_SCOPES = {
+    'card_reviews': ('reviews',),
+    'card_states': ('reviews',),
+    'card_review_summaries': ('reviews',),
+    'review_daily_activity': ('reviews',),
+    'cards': ('cards',),
+    'decks': ('decks',),
+    'study_sessions': ('sessions',),
+    'user_preferences': ('preferences',),
+    'users': ('profile',),
+}
+
+_events_registered = False
+
+
+def _register_session_events() -> None:
+    """Attach flush/commit listeners to the app session class (once per process)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    from app import db
+
+    event.listen(db.session, 'after_flush', _collect_invalidations)
+    event.listen(db.session, 'after_commit', _apply_invalidations)
+    event.listen(db.session, 'after_rollback', _discard_invalidations)
+    _events_registered = True
+
+
+def _collect_invalidations(session, flush_context) -> None:
+    """Record (user_id, scope) pairs touched by this flush."""
+    pending: Set[Tuple[int, str]] = session.info.setdefault('cache_invalidations', set())
+    unresolved_decks: Dict[int, Tuple[str, ...]] = {}
+
+    touched = list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj)
+    ]
+    for obj in touched:
+        scopes = _TABLE_SCOPES.get(getattr(obj, '__tablename__', None))
+        if not scopes:
+            continue
+        if obj.__tablename__ == 'users':
+            user_id = obj.id
+        elif obj.__tablename__ == 'cards':
+            deck = inspect(obj).attrs.deck.loaded_value if hasattr(obj, 'deck') else None
+            user_id = getattr(deck, 'user_id', None)
+            if user_id is None and obj.deck_id is not None:
+                unresolved_decks[obj.deck_id] = scopes
+                continue
+        else:
+            user_id = getattr(obj, 'user_id', None)
+            if obj.__tablename__ == 'decks' and obj in session.deleted:
+                # Cards of a deleted deck can no longer be resolved to their owner
+                scopes = scopes + ('cards',)
+        if user_id is not None:
+            pending.update((user_id, scope) for scope in scopes)
+
+    if unresolved_decks:
+        from app.models.deck import Deck
+
+        rows = session.connection().execute(
+            select(Deck.id, Deck.user_id).where(Deck.id.in_(unresolved_decks.keys()))
+        )
+        for deck_id, user_id in rows:
+            pending.update((user_id, scope) for scope in unresolved_decks[deck_id])
+
+
+def _apply_invalidations(session) -> None:
+    """Bump version counters and drop user contexts once the transaction is durable."""
+    pending = session.info.pop('cache_invalidations', None)
+    due_updates = session.info.pop('due_index_updates', None)
+    if not pending or not has_app_context():
+        return
+
+    from app.utils.due_index import sync_due_indexes
+    from app.utils.user_context import CONTEXT_SCOPES, evict_user_contexts
+
+    evict_user_contexts({user_id for user_id, scope in pending if scope in CONTEXT_SCOPES})
+
+    by_user: Dict[int, Set[str]] = {}
+    for user_id, scope in pending:
+        by_user.setdefault(user_id, set()).add(scope)
+
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        for user_id, scopes in by_user.items():
+            cache.bump(user_id, sorted(scopes))
+
+    # After the bump, so indexes updated in place carry the new versions
+    sync_due_indexes(by_user, due_updates)
+
+
+def _discard_invalidations(session) -> None:
+    """Forget invalidations recorded by a rolled back transaction."""
+    session.info.pop('cache_invalidations', None)
+    session.info.pop('due_index_updates', None)
+
+
+def invalidate_on_commit(session, user_id: int, scopes: Iterable[str]) -> None:
+    """
+    Invalidate a user's cached responses for the given scopes when the session commits.
+
+    For writes that bypass the ORM unit of work (bulk UPDATE/DELETE) inside a
+    transaction; unlike ResponseCache.bump, nothing is invalidated on rollback.
+
+    Args:
+        session: SQLAlchemy session performing the write
+        user_id: Owner of the changed rows
+        scopes: Scopes affected by the write
+    """
+    pending: Set[Tuple[int, str]] = session.info.setdefault('cache_invalidations', set())
+    pending.update((user_id, scope) for scope in scopes)
+
+
+# Used by shared_store when the response cache is disabled
+_fallback_store: Optional[CacheBackend] = None
+
+
+def shared_store() -> CacheBackend:
+    """
+    Key-value store for small cross-request state (stickiness markers, ids).
+
+    Returns the response cache backend, so the state is shared between workers
+    when that backend is; falls back to a process-local memory store when the
+    response cache is disabled.
+    """
+    global _fallback_store
+    cache = current_app.extensions.get('response_cache')
+    if cache is None or isinstance(cache.backend, NullCacheBackend):
+        if _fallback_store is None:
+            _fallback_store = MemoryCacheBackend()
+        return _fallback_store
+    return cache.backend
@@ -0,0 +1,176 @@
+"""
+Compact payloads for mobile sync traffic
+
+Endpoints with long row lists (study queue, study packs, review upload) can
+answer in a columnar layout instead of one JSON object per row. The layout is
+chosen with the Accept header:
+
+    application/json                          rows (default)
+    application/vnd.neuroflash.columnar+json  columnar JSON
+    application/msgpack                       columnar MessagePack (when msgpack is installed)
+
+In the columnar layout every list of objects becomes a table,
+{"count": n, "columns": {name: [values]}}, which spells each key once instead
+of once per row. Enum columns (card_type, status) are dictionary-encoded as
+{"dictionary": [distinct values], "codes": [index per row]} and timestamps are
+integer milliseconds since the Unix epoch (UTC). Free-form fields such as
+card_data are passed through unchanged.
+"""
+import enum
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from flask import current_app, request
+from app.utils.json_provider import _default
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+
+JSON_MIMETYPE = 'application/json'
+COLUMNAR_MIMETYPE = 'application/vnd.neuroflash.columnar+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Fields holding timestamps (datetimes or ISO 8601 strings) and enum values
+TIME_FIELDS = frozenset({
+    'created_at', 'updated_at', 'next_review', 'last_reviewed_at', 'reviewed_at',
+    'generated_at', 'until', 'start_time', 'end_time', 'last_login',
+})
+ENUM_FIELDS = frozenset({'card_type', 'status'})
+# Free-form fields whose contents are left as they are
+OPAQUE_FIELDS = frozenset({'card_data', 'media_attachments', 'tags', 'settings'})
+
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def epoch_ms(value: Any) -> Optional[int]:
+    """Milliseconds since the epoch of a datetime or ISO 8601 string (naive means UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MILLISECOND
+
+
+def _column(name: str, values: List[Any]) -> Any:
+    """Encode one column of a table."""
+    if name in OPAQUE_FIELDS:
+        return values
+    sample = next((value for value in values if value is not None), None)
+    if name in ENUM_FIELDS or isinstance(sample, enum.Enum):
+        values = [value.value if isinstance(value, enum.Enum) else value for value in values]
+        dictionary = list(dict.fromkeys(value for value in values if value is not None))
+        codes = {value: code for code, value in enumerate(dictionary)}
+        return {'dictionary': dictionary, 'codes': [codes.get(value) for value in values]}
+    if name in TIME_FIELDS or isinstance(sample, datetime):
+        return [epoch_ms(value) for value in values]
+    if isinstance(sample, dict):
+        # Rows without the object get nulls in each nested column
+        return columnar_table([value or {} for value in values])
+    if isinstance(sample, (list, tuple)):
+        return [to_columnar(value, name) if value is not None else None for value in values]
+    return values
+
+
+def columnar_table(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Encode a list of row mappings as a table of columns.
+
+    Args:
+        rows: Rows (dicts or result row mappings); missing keys read as null
+
+    Returns:
+        {'count': number of rows, 'columns': {name: encoded column}}
+    """
+    names = list(dict.fromkeys(name for row in rows for name in row.keys()))
+    return {
+        'count': len(rows),
+        'columns': {name: _column(name, [row.get(name) for row in rows]) for name in names},
+    }
+
+
+def to_columnar(value: Any, name: Optional[str] = None) -> Any:
+    """
+    Convert a response payload to the columnar layout.
+
+    Args:
+        value: Payload (dicts, lists and scalars)
+        name: Key the value is stored under, which selects field-specific encodings
+
+    Returns:
+        Columnar payload made of JSON/MessagePack-native types
+    """
+    if name in OPAQUE_FIELDS:
+        return value
+    if isinstance(value, dict):
+        return {key: to_columnar(item, key) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return columnar_table(value)
+        return [to_columnar(item, name) for item in value]
+    if isinstance(value, datetime) or (name in TIME_FIELDS and isinstance(value, str)):
+        return epoch_ms(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def msgpack_packer():
+    """A MessagePack packer converting other types like the JSON provider."""
+    return msgpack.Packer(default=_default, use_bin_type=True)
+
+
+def negotiate_format() -> str:
+    """
+    Pick the response layout from the Accept header.
+
+    Returns:
+        'json', 'columnar' or 'msgpack' (only offered when msgpack is installed)
+    """
+    offered = [JSON_MIMETYPE, COLUMNAR_MIMETYPE]
+    if msgpack is not None:
+        offered += [MSGPACK_MIMETYPE, 'application/x-msgpack']
+    best = request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+    if best == COLUMNAR_MIMETYPE:
+        return 'columnar'
+    if best in (MSGPACK_MIMETYPE, 'application/x-msgpack'):
+        return 'msgpack'
+    return 'json'
+
+
+FORMAT_MIMETYPES = {
+    'json': JSON_MIMETYPE,
+    'columnar': COLUMNAR_MIMETYPE,
+    'msgpack': MSGPACK_MIMETYPE,
+}
+
+
+def compact_response(payload: Any, status: int = 200):
+    """
+    Build a response in the layout negotiated with the Accept header.
+
+    Args:
+        payload: Response payload, as it would be passed to jsonify
+        status: HTTP status code
+
+    Returns:
+        Flask response (varies on Accept)
+    """
+    layout = negotiate_format()
+    if layout == 'json':
+        response = current_app.json.response(payload)
+    elif layout == 'columnar':
+        response = current_app.response_class(
+            current_app.json.dumps(to_columnar(payload)), mimetype=COLUMNAR_MIMETYPE
+        )
+    else:
+        response = current_app.response_class(
+            msgpack_packer().pack(to_columnar(payload)), mimetype=MSGPACK_MIMETYPE
+        )
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,168 @@
+"""
+Gzip compression of request and response bodies
+
+Bulk endpoints (imports, batch creates, exports, sync) move large bodies.
+Clients may send them with Content-Encoding: gzip; the body is decompressed
+as the view reads it, so a compressed import is never inflated in memory all
+at once, and reading stops with 413 once MAX_DECOMPRESSED_REQUEST_MB is
+exceeded (which also defuses decompression bombs).
+
+Responses of at least COMPRESS_MIN_SIZE bytes are gzipped when the client
+sends Accept-Encoding: gzip. Streamed responses (exports) are compressed chunk
+by chunk as they are generated. Bodies that are already compressed (gzip
+files, images, responses with a Content-Encoding) are left alone. A strong
+ETag becomes weak when the body is compressed, since the gzip and identity
+bodies are not byte-identical.
+"""
+import io
+import zlib
+from typing import Iterable, Iterator
+from flask import request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+
+
+# Read size of the compressed request body
+_READ_SIZE = 64 * 1024
+
+# Media types worth compressing besides text/*
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/msgpack',
+    'application/vnd.neuroflash.columnar+json',
+})
+
+
+class _GzipInput(io.RawIOBase):
+    """Readable stream inflating a gzip request body on demand, up to max_bytes."""
+
+    def __init__(self, raw, max_bytes: int):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.total = 0
+        # 16 + MAX_WBITS: gzip header and trailer
+        self.inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        data = b''
+        while not data:
+            if self.inflater.unconsumed_tail:
+                compressed = self.inflater.unconsumed_tail
+            elif self.inflater.eof:
+                return 0
+            else:
+                compressed = self.raw.read(_READ_SIZE)
+                if not compressed:
+                    raise BadRequest('Truncated gzip request body')
+            try:
+                # max_length bounds the memory of a single inflate step
+                data = self.inflater.decompress(compressed, size)
+            except zlib.error:
+                raise BadRequest('Invalid gzip request body')
+        self.total += len(data)
+        if self.total > self.max_bytes:
+            raise RequestEntityTooLarge(
+                f'Decompressed request body exceeds {self.max_bytes // (1024 * 1024)} MB'
+            )
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class GzipRequestMiddleware:
+    """WSGI middleware decompressing Content-Encoding: gzip request bodies."""
+
+    def __init__(self, wsgi_app, max_bytes: int):
+        self.wsgi_app = wsgi_app
+        self.max_bytes = max_bytes
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            environ['wsgi.input'] = io.BufferedReader(
+                _GzipInput(environ['wsgi.input'], self.max_bytes), _READ_SIZE
+            )
+            # The decompressed length is unknown; the stream ends at the gzip trailer
+            environ.pop('CONTENT_LENGTH', None)
+            environ['wsgi.input_terminated'] = True
+            del environ['HTTP_CONTENT_ENCODING']
+        elif encoding not in ('', 'identity'):
+            body = b'{"error": "Unsupported Content-Encoding; use gzip"}'
+            start_response('415 Unsupported Media Type', [
+                ('Content-Type', 'application/json'), ('Content-Length', str(len(body)))
+            ])
+            return [body]
+        return self.wsgi_app(environ, start_response)
+
+
+def _compressible(response) -> bool:
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _gzip_chunks(chunks: Iterable[bytes], level: int) -> Iterator[bytes]:
+    """Compress an iterable of chunks into gzip chunks as they come."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            compressed = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def gzip_bytes(data: bytes, level: int = 6) -> bytes:
+    """Compress a body into a gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def init_compression(app) -> None:
+    """
+    Install request decompression and response compression.
+
+    Reads MAX_DECOMPRESSED_REQUEST_MB, COMPRESS_MIN_SIZE (bytes) and
+    COMPRESS_LEVEL (0 disables response compression).
+    """
+    max_bytes = app.config.get('MAX_DECOMPRESSED_REQUEST_MB', 64) * 1024 * 1024
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+    app.wsgi_app = GzipRequestMiddleware(app.wsgi_app, max_bytes)
+
+    if not level:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+        if (
+            response.status_code < 200 or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+            or 'Content-Encoding' in response.headers
+            or not _compressible(response)
+            or request.accept_encodings['gzip'] == 0
+        ):
+            return response
+
+        if response.is_streamed:
+            response.response = _gzip_chunks(response.response, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(gzip_bytes(data, level))
+        # The gzip and identity bodies differ byte for byte but not in meaning
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
@@ -0,0 +1,81 @@
+"""
+Conditional GET utilities (ETag / If-None-Match)
+"""
+import hashlib
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+from flask import current_app, g, request
+from app.utils.auth import get_current_user_id
+
+
+def _make_etag(user_id: int, state: Tuple[Any, ...]) -> str:
+    """Build an opaque ETag from the endpoint, its params and a validator state."""
+    raw = repr((
+        request.endpoint,
+        sorted(request.view_args.items()) if request.view_args else [],
+        sorted(request.args.items(multi=True)),
+        user_id,
+        state
+    ))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional_get(validator: Callable[..., Optional[Tuple[Any, ...]]]):
+    """
+    Decorator answering conditional GETs from a cheap validator.
+
+    The validator is called as validator(user_id, **view_kwargs) and must return a
+    tuple that changes whenever the response body would change (e.g. counts and
+    max(updated_at) of the underlying rows), or None to skip conditional handling
+    (e.g. when the resource does not exist). A matching If-None-Match is answered
+    with 304 before the view runs, so the full query and serialization are skipped.
+
+    The state is kept in g.validator_state for the response cache, which makes it
+    part of the cache key: a cached body is only served under the validator state
+    (and so the ETag) it was built with, even if a write was not seen by the
+    cache's version counters.
+
+    Args:
+        validator: Function computing the validator state
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_id = get_current_user_id()
+            state = validator(user_id, **kwargs)
+            if state is None:
+                return f(*args, **kwargs)
+            g.validator_state = state
+
+            etag = _make_etag(user_id, state)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+
+def body_etag(f):
+    """
+    Decorator adding a body-hash ETag to successful responses.
+
+    Used where no cheap validator exists (e.g. time-dependent study queues); this
+    saves bandwidth on unchanged payloads but not the work of building them.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = current_app.make_response(f(*args, **kwargs))
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+
+        response.add_etag(weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+    return decorated_function
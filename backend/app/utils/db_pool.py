@@ -0,0 +1,207 @@
+"""
+Database connection pool configuration and telemetry
+
+InstrumentedQueuePool records how long requests wait for a pooled connection and
+how often checkouts time out, so pool starvation under load shows up in
+/api/health/db instead of as unexplained latency. The statement_timeout decorator
+bounds query time per endpoint class on PostgreSQL.
+"""
+import threading
+import time
+from functools import wraps
+from typing import Any, Dict
+from flask import current_app, jsonify
+from sqlalchemy import event, exc as sa_exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 10, 100, 1000)
+
+# PostgreSQL SQLSTATE for a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+
+class PoolMetrics:
+    """Thread-safe counters for pool checkouts and timeouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.statement_timeouts: Dict[str, int] = {}
+
+    def record_checkout(self, wait_seconds: float) -> None:
+        wait_ms = wait_seconds * 1000
+        bucket = next(
+            (i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound),
+            len(WAIT_BUCKETS_MS)
+        )
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait_seconds
+            self.wait_max = max(self.wait_max, wait_seconds)
+            self.wait_buckets[bucket] += 1
+
+    def record_checkout_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def record_statement_timeout(self, endpoint_class: str) -> None:
+        with self._lock:
+            self.statement_timeouts[endpoint_class] = self.statement_timeouts.get(endpoint_class, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current counters as a JSON-serializable dict."""
+        with self._lock:
+            labels = [f'<={bound}ms' for bound in WAIT_BUCKETS_MS] + [f'>{WAIT_BUCKETS_MS[-1]}ms']
+            return {
+                'checkouts': self.checkouts,
+                'checkout_timeouts': self.checkout_timeouts,
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'wait_histogram': dict(zip(labels, self.wait_buckets)),
+                'statement_timeouts': dict(self.statement_timeouts),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording checkout wait times and timeouts in pool_metrics."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            pool_metrics.record_checkout_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+def configure_engine_options(app) -> None:
+    """
+    Finalize SQLALCHEMY_ENGINE_OPTIONS for the app's database URI.
+
+    Instruments QueuePool-based configurations (those setting pool_size) and, on
+    PostgreSQL, applies the default statement timeout to every connection.
+
+    Args:
+        app: Flask application
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'pool_size' in options:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+
+    default_timeout = (app.config.get('STATEMENT_TIMEOUTS_MS') or {}).get('default')
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if default_timeout and uri and make_url(uri).get_backend_name() == 'postgresql':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args.setdefault('options', f'-c statement_timeout={int(default_timeout)}')
+        options['connect_args'] = connect_args
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """
+    Get the current state of an engine's pool.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Dict with the pool class and, for queue pools, size and usage
+    """
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'timeout': pool.timeout(),
+        })
+    return status
+
+
+_events_registered = False
+
+
+def _register_session_events() -> None:
+    """Re-apply the view's statement timeout whenever a transaction begins."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    from app import db
+
+    event.listen(db.session, 'after_begin', _on_begin)
+    _events_registered = True
+
+
+def _on_begin(session, transaction, connection) -> None:
+    timeout_ms = session.info.get('statement_timeout_ms')
+    if timeout_ms:
+        _set_statement_timeout(connection, timeout_ms)
+
+
+def _set_statement_timeout(connection, timeout_ms: int) -> None:
+    """Set a transaction-local statement timeout on a PostgreSQL connection."""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(
+            text("SELECT set_config('statement_timeout', :ms, true)"),
+            {'ms': str(int(timeout_ms))}
+        )
+
+
+def statement_timeout(endpoint_class: str):
+    """
+    Decorator bounding query time for an endpoint class (STATEMENT_TIMEOUTS_MS).
+
+    On PostgreSQL the timeout is set transaction-locally on every transaction the
+    view begins, so it still applies after the view commits, and a cancelled query
+    is answered with 503 instead of tying up the connection. Other databases
+    ignore it. Apply below @read_replica so the timeout is set on the connection
+    that serves the view's reads.
+
+    Args:
+        endpoint_class: Key of STATEMENT_TIMEOUTS_MS (e.g. 'study', 'export')
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from app import db
+
+            timeout_ms = current_app.config.get('STATEMENT_TIMEOUTS_MS', {}).get(endpoint_class)
+            session = db.session()
+            if timeout_ms:
+                _register_session_events()
+                session.info['statement_timeout_ms'] = timeout_ms
+                if session.in_transaction():
+                    _set_statement_timeout(session.connection(), timeout_ms)
+
+            try:
+                return f(*args, **kwargs)
+            except sa_exc.OperationalError as e:
+                if getattr(e.orig, 'pgcode', None) != QUERY_CANCELED:
+                    raise
+                db.session.rollback()
+                pool_metrics.record_statement_timeout(endpoint_class)
+                return jsonify({'error': 'Query timed out'}), 503
+            finally:
+                session.info.pop('statement_timeout_ms', None)
+        return decorated_function
+    return decorator
@@ -0,0 +1,147 @@
+"""
+Read-replica routing utilities
+
+RoutingSession sends the reads of endpoints marked with @read_replica to one of
+the configured replica databases (SQLALCHEMY_REPLICA_URIS) and everything else to
+the primary. After a user's request commits writes, that user's reads stay on the
+primary for REPLICA_STICKINESS_SECONDS so they always see their own writes.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import List, Optional
+from flask import current_app, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+
+# Replica engine chosen for the current @read_replica view (None routes to the primary)
+_replica_engine: ContextVar[Optional[Engine]] = ContextVar('replica_engine', default=None)
+
+
+class RoutingSession(Session):
+    """Session routing read-only work to replica engines."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = _replica_engine.get()
+        if (
+            replica is not None
+            and bind is None
+            and not self._flushing
+            and not self.info.get('has_writes')
+        ):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_engines() -> List[Engine]:
+    """Get the replica engines of the current app."""
+    if not has_app_context():
+        return []
+    return current_app.extensions.get('replica_engines', [])
+
+
+def init_replicas(app) -> None:
+    """
+    Create engines for the SQLALCHEMY_REPLICA_URIS of an app.
+
+    Replicas share the primary's schema, so they are plain engines rather than
+    SQLALCHEMY_BINDS (which would get their own, empty, metadata).
+
+    Args:
+        app: Flask application
+    """
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    app.extensions['replica_engines'] = [
+        create_engine(uri, **options)
+        for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    ]
+    _register_session_events()
+
+
+def read_replica(f):
+    """
+    Decorator routing a read-only view's queries to a replica.
+
+    Falls back to the primary when no replica is configured or the current user
+    wrote recently (read-your-writes stickiness). Must be applied after
+    @jwt_required() so the user can be identified.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        engines = replica_engines()
+        user_id = _current_user_id()
+        if not engines or (user_id is not None and is_sticky(user_id)):
+            return f(*args, **kwargs)
+
+        # One replica per request so all of its reads see the same snapshot
+        token = _replica_engine.set(random.choice(engines))
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _replica_engine.reset(token)
+    return decorated_function
+
+
+def _current_user_id() -> Optional[int]:
+    """Get the authenticated user of the current request, if any."""
+    if not has_request_context():
+        return None
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        identity = get_jwt_identity()
+    except RuntimeError:  # No JWT verified in this request
+        return None
+    return int(identity) if identity is not None else None
+
+
+def _sticky_store():
+    """Store for stickiness markers."""
+    from app.utils.cache import shared_store
+
+    return shared_store()
+
+
+def mark_sticky(user_id: int) -> None:
+    """Pin a user's reads to the primary for REPLICA_STICKINESS_SECONDS."""
+    ttl = current_app.config.get('REPLICA_STICKINESS_SECONDS', 5)
+    _sticky_store().set(f'replica-sticky:{user_id}', time.time(), ttl)
+
+
+def is_sticky(user_id: int) -> bool:
+    """Check whether a user's reads are currently pinned to the primary."""
+    return _sticky_store().get(f'replica-sticky:{user_id}') is not None
+
+
+_events_registered = False
+
+
+def _register_session_events() -> None:
+    """Track writes per transaction and mark the writing user sticky on commit."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    from app import db
+
+    event.listen(db.session, 'after_flush', _on_flush)
+    event.listen(db.session, 'after_commit', _on_commit)
+    event.listen(db.session, 'after_rollback', _on_rollback)
+    _events_registered = True
+
+
+def _on_flush(session, flush_context) -> None:
+    session.info['has_writes'] = True
+
+
+def _on_commit(session) -> None:
+    if session.info.pop('has_writes', False) and replica_engines():
+        user_id = _current_user_id()
+        if user_id is not None:
+            mark_sticky(user_id)
+
+
+def _on_rollback(session) -> None:
+    session.info.pop('has_writes', None)
@@ -0,0 +1,459 @@
+"""
+In-process due card index of recently active users
+
+A study session alternates queue and review requests. Every review commits to
+the user's 'reviews' scope, which invalidates the cached queue response, so
+without help each queue request scans the user's scheduling state again. The
+index keeps, per user, a min-heap of scheduled cards ordered by
+(next_review, card_id), the same order as idx_card_state_due, and the
+unscheduled cards in (deck_id, card_id) order. It is loaded with one query the
+first time a user's queue is built and answers later queue requests from
+memory; a review committed in this process updates it in O(log n).
+
+Entries are kept per app in an LRU bounded by DUE_INDEX_MEMORY_MB. Like user
+contexts, they are keyed by the response cache version counters of the scopes
+they depend on, so commits made elsewhere (other workers, imports, deck edits)
+drop them. That only holds when the cache backend is shared between processes:
+with a per-process backend the index is not used at all and queues are read
+from the database. DUE_INDEX_TTL additionally reloads indexes periodically.
+"""
+import heapq
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from flask import current_app
+
+DUE_SCOPES = ('reviews', 'cards', 'decks')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _micros(value: datetime) -> int:
+    """Microseconds since the epoch of a naive UTC datetime (exact, unlike floats)."""
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class DueHeap:
+    """
+    Binary min-heap of scheduled cards stored in parallel typed arrays.
+
+    Each slot holds (next_review, card_id, deck_id, ease_factor, interval,
+    repetitions); a position map makes updating or removing a card O(log n).
+    """
+
+    __slots__ = ('_next', '_card', '_deck', '_ease', '_interval', '_reps', '_pos')
+
+    def __init__(self):
+        self._next = array('q')
+        self._card = array('q')
+        self._deck = array('q')
+        self._ease = array('d')
+        self._interval = array('i')
+        self._reps = array('i')
+        self._pos: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._card)
+
+    def __contains__(self, card_id: int) -> bool:
+        return card_id in self._pos
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the heap."""
+        arrays = (self._next, self._card, self._deck, self._ease, self._interval, self._reps)
+        # Position map: the dict table plus one int object per key
+        return sum(a.itemsize * len(a) for a in arrays) + sys.getsizeof(self._pos) + 28 * len(self._pos)
+
+    def get(self, card_id: int) -> Optional[Tuple[int, int, float, int, int]]:
+        """(next_review, deck_id, ease_factor, interval, repetitions) of a card, or None."""
+        i = self._pos.get(card_id)
+        if i is None:
+            return None
+        return self._next[i], self._deck[i], self._ease[i], self._interval[i], self._reps[i]
+
+    def _less(self, i: int, j: int) -> bool:
+        return (self._next[i], self._card[i]) < (self._next[j], self._card[j])
+
+    def _swap(self, i: int, j: int) -> None:
+        for a in (self._next, self._card, self._deck, self._ease, self._interval, self._reps):
+            a[i], a[j] = a[j], a[i]
+        self._pos[self._card[i]] = i
+        self._pos[self._card[j]] = j
+
+    def _sift_up(self, i: int) -> None:
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not self._less(i, parent):
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int) -> None:
+        size = len(self._card)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and self._less(child, smallest):
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    @classmethod
+    def from_sorted(cls, rows: List[Tuple[int, int, int, float, int, int]]) -> 'DueHeap':
+        """
+        Build a heap from rows sorted by (next_review, card_id), in O(n).
+
+        A sorted array already satisfies the heap order, so the columns are
+        copied into the arrays as they are.
+
+        Args:
+            rows: (card_id, deck_id, next_review, ease_factor, interval, repetitions)
+        """
+        heap = cls()
+        if rows:
+            cards, decks, nexts, eases, intervals, reps = zip(*rows)
+            heap._card = array('q', cards)
+            heap._deck = array('q', decks)
+            heap._next = array('q', nexts)
+            heap._ease = array('d', eases)
+            heap._interval = array('i', intervals)
+            heap._reps = array('i', reps)
+            heap._pos = {card_id: i for i, card_id in enumerate(cards)}
+        return heap
+
+    def set(self, card_id: int, deck_id: int, next_review: int, ease_factor: float,
+            interval: int, repetitions: int) -> None:
+        """Add a card or update its state, in O(log n)."""
+        i = self._pos.get(card_id)
+        if i is None:
+            self._pos[card_id] = len(self._card)
+            self._next.append(next_review)
+            self._card.append(card_id)
+            self._deck.append(deck_id)
+            self._ease.append(ease_factor)
+            self._interval.append(interval)
+            self._reps.append(repetitions)
+            self._sift_up(len(self._card) - 1)
+            return
+        self._next[i] = next_review
+        self._deck[i] = deck_id
+        self._ease[i] = ease_factor
+        self._interval[i] = interval
+        self._reps[i] = repetitions
+        self._sift_up(i)
+        self._sift_down(self._pos[card_id])
+
+    def remove(self, card_id: int) -> None:
+        """Remove a card if present, in O(log n)."""
+        i = self._pos.get(card_id)
+        if i is None:
+            return
+        last = len(self._card) - 1
+        if i != last:
+            self._swap(i, last)
+        for a in (self._next, self._card, self._deck, self._ease, self._interval, self._reps):
+            a.pop()
+        del self._pos[card_id]
+        if i != last:
+            self._sift_up(i)
+            self._sift_down(i)
+
+    def due(self, until: int, limit: Optional[int] = None, deck_id: Optional[int] = None) -> List[int]:
+        """
+        Card IDs with next_review <= until, in (next_review, card_id) order.
+
+        Walks the heap best-first with a frontier of candidate slots, so without a
+        deck filter the cost is O(k log k) for k results.
+
+        Args:
+            until: Cutoff in epoch microseconds
+            limit: Maximum number of cards (None or 0 for all)
+            deck_id: Only return cards of this deck
+        """
+        result: List[int] = []
+        if not self._card:
+            return result
+        frontier = [(self._next[0], self._card[0], 0)]
+        size = len(self._card)
+        while frontier:
+            next_review, card_id, i = heapq.heappop(frontier)
+            if next_review > until:
+                # The frontier holds the earliest remaining slots
+                break
+            if deck_id is None or self._deck[i] == deck_id:
+                result.append(card_id)
+                if limit and len(result) >= limit:
+                    break
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size:
+                    heapq.heappush(frontier, (self._next[child], self._card[child], child))
+        return result
+
+
+class UserDueIndex:
+    """Scheduled (heap) and unscheduled (sorted arrays) cards of one user."""
+
+    __slots__ = ('heap', 'new_decks', 'new_cards', 'versions', 'loaded_at', 'lock')
+
+    def __init__(self, versions: tuple):
+        self.heap = DueHeap()
+        # Unscheduled cards sorted by (deck_id, card_id), as get_new_cards returns them
+        self.new_decks = array('q')
+        self.new_cards = array('q')
+        self.versions = versions
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the index."""
+        return self.heap.nbytes() + 8 * (len(self.new_decks) + len(self.new_cards))
+
+    def _new_position(self, deck_id: int, card_id: int) -> int:
+        return bisect_left(range(len(self.new_cards)), (deck_id, card_id),
+                           key=lambda i: (self.new_decks[i], self.new_cards[i]))
+
+    def due_card_ids(self, now: datetime, limit: Optional[int] = None,
+                     deck_id: Optional[int] = None) -> List[int]:
+        """Due card IDs, most overdue first (see SpacedRepetitionService.get_due_cards)."""
+        with self.lock:
+            return self.heap.due(_micros(now), limit, deck_id)
+
+    def new_card_ids(self, limit: Optional[int] = None, deck_id: Optional[int] = None) -> List[int]:
+        """Unscheduled card IDs in deck and creation order (see get_new_cards)."""
+        with self.lock:
+            if deck_id is None:
+                start, end = 0, len(self.new_cards)
+            else:
+                start = self._new_position(deck_id, 0)
+                end = self._new_position(deck_id + 1, 0)
+            if limit:
+                end = min(end, start + limit)
+            return self.new_cards[start:end].tolist()
+
+    def states(self, card_ids: Iterable[int]) -> Dict[int, Tuple[float, int, int]]:
+        """(ease_factor, interval, repetitions) of the given cards that are scheduled."""
+        with self.lock:
+            states = {}
+            for card_id in card_ids:
+                state = self.heap.get(card_id)
+                if state is not None:
+                    states[card_id] = state[2:]
+            return states
+
+    def schedule(self, card_id: int, deck_id: int, next_review: datetime, ease_factor: float,
+                 interval: int, repetitions: int) -> None:
+        """Record a card's new state after a review, in O(log n)."""
+        with self.lock:
+            if card_id not in self.heap:
+                i = self._new_position(deck_id, card_id)
+                if i < len(self.new_cards) and self.new_cards[i] == card_id:
+                    del self.new_decks[i]
+                    del self.new_cards[i]
+            self.heap.set(card_id, deck_id, _micros(next_review), ease_factor, interval, repetitions)
+
+
+class _IndexStore:
+    """LRU of per-user due indexes of one app, bounded by total memory."""
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: 'OrderedDict[int, UserDueIndex]' = OrderedDict()
+        self.sizes: Dict[int, int] = {}
+        self.total_bytes = 0
+        # Bumped on every eviction so an index loaded before a commit is not stored after it
+        self.generations: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def generation(self, user_id: int) -> int:
+        with self.lock:
+            return self.generations.get(user_id, 0)
+
+    def get(self, user_id: int, versions: tuple) -> Optional[UserDueIndex]:
+        with self.lock:
+            index = self.entries.get(user_id)
+            if index is None:
+                return None
+            if index.versions != versions or time.monotonic() - index.loaded_at > self.ttl:
+                self._drop(user_id)
+                return None
+            self.entries.move_to_end(user_id)
+            return index
+
+    def put(self, user_id: int, index: UserDueIndex, generation: int) -> None:
+        with self.lock:
+            if generation != self.generations.get(user_id, 0):
+                return
+            self._drop(user_id)
+            self.entries[user_id] = index
+            self._resize(user_id)
+
+    def evict(self, user_id: int) -> None:
+        with self.lock:
+            self.generations[user_id] = self.generations.get(user_id, 0) + 1
+            self._drop(user_id)
+
+    def apply(self, user_id: int, updates: List[Tuple], versions: tuple) -> None:
+        """
+        Apply reviews committed by this process, or drop the index if anything
+        else changed its scopes since it was loaded.
+        """
+        with self.lock:
+            self.generations[user_id] = self.generations.get(user_id, 0) + 1
+            index = self.entries.get(user_id)
+            if index is None:
+                return
+            # Our commit bumped 'reviews' once (not at all when the cache is disabled)
+            if versions[1:] != index.versions[1:] or versions[:1] and \
+                    versions[0] - index.versions[0] not in (0, 1):
+                self._drop(user_id)
+                return
+            for update in updates:
+                index.schedule(*update)
+            index.versions = versions
+            self._resize(user_id)
+
+    def _drop(self, user_id: int) -> None:
+        if self.entries.pop(user_id, None) is not None:
+            self.total_bytes -= self.sizes.pop(user_id)
+
+    def _resize(self, user_id: int) -> None:
+        size = self.entries[user_id].nbytes()
+        self.total_bytes += size - self.sizes.get(user_id, 0)
+        self.sizes[user_id] = size
+        # Least recently used first; an index larger than the budget is not kept
+        while self.total_bytes > self.max_bytes and self.entries:
+            self._drop(next(iter(self.entries)))
+
+
+def init_due_indexes(app) -> None:
+    """
+    Create the due index store of an app.
+
+    Args:
+        app: Flask application
+    """
+    app.extensions['due_index'] = _IndexStore(
+        app.config.get('DUE_INDEX_MEMORY_MB', 32) * 1024 * 1024,
+        app.config.get('DUE_INDEX_TTL', 60)
+    )
+
+
+def _versions(user_id: int) -> tuple:
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        return ()
+    return cache.versions(user_id, DUE_SCOPES)
+
+
+def _load(user_id: int, versions: tuple) -> UserDueIndex:
+    """Load a user's cards and their scheduling state with one query."""
+    from app import db
+    from app.models.card import Card
+    from app.models.card_state import CardState
+    from app.models.deck import Deck
+
+    rows = db.session.connection().execute(
+        db.select(
+            Card.id, Card.deck_id, CardState.next_review,
+            CardState.ease_factor, CardState.interval, CardState.repetitions
+        ).join(
+            Deck, Deck.id == Card.deck_id
+        ).outerjoin(
+            CardState, db.and_(CardState.card_id == Card.id, CardState.user_id == user_id)
+        ).where(
+            Deck.user_id == user_id
+        ).order_by(CardState.next_review, Card.id)
+    ).all()
+
+    scheduled, new = [], []
+    for card_id, deck_id, next_review, ease_factor, interval, repetitions in rows:
+        if next_review is None:
+            new.append((deck_id, card_id))
+        else:
+            scheduled.append((card_id, deck_id, _micros(next_review), ease_factor, interval, repetitions))
+
+    index = UserDueIndex(versions)
+    index.heap = DueHeap.from_sorted(scheduled)
+    new.sort()
+    index.new_decks = array('q', (deck_id for deck_id, _ in new))
+    index.new_cards = array('q', (card_id for _, card_id in new))
+    return index
+
+
+def get_due_index(user_id: int) -> Optional[UserDueIndex]:
+    """
+    Get a user's due index, loading it if needed.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        UserDueIndex, or None when the index is disabled (DUE_INDEX_MEMORY_MB=0) or the
+        response cache backend is not shared, so commits by other processes would go unseen
+    """
+    store: Optional[_IndexStore] = current_app.extensions.get('due_index')
+    cache = current_app.extensions.get('response_cache')
+    if store is None or not store.max_bytes or cache is None or not cache.backend.shared:
+        return None
+    versions = _versions(user_id)
+    index = store.get(user_id, versions)
+    if index is None:
+        generation = store.generation(user_id)
+        index = _load(user_id, versions)
+        store.put(user_id, index, generation)
+    return index
+
+
+def schedule_on_commit(session, user_id: int, card_id: int, deck_id: int, next_review: datetime,
+                       ease_factor: float, interval: int, repetitions: int) -> None:
+    """
+    Update the user's due index with a reviewed card's state once the session commits.
+
+    Args:
+        session: SQLAlchemy session writing the review
+        user_id: Reviewing user
+        card_id: Reviewed card
+        deck_id: Deck of the card
+        next_review: New next review date
+        ease_factor: New ease factor
+        interval: New interval in days
+        repetitions: New repetition count
+    """
+    updates: List[Tuple] = session.info.setdefault('due_index_updates', [])
+    updates.append((user_id, (card_id, deck_id, next_review, ease_factor, interval, repetitions)))
+
+
+def sync_due_indexes(scopes_by_user: Dict[int, Iterable[str]], updates: Optional[List[Tuple]]) -> None:
+    """
+    Bring due indexes up to date after a commit (called once versions are bumped).
+
+    Reviews written by this process are applied in place; any other change to a
+    user's cards, decks or reviews drops their index.
+
+    Args:
+        scopes_by_user: Scopes each user's rows were committed in
+        updates: Reviews registered with schedule_on_commit
+    """
+    store: Optional[_IndexStore] = current_app.extensions.get('due_index')
+    if store is None:
+        return
+    by_user: Dict[int, List[Tuple]] = {}
+    for user_id, update in updates or ():
+        by_user.setdefault(user_id, []).append(update)
+    for user_id, scopes in scopes_by_user.items():
+        touched = set(scopes) & set(DUE_SCOPES)
+        if not touched:
+            continue
+        if touched == {'reviews'} and user_id in by_user:
+            store.apply(user_id, by_user[user_id], _versions(user_id))
+        else:
+            store.evict(user_id)
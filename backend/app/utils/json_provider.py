@@ -0,0 +1,101 @@
+"""
+JSON providers for API responses
+
+FastJSONProvider encodes with orjson when it is installed and falls back to the
+stdlib encoder otherwise. Both handle datetimes (ISO 8601), enums (their value)
+and SQLAlchemy result rows natively, so views can return rows straight from a
+column-projected query instead of building a dict per ORM object.
+"""
+import dataclasses
+import decimal
+import enum
+import uuid
+from datetime import date, datetime
+from typing import Any, Union
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row, RowMapping
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Convert types the encoders do not handle natively."""
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Stdlib json provider with ISO 8601 datetimes, enum values and row support."""
+
+    default = staticmethod(_default)
+
+
+class FastJSONProvider(StdlibJSONProvider):
+    """orjson-backed provider; behaves like StdlibJSONProvider when orjson is missing."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumpb(obj).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj) + b'\n', mimetype=self.mimetype)
+
+    def _dumpb(self, obj: Any) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+JSON_PROVIDERS = {
+    'auto': FastJSONProvider,
+    'orjson': FastJSONProvider,
+    'stdlib': StdlibJSONProvider,
+}
+
+
+def create_json_provider(app) -> DefaultJSONProvider:
+    """
+    Build the JSON provider selected by the JSON_PROVIDER config value.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        JSON provider instance bound to the app
+    """
+    name = app.config.get('JSON_PROVIDER', 'auto')
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON provider: {name}")
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    return JSON_PROVIDERS[name](app)
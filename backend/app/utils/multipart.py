@@ -0,0 +1,99 @@
+"""
+Incremental multipart/form-data parsing
+
+request.files spools every uploaded file (in memory, then in a temporary file)
+before the view sees it. Upload endpoints for large files instead read
+request.stream and parse the multipart body as it arrives with werkzeug's
+sans-IO decoder, so the file is handed on in chunks and never stored.
+"""
+from typing import Dict, Iterator, Optional
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+
+# Bytes read from the request stream at a time
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Limit on the size of the (non-file) form fields
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class FilePart:
+    """
+    The first file of a multipart upload.
+
+    Attributes:
+        fields: Form fields sent before the file
+        name: Form field name of the file
+        filename: Client-side file name
+        content_type: Media type of the file part, if given
+        chunks: Iterator of the file's bytes; reading it consumes the request
+    """
+
+    def __init__(self, fields: Dict[str, str], name: str, filename: str,
+                 content_type: Optional[str], chunks: Iterator[bytes]):
+        self.fields = fields
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.chunks = chunks
+
+
+def _events(stream, decoder: MultipartDecoder, chunk_size: int):
+    """Parser events of a multipart body read from stream."""
+    try:
+        while True:
+            event = decoder.next_event()
+            if isinstance(event, NeedData):
+                if decoder.complete:
+                    raise BadRequest('Truncated multipart body')
+                decoder.receive_data(stream.read(chunk_size) or None)
+                continue
+            yield event
+            if isinstance(event, Epilogue):
+                return
+    except ValueError as e:
+        raise BadRequest(f'Invalid multipart body: {e}')
+
+
+def _file_data(events) -> Iterator[bytes]:
+    """Data of the current file part."""
+    for event in events:
+        if isinstance(event, Data):
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+
+
+def open_file_part(stream, content_type: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> FilePart:
+    """
+    Read a multipart body up to its first file part.
+
+    Args:
+        stream: Request body stream (request.stream)
+        content_type: Content-Type header of the request
+        chunk_size: Bytes read at a time
+
+    Returns:
+        FilePart whose chunks continue reading the stream
+
+    Raises:
+        BadRequest: If the body is not multipart/form-data, is malformed or has no file
+    """
+    mimetype, options = parse_options_header(content_type)
+    boundary = options.get('boundary')
+    if mimetype != 'multipart/form-data' or not boundary:
+        raise BadRequest('Expected a multipart/form-data body with a boundary')
+
+    events = _events(stream, MultipartDecoder(boundary.encode(), MAX_FIELD_SIZE), chunk_size)
+    fields: Dict[str, str] = {}
+    for event in events:
+        if isinstance(event, Field):
+            value = b''.join(_file_data(events))
+            fields[event.name] = value.decode(event.headers.get('charset', 'utf-8'), 'replace')
+        elif isinstance(event, File):
+            return FilePart(fields, event.name, event.filename, event.headers.get('Content-Type'),
+                            _file_data(events))
+    raise BadRequest('The upload contains no file')
@@ -3,6 +3,7 @@ Pagination utilities for API endpoints
 """
 from typing import Dict, Any, List
 from flask import request
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Query
 
 
@@ -47,6 +48,57 @@ def paginate_query(query: Query, default_per_page: int = 20, max_per_page: int =
     }
 
 
+def paginate_select(stmt: Select, session, default_per_page: int = 20, max_per_page: int = 100) -> Dict[str, Any]:
+    """
+    Paginate a column-projected select() returning result rows.
+    
+    Unlike paginate_query, items are row mappings rather than ORM entities, so only
+    the selected columns are read and no to_dict() call is made per item.
+    
+    Args:
+        stmt: SQLAlchemy select of columns (ordering included)
+        session: Database session to execute with
+        default_per_page: Default items per page
+        max_per_page: Maximum items per page
+    
+    Returns:
+        Dictionary with paginated results and metadata
+    """
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', default_per_page, type=int), max_per_page)
+    
+    if page < 1:
+        page = 1
+    if per_page < 1:
+        per_page = default_per_page
+    
+    total = session.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar()
+    pages = (total + per_page - 1) // per_page  # Ceiling division
+    
+    items = session.execute(
+        stmt.limit(per_page).offset((page - 1) * per_page)
+    ).mappings().all()
+    
+    has_next = page < pages
+    has_prev = page > 1
+    
+    return {
+        'items': items,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_next': has_next,
+            'has_prev': has_prev,
+            'next_page': page + 1 if has_next else None,
+            'prev_page': page - 1 if has_prev else None
+        }
+    }
+
+
 def paginate_list(items: List[Any], default_per_page: int = 20, max_per_page: int = 100) -> Dict[str, Any]:
     """
     Paginate a list of items.
@@ -0,0 +1,194 @@
+"""
+Password hashing with a configurable KDF, cost upgrades and a process pool
+
+PasswordHasher hashes new passwords with PASSWORD_HASH_ALGORITHM ('bcrypt',
+'scrypt' or 'pbkdf2') at the configured cost and verifies hashes of any of
+these, including the werkzeug hashes created before it existed. needs_rehash
+reports hashes made with other parameters so logins can upgrade them.
+
+The KDF runs on a dedicated process pool of PASSWORD_HASH_WORKERS processes,
+so a login burst occupies those processes instead of the request threads' share
+of the interpreter, and review endpoints keep being served. At most
+PASSWORD_HASH_MAX_PENDING hashes wait for the pool; beyond that
+PasswordHasherBusy is raised (503) instead of queueing without bound.
+"""
+import base64
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+import bcrypt
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# bcrypt only reads 72 bytes, so bcrypt hashes are computed over a SHA-256 digest
+BCRYPT_PREFIX = 'bcrypt-sha256'
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already waiting for the pool."""
+
+
+def _bcrypt_input(password: str) -> bytes:
+    return base64.b64encode(hashlib.sha256(password.encode('utf-8')).digest())
+
+
+def _hash(password: str, algorithm: str, cost: int) -> str:
+    """Hash a password (runs in the pool processes)."""
+    if algorithm == 'bcrypt':
+        hashed = bcrypt.hashpw(_bcrypt_input(password), bcrypt.gensalt(rounds=cost))
+        return BCRYPT_PREFIX + hashed.decode('ascii')
+    if algorithm == 'pbkdf2':
+        return generate_password_hash(password, method=f'pbkdf2:sha256:{cost}')
+    if algorithm == 'scrypt':
+        return generate_password_hash(password, method=f'scrypt:{cost}:8:1')
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+def _verify(password_hash: str, password: str) -> bool:
+    """Check a password against a hash of any supported format (runs in the pool processes)."""
+    if password_hash.startswith(BCRYPT_PREFIX):
+        return bcrypt.checkpw(_bcrypt_input(password), password_hash[len(BCRYPT_PREFIX):].encode('ascii'))
+    return check_password_hash(password_hash, password)
+
+
+def hash_parameters(password_hash: str) -> tuple:
+    """
+    Get the algorithm and cost a hash was made with.
+
+    Args:
+        password_hash: Stored password hash
+
+    Returns:
+        Tuple of (algorithm, cost); cost is the bcrypt rounds, PBKDF2 iterations
+        or scrypt N, and None for unrecognized formats
+    """
+    if password_hash.startswith(BCRYPT_PREFIX):
+        # bcrypt-sha256$2b$<rounds>$<salt and hash>
+        return 'bcrypt', int(password_hash[len(BCRYPT_PREFIX):].split('$')[2])
+    method = password_hash.split('$', 1)[0].split(':')
+    try:
+        if method[0] == 'pbkdf2' and len(method) == 3:
+            return 'pbkdf2', int(method[2])
+        if method[0] == 'scrypt' and len(method) == 4:
+            return 'scrypt', int(method[1])
+    except ValueError:
+        pass
+    return method[0], None
+
+
+class PasswordHasher:
+    """
+    Flask extension hashing and verifying passwords.
+
+    Usage:
+        password_hasher.hash(password)
+        password_hasher.verify(stored_hash, password)
+    """
+
+    def __init__(self, app=None):
+        self.algorithm = 'bcrypt'
+        self.costs = {'bcrypt': 12, 'pbkdf2': 600000, 'scrypt': 32768}
+        self.workers = 0
+        self.timeout = 10.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(1)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        """Read the algorithm, costs and pool size from app config."""
+        self.algorithm = app.config.get('PASSWORD_HASH_ALGORITHM', 'bcrypt')
+        if self.algorithm not in self.costs:
+            raise ValueError(f"Unknown password hash algorithm: {self.algorithm}")
+        self.costs = {
+            'bcrypt': app.config.get('PASSWORD_BCRYPT_ROUNDS', 12),
+            'pbkdf2': app.config.get('PASSWORD_PBKDF2_ITERATIONS', 600000),
+            'scrypt': app.config.get('PASSWORD_SCRYPT_N', 32768),
+        }
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10.0)
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        if workers != self.workers:
+            self.shutdown()
+            self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + app.config.get('PASSWORD_HASH_MAX_PENDING', 32))
+        app.extensions['password_hasher'] = self
+
+    @property
+    def cost(self) -> int:
+        """Cost parameter of the configured algorithm."""
+        return self.costs[self.algorithm]
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured algorithm and cost.
+
+        Raises:
+            PasswordHasherBusy: If the pool queue is full or the hash timed out
+        """
+        return self._run(_hash, password, self.algorithm, self.cost)
+
+    def verify(self, password_hash: Optional[str], password: str) -> bool:
+        """
+        Check a password against a stored hash.
+
+        Raises:
+            PasswordHasherBusy: If the pool queue is full or the check timed out
+        """
+        if not password_hash:
+            return False
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a hash was made with a different algorithm or cost than configured."""
+        return hash_parameters(password_hash) != (self.algorithm, self.cost)
+
+    def _run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn in the pool (or inline when PASSWORD_HASH_WORKERS is 0)."""
+        if not self.workers:
+            return fn(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many password operations in progress")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the job finishes, not until the caller gives up
+        # waiting, so timed-out jobs still count against PASSWORD_HASH_MAX_PENDING
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Drop the job if it has not started yet
+            future.cancel()
+            raise PasswordHasherBusy("Password operation timed out")
+        except BrokenProcessPool:
+            # A pool process died; start a fresh pool on the next call
+            self.shutdown()
+            raise
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use so every server worker process gets its own pool
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Forking a threaded server process is unsafe
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info("Started password hashing pool with %d processes", self.workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the pool processes."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,173 @@
+"""
+Per-user context: the user row, preferences and owned deck ids
+
+Most endpoints need the same few facts about the authenticated user: their
+preferences (queue limits, timezone) and which decks they own. get_user_context
+loads them in one go and caches the result twice: on flask.g for the rest of the
+request, and in a per-app, process-local store for USER_CONTEXT_CACHE_TTL seconds.
+
+Process-level entries are dropped when a commit touches the user's profile,
+preferences or decks, and are also keyed by the response cache version counters
+of those scopes, so commits made by other workers invalidate them when the
+response cache backend is shared. Ownership misses are always re-checked in the
+database, so a deck created elsewhere is never rejected because of a stale entry.
+"""
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+from flask import current_app, g, has_request_context
+from app.utils.cache import MemoryCacheBackend
+
+CONTEXT_SCOPES = ('profile', 'preferences', 'decks')
+
+
+class UserContext:
+    """Snapshot of a user's row, preferences and owned deck ids."""
+
+    __slots__ = ('user_id', 'user', 'preferences', 'deck_ids')
+
+    def __init__(self, user_id: int, user: Dict[str, Any], preferences: Optional[Dict[str, Any]],
+                 deck_ids: FrozenSet[int]):
+        self.user_id = user_id
+        self.user = user
+        self.preferences = preferences
+        self.deck_ids = deck_ids
+
+    def preference(self, name: str, default: Any) -> Any:
+        """Get a preference value, or default if the user has no preferences row."""
+        if self.preferences is None:
+            return default
+        return self.preferences.get(name, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """User data as returned by User.to_dict(include_sensitive=True)."""
+        return dict(self.user, preferences=self.preferences)
+
+
+class _ContextStore:
+    """Process-local contexts of one app, with a generation counter per user."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.entries = MemoryCacheBackend()
+        # Bumped on every eviction so a context loaded before a commit is not stored after it
+        self.generations: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def generation(self, user_id: int) -> int:
+        with self.lock:
+            return self.generations.get(user_id, 0)
+
+    def evict(self, user_id: int) -> None:
+        with self.lock:
+            self.generations[user_id] = self.generations.get(user_id, 0) + 1
+        self.entries.delete(f'user-context:{user_id}')
+
+
+def init_user_contexts(app) -> None:
+    """
+    Create the user context store of an app.
+
+    Args:
+        app: Flask application
+    """
+    app.extensions['user_contexts'] = _ContextStore(app.config.get('USER_CONTEXT_CACHE_TTL', 30))
+
+    @app.teardown_request
+    def drop_request_contexts(exc):
+        # g outlives the request when the app context was pushed by the caller
+        g.pop('user_contexts', None)
+
+
+def _versions(user_id: int) -> tuple:
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        return ()
+    return cache.versions(user_id, CONTEXT_SCOPES)
+
+
+def _load(user_id: int) -> Optional[UserContext]:
+    """Load a user's context from the database."""
+    from app import db
+    from app.models.deck import Deck
+    from app.models.user import User
+    from app.models.user_preferences import UserPreferences
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    preferences = UserPreferences.query.filter_by(user_id=user_id).first()
+    deck_ids = db.session.execute(db.select(Deck.id).where(Deck.user_id == user_id)).scalars()
+    return UserContext(
+        user_id,
+        user.to_dict(),
+        preferences.to_dict() if preferences else None,
+        frozenset(deck_ids)
+    )
+
+
+def get_user_context(user_id: int) -> Optional[UserContext]:
+    """
+    Get a user's context, from the request or process cache when possible.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        UserContext, or None if the user does not exist
+    """
+    if has_request_context():
+        contexts = g.setdefault('user_contexts', {})
+        if user_id in contexts:
+            return contexts[user_id]
+
+    store: Optional[_ContextStore] = current_app.extensions.get('user_contexts')
+    key = f'user-context:{user_id}'
+    versions = _versions(user_id)
+    entry = store.entries.get(key) if store and store.ttl else None
+    if entry is not None and entry[0] == versions:
+        context = entry[1]
+    else:
+        generation = store.generation(user_id) if store else 0
+        context = _load(user_id)
+        if context is not None and store and store.ttl and generation == store.generation(user_id):
+            store.entries.set(key, (versions, context), store.ttl)
+
+    if has_request_context() and context is not None:
+        g.user_contexts[user_id] = context
+    return context
+
+
+def owns_deck(user_id: int, deck_id: int) -> bool:
+    """
+    Check that a deck belongs to a user.
+
+    Args:
+        user_id: User ID
+        deck_id: Deck ID
+
+    Returns:
+        True if the deck exists and is owned by the user
+    """
+    from app import db
+    from app.models.deck import Deck
+
+    context = get_user_context(user_id)
+    if context is not None and deck_id in context.deck_ids:
+        return True
+    # Not in the cached set: the deck may have been created since it was loaded
+    owned = db.session.execute(
+        db.select(Deck.id).where(Deck.id == deck_id, Deck.user_id == user_id)
+    ).first() is not None
+    if owned:
+        evict_user_contexts([user_id])
+    return owned
+
+
+def evict_user_contexts(user_ids: Iterable[int]) -> None:
+    """Drop the cached contexts of the given users (called when their data commits)."""
+    store: Optional[_ContextStore] = current_app.extensions.get('user_contexts')
+    for user_id in user_ids:
+        if store is not None:
+            store.evict(user_id)
+        if has_request_context():
+            g.get('user_contexts', {}).pop(user_id, None)
@@ -0,0 +1,181 @@
+"""
+Benchmark: GET /api/analytics/overview for a user with two years of history.
+
+Seeds a SQLite file with one user who reviewed every day for --days days
+(--reviews-per-day reviews over --cards cards, one finished session per day,
+and the card_states rows those reviews leave behind), then times the overview endpoint with the response cache disabled, and
+AnalyticsService.get_overview next to the sequential implementation the
+endpoint used before (four stats queries, loading today's sessions and reviews
+to sum them in Python, all review dates) on the same data. Exits with status 1
+when the endpoint's p95 exceeds the latency target, so it can gate CI.
+
+Usage:
+    python -m benchmarks.bench_analytics [--days 730] [--cards 500]
+        [--reviews-per-day 25] [--requests 50] [--target-ms 100]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(args) -> int:
+    """Create the user and their history; return the user id."""
+    from app import db
+    from app.models.user import User
+    from app.models.deck import Deck
+    from app.models.card import Card
+    from app.models.card_review import CardReview
+    from app.models.card_state import CardState
+    from app.models.study_session import StudySession
+
+    rng = random.Random(42)
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    deck = Deck(title='History', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    db.session.execute(db.insert(Card), [
+        {'deck_id': deck.id, 'front_content': f'Q{n}', 'back_content': f'A{n}'} for n in range(args.cards)
+    ])
+    card_ids = db.session.execute(db.select(Card.id).where(Card.deck_id == deck.id)).scalars().all()
+
+    now = datetime.utcnow()
+    reviews, sessions = [], []
+    for days_ago in range(args.days):
+        day = now - timedelta(days=days_ago)
+        start = day.replace(hour=8, minute=0, second=0, microsecond=0)
+        sessions.append({'user_id': user.id, 'deck_id': deck.id, 'start_time': start,
+                         'end_time': start + timedelta(minutes=rng.randint(5, 40)),
+                         'cards_studied': args.reviews_per_day, 'correct_count': 0})
+        for card_id in rng.sample(card_ids, min(args.reviews_per_day, len(card_ids))):
+            reviewed_at = min(start + timedelta(minutes=rng.randint(0, 600)), now)
+            reviews.append({'card_id': card_id, 'user_id': user.id, 'quality': rng.randint(0, 5),
+                            'ease_factor': 2.5, 'interval': 1, 'repetitions': 1,
+                            'reviewed_at': reviewed_at, 'next_review': reviewed_at + timedelta(days=rng.randint(1, 30))})
+    # Scheduling state after each card's latest review, as the review flow keeps it
+    latest = {}
+    for review in reviews:
+        if review['card_id'] not in latest or review['reviewed_at'] > latest[review['card_id']]['reviewed_at']:
+            latest[review['card_id']] = review
+    states = [{'card_id': card_id, 'user_id': user.id, 'ease_factor': review['ease_factor'],
+               'interval': review['interval'], 'repetitions': review['repetitions'],
+               'next_review': review['next_review'], 'last_reviewed_at': review['reviewed_at'], 'version': 1}
+              for card_id, review in latest.items()]
+    db.session.execute(db.insert(StudySession), sessions)
+    db.session.execute(db.insert(CardReview), reviews)
+    db.session.execute(db.insert(CardState), states)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    return user.id
+
+
+def legacy_overview(user_id: int) -> dict:
+    """The overview as computed before the query plan rewrite."""
+    from app import db
+    from app.models.card import Card
+    from app.models.card_review import CardReview
+    from app.models.deck import Deck
+    from app.models.study_session import StudySession
+    from app.services.analytics import current_streak
+    from app.services.review_archive import ReviewArchiveService
+    from app.services.spaced_repetition import SpacedRepetitionService
+
+    service = SpacedRepetitionService(db.session)
+    today = datetime.utcnow().date()
+    cards = Card.query.join(Deck).filter(Deck.user_id == user_id)
+    total_cards = cards.count()
+    due_cards = len(service.get_due_cards(user_id))
+    reviews_today = CardReview.query.join(Card).join(Deck).filter(
+        Deck.user_id == user_id, CardReview.user_id == user_id,
+        db.func.date(CardReview.reviewed_at) == today
+    )
+    reviewed_today = reviews_today.count()
+    with_reviews = cards.join(CardReview, Card.id == CardReview.card_id).filter(
+        CardReview.user_id == user_id
+    ).distinct().count()
+    in_today = (StudySession.user_id == user_id, db.func.date(StudySession.start_time) == today)
+    sessions_today = StudySession.query.filter(*in_today).count()
+    total_seconds = sum(
+        session.get_duration_seconds() or 0
+        for session in StudySession.query.filter(*in_today, StudySession.end_time.isnot(None)).all()
+    )
+    loaded = reviews_today.all()
+    accuracy = sum(1 for r in loaded if r.quality >= 3) / len(loaded) * 100 if loaded else 0
+    streak = current_streak(ReviewArchiveService(db.session).get_review_dates(user_id), today)
+    return {
+        'total_cards': total_cards, 'due_cards': due_cards, 'new_cards': total_cards - with_reviews,
+        'reviewed_today': reviewed_today, 'sessions_today': sessions_today,
+        'study_time_today_minutes': total_seconds // 60,
+        'average_accuracy_today': round(accuracy, 2), 'streak_days': streak
+    }
+
+
+def timed(fn, runs: int) -> dict:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {'p50': statistics.median(latencies), 'p95': latencies[max(int(len(latencies) * 0.95) - 1, 0)]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--cards', type=int, default=500)
+    parser.add_argument('--reviews-per-day', type=int, default=25)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--target-ms', type=float, default=100.0, help='Maximum p95 of the overview endpoint')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_analytics_')
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        RESPONSE_CACHE_BACKEND='null',
+        JWT_SECRET_KEY='bench-jwt-secret-key-for-local-runs-only'
+    )
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.services.analytics import AnalyticsService
+
+    app = create_app('production')
+    try:
+        with app.app_context():
+            db.create_all()
+            user_id = seed(args)
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+            client = app.test_client()
+
+            def endpoint():
+                response = client.get('/api/analytics/overview', headers=headers)
+                assert response.status_code == 200
+
+            service = AnalyticsService(db.session)
+            current = timed(endpoint, args.requests)
+            folded = timed(lambda: service.get_overview(user_id), args.requests)
+            legacy = timed(lambda: legacy_overview(user_id), args.requests)
+            assert client.get('/api/analytics/overview', headers=headers).get_json() == legacy_overview(user_id)
+
+        print(f"{args.days} days of history, {args.days * args.reviews_per_day} reviews, "
+              f"{args.cards} cards, {args.requests} requests")
+        for label, result in (('overview endpoint', current), ('AnalyticsService', folded),
+                              ('previous implementation', legacy)):
+            print(f"  {label:<26} p50 {result['p50']:7.1f} ms   p95 {result['p95']:7.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if current['p95'] > args.target_ms:
+        print(f"over target: p95 {current['p95']:.1f} ms > {args.target_ms:.1f} ms")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: top-k due card retrieval as the collection grows.
+
+For each --sizes value, seeds a fresh SQLite file with one user owning that many
+cards (--reviews-per-card reviews each, a card_states row per reviewed card,
+--new-share of the cards never reviewed, and another user of the same size),
+then times SpacedRepetitionService.get_due_cards with a fixed --limit next to
+the implementation it replaced (group all of the user's reviews per card, sort
+every due card by a CASE expression, then cut to the limit), and with the
+in-process due index (app.utils.due_index) loaded. The index-ordered scan on
+card_states should stay flat while the previous query grows with the
+collection; the due index only loads the selected cards.
+
+Usage:
+    python -m benchmarks.bench_due_cards [--sizes 1000 5000 20000]
+        [--limit 50] [--reviews-per-card 3] [--new-share 0.1] [--runs 30]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(args, size: int) -> int:
+    """Create two users with size cards each; return the first user's id."""
+    from app import db
+    from app.models.user import User
+    from app.models.deck import Deck
+    from app.models.card import Card
+    from app.models.card_review import CardReview
+    from app.models.card_state import CardState
+
+    rng = random.Random(size)
+    now = datetime.utcnow()
+    user_ids = []
+    for n in range(2):
+        user = User(username=f'bench{n}', email=f'bench{n}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        deck = Deck(title='Collection', user_id=user.id)
+        db.session.add(deck)
+        db.session.flush()
+        db.session.execute(db.insert(Card), [
+            {'deck_id': deck.id, 'front_content': f'Q{i}', 'back_content': f'A{i}'} for i in range(size)
+        ])
+        card_ids = db.session.execute(db.select(Card.id).where(Card.deck_id == deck.id)).scalars().all()
+
+        reviews, states = [], []
+        for card_id in card_ids[int(size * args.new_share):]:
+            reviewed_at = now - timedelta(days=rng.randint(1, 60))
+            for r in range(args.reviews_per_card):
+                next_review = reviewed_at + timedelta(days=rng.randint(-20, 40))
+                reviews.append({'card_id': card_id, 'user_id': user.id, 'quality': 4,
+                                'ease_factor': 2.5, 'interval': 1, 'repetitions': r + 1,
+                                'reviewed_at': reviewed_at - timedelta(days=r), 'next_review': next_review})
+            states.append({'card_id': card_id, 'user_id': user.id, 'repetitions': args.reviews_per_card,
+                           'next_review': max(r['next_review'] for r in reviews[-args.reviews_per_card:]),
+                           'last_reviewed_at': reviewed_at, 'version': 1})
+        db.session.execute(db.insert(CardReview), reviews)
+        db.session.execute(db.insert(CardState), states)
+        user_ids.append(user.id)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    return user_ids[0]
+
+
+def legacy_due_cards(user_id: int, limit: int) -> list:
+    """get_due_cards as implemented before the card_states scan."""
+    from app import db
+    from app.models.card import Card
+    from app.models.card_review import CardReview
+    from app.models.deck import Deck
+
+    latest = db.session.query(
+        CardReview.card_id,
+        db.func.max(CardReview.next_review).label('latest_next_review')
+    ).filter(CardReview.user_id == user_id).group_by(CardReview.card_id).subquery()
+    now = datetime.utcnow()
+    return Card.query.join(Deck).filter(Deck.user_id == user_id).outerjoin(
+        latest, Card.id == latest.c.card_id
+    ).filter(
+        db.or_(latest.c.latest_next_review <= now, latest.c.latest_next_review.is_(None))
+    ).order_by(
+        db.case(
+            (db.and_(latest.c.latest_next_review.isnot(None), latest.c.latest_next_review < now),
+             now - latest.c.latest_next_review),
+            else_=timedelta(days=0)
+        ).desc(),
+        latest.c.latest_next_review.asc().nulls_last()
+    ).limit(limit).all()
+
+
+def timed(fn, runs: int) -> dict:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {'p50': statistics.median(latencies), 'p95': latencies[max(int(len(latencies) * 0.95) - 1, 0)]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--reviews-per-card', type=int, default=3)
+    parser.add_argument('--new-share', type=float, default=0.1)
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_due_cards_')
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        # The due index is only used with a cache backend shared between processes
+        RESPONSE_CACHE_BACKEND='sqlite',
+        RESPONSE_CACHE_PATH=os.path.join(workdir, 'cache.sqlite3'),
+        JWT_SECRET_KEY='bench-jwt-secret-key-for-local-runs-only'
+    )
+
+    from app import create_app, db
+    from app.services.spaced_repetition import SpacedRepetitionService
+    from app.utils.due_index import get_due_index
+
+    app = create_app('production')
+    print(f"get_due_cards(limit={args.limit}), {args.reviews_per_card} reviews per reviewed card")
+    try:
+        with app.app_context():
+            for size in args.sizes:
+                db.drop_all()
+                db.create_all()
+                user_id = seed(args, size)
+                service = SpacedRepetitionService(db.session)
+                store = app.extensions['due_index']
+                budget, store.max_bytes = store.max_bytes, 0
+                results = {
+                    'card_states scan': timed(lambda: service.get_due_cards(user_id, limit=args.limit), args.runs),
+                    'previous query': timed(lambda: legacy_due_cards(user_id, args.limit), args.runs),
+                }
+                store.max_bytes = budget
+                started = time.perf_counter()
+                get_due_index(user_id)
+                load_ms = (time.perf_counter() - started) * 1000
+                results['due index'] = timed(lambda: service.get_due_cards(user_id, limit=args.limit), args.runs)
+                db.session.remove()
+                print(f"  {size} cards (index load {load_ms:.1f} ms, "
+                      f"{store.sizes[user_id] / 1024:.0f} KiB)")
+                for label, result in results.items():
+                    print(f"    {label:<18} p50 {result['p50']:7.2f} ms   p95 {result['p95']:7.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
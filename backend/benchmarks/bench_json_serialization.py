@@ -0,0 +1,98 @@
+"""
+Benchmark: deck-with-cards serialization, to_dict + stdlib JSON vs rows + fast JSON.
+
+Builds a deck with 5,000 cards in an in-memory SQLite database and times the
+full payload construction and encoding for both paths.
+
+Usage:
+    python -m benchmarks.bench_json_serialization [--cards 5000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from flask.json.provider import DefaultJSONProvider
+from app import create_app, db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card, CardType
+from app.services.card_projection import get_deck_card_rows
+from app.utils.json_provider import FastJSONProvider, orjson
+
+
+def seed(num_cards: int) -> int:
+    """Create a user and a deck with num_cards cards; return the deck id."""
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+
+    deck = Deck(title='Benchmark Deck', user_id=user.id, tags=['bench'])
+    db.session.add(deck)
+    db.session.flush()
+
+    db.session.add_all([
+        Card(
+            deck_id=deck.id,
+            front_content=f'Question {i} ' + 'lorem ipsum ' * 20,
+            back_content=f'Answer {i} ' + 'dolor sit amet ' * 20,
+            card_type=CardType.BASIC,
+            media_attachments=[{'url': f'/media/{i}.png', 'type': 'image'}],
+            card_data={'hint': f'hint {i}'}
+        )
+        for i in range(num_cards)
+    ])
+    db.session.commit()
+    return deck.id
+
+
+def time_it(fn, repeat: int) -> list:
+    """Run fn repeat times and return the timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cards', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        deck_id = seed(args.cards)
+        stdlib = DefaultJSONProvider(app)
+        fast = FastJSONProvider(app)
+
+        def baseline():
+            deck = db.session.get(Deck, deck_id)
+            return stdlib.response(deck.to_dict(include_cards=True)).get_data()
+
+        def fast_path():
+            deck = db.session.get(Deck, deck_id)
+            data = deck.to_dict()
+            data['cards'] = get_deck_card_rows(deck_id)
+            return fast.response(data).get_data()
+
+        with app.test_request_context():
+            payload = [card.to_dict() for card in Card.query.filter_by(deck_id=deck_id)]
+            results = {
+                'to_dict + stdlib json (end to end)': time_it(baseline, args.repeat),
+                'rows + fast json (end to end)': time_it(fast_path, args.repeat),
+                'stdlib json (encode only)': time_it(lambda: stdlib.dumps(payload), args.repeat),
+                'fast json (encode only)': time_it(lambda: fast.dumps(payload), args.repeat),
+            }
+            assert stdlib.loads(baseline()) == stdlib.loads(fast_path())
+
+        db.drop_all()
+
+    print(f"{args.cards} cards, {args.repeat} runs, orjson {'available' if orjson else 'missing'}")
+    for name, timings in results.items():
+        print(f"  {name:<40} median {statistics.median(timings):9.1f} ms   best {min(timings):9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: logins per second, and review endpoint latency during a login burst.
+
+Runs a burst of concurrent logins through the test client while another
+thread keeps requesting GET /api/reviews/stats, once with password hashing in
+the request threads (PASSWORD_HASH_WORKERS=0) and once on the process pool.
+Reports login throughput and latency, and the stats endpoint's latency during
+the burst.
+
+Usage:
+    python -m benchmarks.bench_logins [--logins 200] [--concurrency 16]
+        [--rounds 12] [--pool-workers 2]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * fraction) - 1, 0)]
+
+
+def burst(app, num_logins: int, concurrency: int, probe_headers: dict) -> dict:
+    """Run the login burst with a concurrent stats probe; return timings."""
+    client = app.test_client()
+    probe_latencies = []
+    done = threading.Event()
+
+    def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            assert client.get('/api/reviews/stats', headers=probe_headers).status_code == 200
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+
+    def login(_):
+        start = time.perf_counter()
+        response = client.post('/api/auth/login', json={'username': 'bench', 'password': 'bench-password'})
+        assert response.status_code == 200, response.get_json()
+        return (time.perf_counter() - start) * 1000
+
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        login_latencies = list(executor.map(login, range(num_logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    probe_thread.join()
+
+    return {
+        'logins_per_second': num_logins / elapsed,
+        'login_p50': statistics.median(login_latencies),
+        'probe_p50': statistics.median(probe_latencies),
+        'probe_p95': percentile(probe_latencies, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost')
+    parser.add_argument('--pool-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_logins_')
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        RESPONSE_CACHE_BACKEND='null',
+        JWT_SECRET_KEY='bench-jwt-secret-key-for-local-runs-only'
+    )
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db, password_hasher
+    from app.models.user import User
+
+    app = create_app('production')
+    app.config['PASSWORD_BCRYPT_ROUNDS'] = args.rounds
+    try:
+        with app.app_context():
+            db.create_all()
+            password_hasher.init_app(app)
+            user = User(username='bench', email='bench@example.com')
+            user.set_password('bench-password')
+            db.session.add(user)
+            db.session.commit()
+            probe_headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+        print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt cost {args.rounds}")
+        for label, workers in (('request threads', 0), (f'process pool ({args.pool_workers})', args.pool_workers)):
+            app.config['PASSWORD_HASH_WORKERS'] = workers
+            password_hasher.init_app(app)
+            with app.app_context():
+                # Start the pool processes before timing
+                password_hasher.verify(password_hasher.hash('warm-up'), 'warm-up')
+            result = burst(app, args.logins, args.concurrency, probe_headers)
+            print(f"  {label:<22} {result['logins_per_second']:7.1f} logins/s   "
+                  f"login p50 {result['login_p50']:7.1f} ms   "
+                  f"stats p50 {result['probe_p50']:6.1f} ms   p95 {result['probe_p95']:6.1f} ms")
+    finally:
+        password_hasher.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
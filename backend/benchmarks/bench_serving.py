@@ -0,0 +1,186 @@
+"""
+Benchmark: study hot path throughput, development server vs gunicorn.
+
+Seeds a database with users, decks and cards, starts the app under the
+Werkzeug development server used by `python run.py` (threaded, without the
+reloader) and under gunicorn with gunicorn.conf.py, and drives GET
+/api/study/queue and POST /api/study/review with concurrent clients.
+
+The response cache is disabled so every request reaches the database. Set
+DATABASE_URL to a PostgreSQL database for production-like numbers; the default
+SQLite file serializes writes, which caps review throughput for every server.
+
+Usage:
+    python -m benchmarks.bench_serving [--requests 500] [--concurrency 32]
+        [--users 50] [--cards 100] [--workers 4] [--threads 8]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(num_users: int, num_cards: int) -> list:
+    """Create users with one deck of num_cards cards each; return (token, card ids) per user."""
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models.user import User
+    from app.models.deck import Deck
+    from app.models.card import Card
+
+    app = create_app('production')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = []
+        for i in range(num_users):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            deck = Deck(title=f'Deck {i}', user_id=user.id)
+            db.session.add(deck)
+            db.session.flush()
+            cards = [
+                Card(deck_id=deck.id, front_content=f'Question {n}', back_content=f'Answer {n}')
+                for n in range(num_cards)
+            ]
+            db.session.add_all(cards)
+            db.session.flush()
+            users.append((create_access_token(identity=str(user.id)), [card.id for card in cards]))
+        db.session.commit()
+        db.engine.dispose()
+    return users
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind: str, port: int, args) -> subprocess.Popen:
+    """Start the app under the given server and wait until it accepts requests."""
+    if kind == 'dev':
+        command = [
+            sys.executable, '-c',
+            f"from run import app; app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)"
+        ]
+        env = dict(os.environ)
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app']
+        env = dict(
+            os.environ,
+            GUNICORN_BIND=f'127.0.0.1:{port}',
+            WEB_CONCURRENCY=str(args.workers),
+            GUNICORN_THREADS=str(args.threads),
+            GUNICORN_LOG_LEVEL='warning'
+        )
+    process = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+def load(port: int, users: list, endpoint: str, num_requests: int, concurrency: int) -> dict:
+    """Send num_requests requests with concurrency clients; return throughput and latencies."""
+    def one(index: int):
+        token, card_ids = users[index % len(users)]
+        if endpoint == 'queue':
+            request = urllib.request.Request(f'http://127.0.0.1:{port}/api/study/queue')
+        else:
+            body = json.dumps({'card_id': random.choice(card_ids), 'quality': random.randint(0, 5)})
+            request = urllib.request.Request(
+                f'http://127.0.0.1:{port}/api/study/review', data=body.encode(),
+                headers={'Content-Type': 'application/json'}
+            )
+        request.add_header('Authorization', f'Bearer {token}')
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                ok = response.status < 400
+        except OSError:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(num_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'rps': num_requests / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'errors': sum(1 for _, ok in results if not ok)
+    }
+
+
+def run(args):
+    """Seed the database, then load each server in turn and print the results."""
+    users = seed(args.users, args.cards)
+    print(f"{args.users} users x {args.cards} cards, {args.requests} requests per endpoint, "
+          f"{args.concurrency} clients, gunicorn {args.workers} workers x {args.threads} threads")
+
+    for kind, label in (('dev', 'werkzeug dev server'), ('gunicorn', 'gunicorn gthread')):
+        port = free_port()
+        process = start_server(kind, port, args)
+        try:
+            for endpoint in ('queue', 'review'):
+                result = load(port, users, endpoint, args.requests, args.concurrency)
+                print(f"  {label:<20} {endpoint:<7} {result['rps']:8.1f} req/s   "
+                      f"p50 {result['p50']:7.1f} ms   p95 {result['p95']:7.1f} ms   errors {result['errors']}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and server')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--users', type=int, default=50, help='Users to spread requests over (rate limits)')
+    parser.add_argument('--cards', type=int, default=100, help='Cards per user')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_serving_')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.update(
+        FLASK_ENV='production',
+        RESPONSE_CACHE_BACKEND='null',
+        SECRET_KEY='bench-secret-key-for-local-runs-only',
+        JWT_SECRET_KEY='bench-jwt-secret-key-for-local-runs-only'
+    )
+    sys.path.insert(0, BACKEND_DIR)
+
+    try:
+        run(args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: worker startup, from interpreter start to the first /api/health response.
+
+Each run is a fresh `python -X importtime` process that creates the app and
+serves /api/health through the test client. Reports the median wall time and
+import time, the packages with the largest import cost, and the same boot with
+Flask-Migrate initialized eagerly (as create_app did before `flask db` became
+lazy) for comparison. Exits with status 1 when the median boot time exceeds
+the budget, so it can gate CI.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1500] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT = (
+    "from app import create_app\n"
+    "app = create_app('testing')\n"
+    "{extra}"
+    "assert app.test_client().get('/api/health').status_code == 200\n"
+)
+
+EAGER_MIGRATE = "from flask_migrate import Migrate\nfrom app import db\nMigrate(app, db)\n"
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse -X importtime output into (module, self us, cumulative us) tuples."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace('import time:', '|', 1).split('|'))
+        modules.append((name, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def boot_once(extra: str = '') -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Boot the app in a fresh interpreter; return wall time in ms and import timings."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT.format(extra=extra)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return (time.perf_counter() - start) * 1000, parse_importtime(result.stderr)
+
+
+def measure(runs: int, extra: str = '') -> Dict[str, object]:
+    """Boot runs times; return median wall and import times and per-package import cost."""
+    walls, imports = [], []
+    per_package: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(runs):
+        wall, modules = boot_once(extra)
+        walls.append(wall)
+        imports.append(sum(self_us for _, self_us, _ in modules) / 1000)
+        totals: Dict[str, int] = defaultdict(int)
+        for name, self_us, _ in modules:
+            totals[name.split('.')[0]] += self_us
+        for package, total in totals.items():
+            per_package[package].append(total)
+    return {
+        'wall_ms': statistics.median(walls),
+        'import_ms': statistics.median(imports),
+        'packages': {package: statistics.median(values) / 1000 for package, values in per_package.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500.0,
+                        help='Maximum median time from interpreter start to first response')
+    parser.add_argument('--top', type=int, default=10, help='Packages to list by import cost')
+    args = parser.parse_args()
+
+    current = measure(args.runs)
+    eager = measure(args.runs, EAGER_MIGRATE)
+
+    print(f"startup to first /api/health response, median of {args.runs} runs")
+    print(f"  {'current':<28} wall {current['wall_ms']:7.1f} ms   imports {current['import_ms']:7.1f} ms")
+    print(f"  {'with eager Flask-Migrate':<28} wall {eager['wall_ms']:7.1f} ms   imports {eager['import_ms']:7.1f} ms")
+    print(f"top {args.top} packages by import time (current)")
+    ranked = sorted(current['packages'].items(), key=lambda item: item[1], reverse=True)
+    for package, ms in ranked[:args.top]:
+        print(f"  {package:<28} {ms:7.1f} ms")
+
+    if current['wall_ms'] > args.budget_ms:
+        print(f"over budget: {current['wall_ms']:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
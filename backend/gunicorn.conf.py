@@ -0,0 +1,56 @@
+"""
+Gunicorn configuration for production serving
+
+Usage:
+    gunicorn -c gunicorn.conf.py run:app
+
+Workers use the gthread worker class: each worker process serves requests from
+a bounded pool of threads, so requests waiting on the database overlap without
+an async rewrite of the (synchronous) SQLAlchemy data layer. Keep
+GUNICORN_THREADS at or below DB_POOL_SIZE + DB_MAX_OVERFLOW, and
+WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the database's
+max_connections.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Processes: one per core plus headroom for requests blocked on I/O
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 9)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Requests above the statement timeouts are cut by the database first
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+# The app is created in each worker, so engines and pools are never shared across a fork
+preload_app = False
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """
+    Refuse to run several workers on the per-process response cache.
+
+    Cache invalidation, read-your-writes stickiness, the active-session and
+    user-context caches and the due index rely on the cache backend to see
+    every worker's writes.
+    """
+    from config import config
+
+    app_config = config.get(os.environ.get('FLASK_ENV', 'default'), config['default'])
+    if server.cfg.workers > 1 and app_config.RESPONSE_CACHE_BACKEND == 'memory':
+        raise RuntimeError(
+            f"RESPONSE_CACHE_BACKEND='memory' is per process and cannot serve {server.cfg.workers} "
+            "workers; use 'sqlite' (or 'null'), or set WEB_CONCURRENCY=1"
+        )
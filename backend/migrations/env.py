@@ -20,6 +20,13 @@ from app import db
 from app.models import User, UserPreferences, Deck, Card, CardReview, StudySession
 target_metadata = db.metadata
 
+# Use the database configured on the Flask app (flask db ...) instead of alembic.ini
+from flask import current_app
+config.set_main_option(
+    'sqlalchemy.url',
+    current_app.config['SQLALCHEMY_DATABASE_URI'].replace('%', '%%')
+)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -0,0 +1,38 @@
+"""Add updated_at to decks and cards
+
+Revision ID: 8b7e5d2c1a04
+Revises: 3f1c2a9d4b10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b7e5d2c1a04'
+down_revision = '3f1c2a9d4b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows start out with their creation time
+    with op.batch_alter_table('decks') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE decks SET updated_at = created_at')
+    with op.batch_alter_table('decks') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    with op.batch_alter_table('cards') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE cards SET updated_at = created_at')
+    with op.batch_alter_table('cards') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('cards') as batch_op:
+        batch_op.drop_column('updated_at')
+    with op.batch_alter_table('decks') as batch_op:
+        batch_op.drop_column('updated_at')
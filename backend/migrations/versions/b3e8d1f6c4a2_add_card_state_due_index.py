@@ -0,0 +1,27 @@
+"""Add idx_card_state_due for index-ordered due card retrieval
+
+Revision ID: b3e8d1f6c4a2
+Revises: a9c2e5f8b3d7
+Create Date: 2026-10-19 14:00:00.000000
+
+- idx_card_state_due (user_id, next_review, card_id): due cards of a user, most
+  overdue first, read as an ordered range scan that stops after the queue limit.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d1f6c4a2'
+down_revision = 'a9c2e5f8b3d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_card_state_due', 'card_states', ['user_id', 'next_review', 'card_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_card_state_due', table_name='card_states')
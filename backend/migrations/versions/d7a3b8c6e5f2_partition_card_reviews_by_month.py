@@ -0,0 +1,120 @@
+"""Partition card_reviews by month on reviewed_at (PostgreSQL)
+
+Revision ID: d7a3b8c6e5f2
+Revises: c4d9e1f7a2b3
+Create Date: 2026-10-19 11:30:00.000000
+
+Recreates card_reviews as a declaratively range-partitioned table with one
+partition per month (named card_reviews_yYYYYmMM) plus a default partition.
+Partitions cover existing data and the next three months; later months are
+created by `flask reviews create-partitions`. The primary key becomes
+(id, reviewed_at) because PostgreSQL requires the partition key in unique
+constraints; ids still come from the same sequence.
+
+Other databases keep the plain table and this revision is a no-op for them.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3b8c6e5f2'
+down_revision = 'c4d9e1f7a2b3'
+branch_labels = None
+depends_on = None
+
+
+# (name, columns) of the card_reviews indexes created by the initial schema
+INDEXES = (
+    ('idx_review_deck_next', ['card_id', 'next_review']),
+    ('idx_review_next_review', ['user_id', 'next_review']),
+    ('idx_review_user_card', ['user_id', 'card_id']),
+    ('ix_card_reviews_card_id', ['card_id']),
+    ('ix_card_reviews_next_review', ['next_review']),
+    ('ix_card_reviews_reviewed_at', ['reviewed_at']),
+    ('ix_card_reviews_user_id', ['user_id']),
+)
+
+COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('card_reviews_id_seq'),
+    card_id INTEGER NOT NULL REFERENCES cards (id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    quality INTEGER NOT NULL,
+    reviewed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    ease_factor DOUBLE PRECISION NOT NULL,
+    "interval" INTEGER NOT NULL,
+    repetitions INTEGER NOT NULL,
+    next_review TIMESTAMP WITHOUT TIME ZONE,
+"""
+
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    month_start date := date_trunc(
+        'month', COALESCE((SELECT min(reviewed_at) FROM card_reviews_unpartitioned), now())
+    )::date;
+    last_month date := (date_trunc('month', now()) + interval '3 months')::date;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF card_reviews FOR VALUES FROM (%L) TO (%L)',
+            'card_reviews_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start,
+            (month_start + interval '1 month')::date
+        );
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END $$
+"""
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _move_aside() -> None:
+    """Rename the current table, its primary key and indexes out of the way."""
+    op.execute('ALTER TABLE card_reviews RENAME TO card_reviews_unpartitioned')
+    op.execute(
+        'ALTER TABLE card_reviews_unpartitioned '
+        'RENAME CONSTRAINT card_reviews_pkey TO card_reviews_unpartitioned_pkey'
+    )
+    for name, _ in INDEXES:
+        op.execute(f'ALTER INDEX {name} RENAME TO {name}_unpartitioned')
+
+
+def _copy_and_drop_old() -> None:
+    """Copy rows into the new card_reviews and drop the renamed table."""
+    op.execute('INSERT INTO card_reviews SELECT * FROM card_reviews_unpartitioned')
+    # The sequence is owned by the old id column and would be dropped with it
+    op.execute('ALTER SEQUENCE card_reviews_id_seq OWNED BY card_reviews.id')
+    op.execute('DROP TABLE card_reviews_unpartitioned')
+    for name, columns in INDEXES:
+        op.create_index(name, 'card_reviews', columns, unique=False)
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    _move_aside()
+    op.execute(
+        f'CREATE TABLE card_reviews ({COLUMNS}'
+        '    CONSTRAINT card_reviews_pkey PRIMARY KEY (id, reviewed_at)\n'
+        ') PARTITION BY RANGE (reviewed_at)'
+    )
+    op.execute('CREATE TABLE card_reviews_default PARTITION OF card_reviews DEFAULT')
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    _copy_and_drop_old()
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    _move_aside()
+    op.execute(
+        f'CREATE TABLE card_reviews ({COLUMNS}'
+        '    CONSTRAINT card_reviews_pkey PRIMARY KEY (id)\n'
+        ')'
+    )
+    _copy_and_drop_old()  # Dropping the partitioned table drops its partitions
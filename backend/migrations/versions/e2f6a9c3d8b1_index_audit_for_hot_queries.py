@@ -0,0 +1,58 @@
+"""Index audit: covering, expression and partial indexes for hot queries
+
+Revision ID: e2f6a9c3d8b1
+Revises: d7a3b8c6e5f2
+Create Date: 2026-10-19 12:00:00.000000
+
+- idx_review_user_card_time (user_id, card_id, reviewed_at) INCLUDE (next_review):
+  latest review per card (get_due_cards, get_latest_review). Replaces
+  idx_review_user_card.
+- idx_review_user_day (user_id, date(reviewed_at)): reviews per user and day.
+- idx_session_active (user_id, start_time) WHERE end_time IS NULL: active session.
+- Single-column indexes already covered by a composite prefix (card_reviews.user_id,
+  card_reviews.card_id, study_sessions.user_id) or never used alone
+  (card_reviews.next_review) are dropped to cut write amplification.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f6a9c3d8b1'
+down_revision = 'd7a3b8c6e5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create the replacements before dropping the indexes they supersede
+    op.create_index(
+        'idx_review_user_card_time', 'card_reviews', ['user_id', 'card_id', 'reviewed_at'],
+        unique=False, postgresql_include=['next_review']
+    )
+    op.create_index(
+        'idx_review_user_day', 'card_reviews', ['user_id', sa.text('date(reviewed_at)')],
+        unique=False
+    )
+    op.create_index(
+        'idx_session_active', 'study_sessions', ['user_id', 'start_time'], unique=False,
+        postgresql_where=sa.text('end_time IS NULL'), sqlite_where=sa.text('end_time IS NULL')
+    )
+
+    op.drop_index('idx_review_user_card', table_name='card_reviews')
+    op.drop_index('ix_card_reviews_card_id', table_name='card_reviews')
+    op.drop_index('ix_card_reviews_next_review', table_name='card_reviews')
+    op.drop_index('ix_card_reviews_user_id', table_name='card_reviews')
+    op.drop_index('ix_study_sessions_user_id', table_name='study_sessions')
+
+
+def downgrade() -> None:
+    op.create_index('ix_study_sessions_user_id', 'study_sessions', ['user_id'], unique=False)
+    op.create_index('ix_card_reviews_user_id', 'card_reviews', ['user_id'], unique=False)
+    op.create_index('ix_card_reviews_next_review', 'card_reviews', ['next_review'], unique=False)
+    op.create_index('ix_card_reviews_card_id', 'card_reviews', ['card_id'], unique=False)
+    op.create_index('idx_review_user_card', 'card_reviews', ['user_id', 'card_id'], unique=False)
+
+    op.drop_index('idx_session_active', table_name='study_sessions')
+    op.drop_index('idx_review_user_day', table_name='card_reviews')
+    op.drop_index('idx_review_user_card_time', table_name='card_reviews')
@@ -0,0 +1,64 @@
+"""Add reminder_minute to user_preferences
+
+Revision ID: f1b4c7d2e9a6
+Revises: e2f6a9c3d8b1
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b4c7d2e9a6'
+down_revision = 'e2f6a9c3d8b1'
+branch_labels = None
+depends_on = None
+
+
+def _reminder_minute(settings):
+    """Same rule as UserPreferences.get_reminder_minute."""
+    if not isinstance(settings, dict) or not settings.get('daily_reminder'):
+        return None
+    try:
+        hours, minutes = (int(part) for part in str(settings.get('reminder_time')).split(':'))
+    except ValueError:
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_preferences') as batch_op:
+        batch_op.add_column(sa.Column('reminder_minute', sa.SmallInteger(), nullable=True))
+
+    # Backfill from the JSON settings
+    preferences = sa.table(
+        'user_preferences',
+        sa.column('id', sa.Integer()),
+        sa.column('notification_settings', sa.JSON()),
+        sa.column('reminder_minute', sa.SmallInteger())
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(preferences.c.id, preferences.c.notification_settings)).all()
+    updates = [
+        {'row_id': row_id, 'minute': minute}
+        for row_id, settings in rows
+        if (minute := _reminder_minute(settings)) is not None
+    ]
+    if updates:
+        connection.execute(
+            preferences.update().where(preferences.c.id == sa.bindparam('row_id')).values(
+                reminder_minute=sa.bindparam('minute')
+            ),
+            updates
+        )
+
+    op.create_index('idx_prefs_reminder', 'user_preferences', ['reminder_minute', 'timezone'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_prefs_reminder', table_name='user_preferences')
+    with op.batch_alter_table('user_preferences') as batch_op:
+        batch_op.drop_column('reminder_minute')
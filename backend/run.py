@@ -7,5 +7,6 @@ from app import create_app
 app = create_app(os.getenv('FLASK_ENV', 'default'))
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server (debug follows the config); production uses gunicorn.conf.py
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
 
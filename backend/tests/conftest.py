@@ -0,0 +1,94 @@
+"""
+Shared test fixtures
+
+Test modules override these (e.g. a user with cards and review history, or an
+app on a file database) where they need more than the defaults.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db, response_cache
+from app.models.user import User
+from app.models.user_preferences import UserPreferences
+from app.utils import rate_limit
+from app.utils.cache import SQLiteCacheBackend
+
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    rate_limit._rate_limit_storage.clear()
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create test client"""
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    """Create test user"""
+    user = User(username='testuser', email='test@example.com')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def user_with_preferences(user):
+    """Test user with default preferences"""
+    db.session.add(UserPreferences.create_default(user.id))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def headers(user):
+    """Authorization headers for the test user"""
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.fixture
+def shared_cache(app, tmp_path):
+    """Response cache backend shared between processes (features like the due index need one)"""
+    response_cache.backend = SQLiteCacheBackend(str(tmp_path / 'cache.sqlite3'))
+    return response_cache.backend
+
+
+def _capture(record):
+    """Listen to every statement sent to the database while the fixture is active."""
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        record(statement, parameters)
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    return lambda: event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+
+@pytest.fixture
+def statements(app):
+    """Capture SQL statements executed during the test"""
+    captured = []
+    stop = _capture(lambda statement, parameters: captured.append(statement))
+    yield captured
+    stop()
+
+
+@pytest.fixture
+def selects(app):
+    """Capture (statement, parameters) of SELECTs executed during the test, for query plans"""
+    captured = []
+
+    def record(statement, parameters):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    stop = _capture(record)
+    yield captured
+    stop()
@@ -0,0 +1,127 @@
+"""
+Unit tests for the analytics overview query plan
+"""
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.card_state import CardState
+from app.models.review_archive import ReviewDailyActivity
+from app.models.study_session import StudySession
+from app.services.analytics import AnalyticsService, STREAK_WINDOW_DAYS
+
+
+@pytest.fixture
+def user(app):
+    """
+    User with four cards, reviews on the last three days, and today's sessions.
+
+    Today: 4 reviews (3 correct), sessions of 10 and 20 minutes plus an active one.
+    """
+    now = datetime.utcnow()
+    today = datetime.combine(now.date(), datetime.min.time())
+    user = User(username='testuser', email='test@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    deck = Deck(title='Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    cards = [Card(deck_id=deck.id, front_content=f'Q{i}', back_content='A') for i in range(4)]
+    db.session.add_all(cards)
+    db.session.flush()
+
+    for days_ago in (1, 2):
+        db.session.add(CardReview(
+            card_id=cards[0].id, user_id=user.id, quality=4,
+            reviewed_at=today - timedelta(days=days_ago, hours=-12), next_review=now + timedelta(days=5)
+        ))
+    for card, quality in zip(cards, (5, 4, 3, 1)):
+        db.session.add(CardReview(
+            card_id=card.id, user_id=user.id, quality=quality,
+            reviewed_at=now, next_review=now + timedelta(days=1)
+        ))
+        db.session.add(CardState(
+            card_id=card.id, user_id=user.id, next_review=now + timedelta(days=1), last_reviewed_at=now
+        ))
+    db.session.add_all([
+        StudySession(user_id=user.id, deck_id=deck.id, start_time=today,
+                     end_time=today + timedelta(minutes=10)),
+        StudySession(user_id=user.id, deck_id=deck.id, start_time=today + timedelta(minutes=30),
+                     end_time=today + timedelta(minutes=50)),
+        StudySession(user_id=user.id, deck_id=deck.id, start_time=now),
+        StudySession(user_id=user.id, deck_id=deck.id, start_time=today - timedelta(days=1),
+                     end_time=today - timedelta(days=1) + timedelta(hours=2)),
+    ])
+    db.session.commit()
+    return user
+
+
+def test_overview_values(app, user):
+    """Counts, durations and accuracy are computed in SQL with the same results"""
+    overview = AnalyticsService(db.session).get_overview(user.id)
+
+    assert overview == {
+        'total_cards': 4,
+        'due_cards': 0,
+        'new_cards': 0,
+        'reviewed_today': 4,
+        'sessions_today': 3,
+        'study_time_today_minutes': 30,
+        'average_accuracy_today': 75.0,
+        'streak_days': 3,
+    }
+
+
+def test_overview_without_activity(app):
+    """A user without cards, reviews or sessions gets zeros"""
+    user = User(username='empty', email='empty@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    overview = AnalyticsService(db.session).get_overview(user.id)
+
+    assert overview['total_cards'] == 0
+    assert overview['sessions_today'] == 0
+    assert overview['study_time_today_minutes'] == 0
+    assert overview['average_accuracy_today'] == 0
+    assert overview['streak_days'] == 0
+
+
+def test_streak_includes_archived_days_within_window(app, user):
+    """Archived activity extends the streak; days before the window are not read"""
+    today = datetime.utcnow().date()
+    db.session.add_all([
+        ReviewDailyActivity(user_id=user.id, activity_date=today - timedelta(days=days_ago),
+                            review_count=1, correct_count=1)
+        for days_ago in range(3, STREAK_WINDOW_DAYS + 10)
+    ])
+    db.session.commit()
+
+    assert AnalyticsService(db.session).get_overview(user.id)['streak_days'] == STREAK_WINDOW_DAYS
+
+
+def test_overview_statement_count(app, user, statements):
+    """One aggregate statement plus the bounded streak reads; no rows loaded for counting"""
+    service = AnalyticsService(db.session)
+    service.get_overview(user.id)
+    del statements[:]
+
+    service.get_overview(user.id)
+
+    hot = [sql for sql in statements if 'card_reviews' in sql or 'study_sessions' in sql]
+    assert len(hot) == 2
+    assert not any('study_sessions.id, ' in sql or 'card_reviews.id, ' in sql for sql in statements)
+
+
+def test_overview_endpoint(app, user):
+    """The endpoint returns the service result"""
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    response = app.test_client().get('/api/analytics/overview', headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json() == AnalyticsService(db.session).get_overview(user.id)
@@ -0,0 +1,61 @@
+"""
+Unit tests for card field selection and the summary projection
+"""
+import pytest
+from app import db
+from app.models.deck import Deck
+from app.models.card import Card
+from app.services.card_projection import SUMMARY_PREVIEW_LENGTH
+
+
+@pytest.fixture
+def deck(user):
+    """Create a deck with a long card"""
+    deck = Deck(title='Test Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.commit()
+    db.session.add(Card(front_content='F' * 500, back_content='B' * 500, deck_id=deck.id))
+    db.session.commit()
+    return deck
+
+
+def test_field_selection(client, headers, deck, statements):
+    """Only the requested fields are returned and queried"""
+    response = client.get(
+        f'/api/decks/{deck.id}/cards?fields=id,front_content,card_type', headers=headers
+    )
+
+    item = response.get_json()['items'][0]
+    assert response.status_code == 200
+    assert set(item) == {'id', 'front_content', 'card_type'}
+    assert item['card_type'] == 'basic'
+    assert not any('back_content' in sql or 'card_data' in sql for sql in statements)
+
+
+def test_summary_projection_truncates_in_sql(client, headers, deck):
+    """Summary items carry truncated previews instead of full content"""
+    response = client.get(f'/api/decks/{deck.id}/cards?projection=summary', headers=headers)
+
+    item = response.get_json()['items'][0]
+    assert 'front_content' not in item
+    assert item['front_preview'] == 'F' * SUMMARY_PREVIEW_LENGTH
+    assert item['back_preview'] == 'B' * SUMMARY_PREVIEW_LENGTH
+
+
+def test_default_matches_to_dict(client, headers, deck):
+    """Without parameters the full card payload is returned"""
+    response = client.get(f'/api/decks/{deck.id}/cards', headers=headers)
+
+    card = Card.query.filter_by(deck_id=deck.id).first()
+    assert response.get_json()['items'] == [client.application.json.loads(
+        client.application.json.dumps(card.to_dict())
+    )]
+    assert response.get_json()['pagination']['total'] == 1
+
+
+@pytest.mark.parametrize('query', ['fields=id,secret', 'projection=tiny'])
+def test_unknown_field_or_projection(client, headers, deck, query):
+    """Unknown fields and projections are rejected"""
+    response = client.get(f'/api/decks/{deck.id}/cards?{query}', headers=headers)
+
+    assert response.status_code == 400
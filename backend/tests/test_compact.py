@@ -0,0 +1,172 @@
+"""
+Unit tests for the columnar payload layouts of the sync endpoints
+"""
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card, CardType
+from app.models.card_state import CardState
+from app.utils.compact import COLUMNAR_MIMETYPE, columnar_table, epoch_ms, to_columnar
+
+COLUMNAR = {'Accept': COLUMNAR_MIMETYPE}
+
+
+@pytest.fixture
+def user(app):
+    """User with two due cards of different types and two new cards"""
+    now = datetime.utcnow()
+    user = User(username='testuser', email='test@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    deck = Deck(title='Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    cards = [Card(deck_id=deck.id, front_content=f'Q{i}', back_content='A') for i in range(4)]
+    cards[1].card_type = CardType.REVERSE
+    cards[2].card_data = {'options': [{'text': 'a', 'correct': True}]}
+    db.session.add_all(cards)
+    db.session.flush()
+    for card in cards[:2]:
+        db.session.add(CardState(card_id=card.id, user_id=user.id, repetitions=1,
+                                 next_review=now - timedelta(hours=1)))
+    db.session.commit()
+    return user
+
+
+def _rows(table):
+    """Decode a columnar table back to rows, in the JSON layout"""
+    columns = {}
+    for name, column in table['columns'].items():
+        if isinstance(column, dict) and 'dictionary' in column:
+            column = [None if code is None else column['dictionary'][code] for code in column['codes']]
+        elif isinstance(column, dict):
+            column = _rows(column)
+        columns[name] = column
+    return [{name: values[i] for name, values in columns.items()} for i in range(table['count'])]
+
+
+def _iso_ms(value):
+    return epoch_ms(datetime.fromisoformat(value)) if value else None
+
+
+def test_table_encoding():
+    """Keys once per table, enums dictionary-encoded, timestamps in epoch milliseconds"""
+    moment = datetime(2024, 3, 1, 12, 0, 0, 250000)
+    rows = [
+        {'id': 1, 'card_type': CardType.CLOZE, 'next_review': moment, 'card_data': {'options': [{'a': 1}]}},
+        {'id': 2, 'card_type': 'basic', 'next_review': None, 'card_data': {}},
+        {'id': 3, 'card_type': CardType.CLOZE, 'next_review': moment.isoformat() + '+01:00'},
+    ]
+
+    table = columnar_table(rows)
+
+    assert table['count'] == 3
+    assert table['columns']['id'] == [1, 2, 3]
+    assert table['columns']['card_type'] == {'dictionary': ['cloze', 'basic'], 'codes': [0, 1, 0]}
+    assert table['columns']['next_review'] == [1709294400250, None, 1709290800250]
+    assert table['columns']['card_data'] == [{'options': [{'a': 1}]}, {}, None]
+
+
+def test_nested_payload():
+    """Lists of objects anywhere in a payload become tables; other values keep their shape"""
+    payload = {
+        'due_count': 2,
+        'generated_at': datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc),
+        'queue': [{'id': 1, 'preview': {'intervals': [1, 6]}}, {'id': 2, 'preview': {'intervals': [1, 1]}}],
+        'empty': [],
+    }
+
+    encoded = to_columnar(payload)
+
+    assert encoded['due_count'] == 2 and encoded['generated_at'] == 1000 and encoded['empty'] == []
+    assert encoded['queue']['columns']['preview'] == {'count': 2, 'columns': {'intervals': [[1, 6], [1, 1]]}}
+
+
+def test_queue_columnar(client, headers, user):
+    """The columnar queue decodes to the JSON queue, with timestamps as epoch milliseconds"""
+    rows = client.get('/api/study/queue', headers=headers).get_json()
+
+    response = client.get('/api/study/queue', headers=dict(headers, **COLUMNAR))
+
+    assert response.mimetype == COLUMNAR_MIMETYPE
+    assert 'Accept' in response.headers['Vary']
+    data = response.get_json()
+    assert data['due_count'] == rows['due_count']
+    expected = [
+        dict(card, created_at=_iso_ms(card['created_at']), updated_at=_iso_ms(card['updated_at']))
+        for card in rows['queue']
+    ]
+    assert _rows(data['queue']) == expected
+    assert data['queue']['columns']['card_type']['dictionary'] == ['basic', 'reverse']
+    assert len(response.get_data()) < len(client.get('/api/study/queue', headers=headers).get_data())
+
+
+def test_layouts_cached_separately(client, headers, user):
+    """Cached responses are keyed by Accept and keep their Vary header"""
+    client.get('/api/study/queue', headers=dict(headers, **COLUMNAR))
+    as_json = client.get('/api/study/queue', headers=headers)
+    cached = client.get('/api/study/queue', headers=dict(headers, **COLUMNAR))
+
+    assert as_json.mimetype == 'application/json'
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert cached.mimetype == COLUMNAR_MIMETYPE
+    assert 'Accept' in cached.headers['Vary']
+
+
+def test_unsupported_accept_falls_back_to_json(client, headers, user, monkeypatch):
+    """Without msgpack installed, a MessagePack request gets JSON"""
+    monkeypatch.setattr('app.utils.compact.msgpack', None)
+
+    response = client.get('/api/study/queue', headers=dict(headers, Accept='application/msgpack'))
+
+    assert response.mimetype == 'application/json'
+
+
+def test_study_pack_columnar(client, headers, user):
+    """The columnar pack holds the same rows as the JSON pack, in per-partition tables"""
+    rows = json.loads(gzip.decompress(client.get('/api/sync/study-pack', headers=headers).get_data()))
+
+    response = client.get('/api/sync/study-pack', headers=dict(headers, **COLUMNAR))
+    cached = client.get('/api/sync/study-pack', headers=dict(headers, **COLUMNAR, **{'Accept-Encoding': 'gzip'}))
+
+    # A gzip file whatever the layout, never a content coding
+    assert response.mimetype == 'application/gzip'
+    assert response.mimetype_params['layout'] == COLUMNAR_MIMETYPE
+    assert 'Content-Encoding' not in response.headers
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert cached.content_type == response.content_type
+    assert 'Content-Encoding' not in cached.headers
+    pack = json.loads(gzip.decompress(response.get_data()))
+    assert pack['layout'] == 'columnar' and rows['layout'] == 'rows'
+    assert pack['until'] - pack['generated_at'] == 7 * 24 * 3600 * 1000
+    assert [row for table in pack['cards'] for row in _rows(table)] == rows['cards']
+    states = [row for table in pack['states'] for row in _rows(table)]
+    assert [state['card_id'] for state in states] == [state['card_id'] for state in rows['states']]
+    assert [state['next_review'] for state in states] == [_iso_ms(state['next_review']) for state in rows['states']]
+
+
+def test_review_upload_columnar(client, headers, user):
+    """Batch review results come back as one table"""
+    card_ids = [card.id for card in Card.query.order_by(Card.id)]
+    reviews = [{'card_id': card_id, 'quality': 4} for card_id in card_ids[:2]] + [{'card_id': 999999, 'quality': 4}]
+
+    response = client.post('/api/sync/reviews', json={'reviews': reviews}, headers=dict(headers, **COLUMNAR))
+
+    results = response.get_json()['results']
+    assert results['columns']['status'] == {'dictionary': ['applied', 'rejected'], 'codes': [0, 0, 1]}
+    assert results['columns']['review']['columns']['card_id'] == card_ids[:2] + [None]
+
+
+def test_msgpack(client, headers, user):
+    """MessagePack carries the columnar layout"""
+    msgpack = pytest.importorskip('msgpack')
+
+    columnar = client.get('/api/study/queue', headers=dict(headers, **COLUMNAR)).get_json()
+    response = client.get('/api/study/queue', headers=dict(headers, Accept='application/msgpack'))
+
+    assert response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.get_data()) == columnar
@@ -0,0 +1,165 @@
+"""
+Unit tests for gzip request/response compression and streamed exports
+"""
+import csv
+import gzip
+import io
+import json
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.deck import Deck
+from app.models.card import Card, CardType
+from app.services.card_import_export import CardImportExportService
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.fixture
+def deck(user):
+    """Deck with 1200 cards (more than two export partitions)"""
+    deck = Deck(title='Deck', user_id=user.id, tags=['bio'])
+    db.session.add(deck)
+    db.session.flush()
+    db.session.add_all([
+        Card(deck_id=deck.id, front_content=f'Question {i}, "quoted"', back_content=f'Answer {i}',
+             card_type=CardType.REVERSE if i % 3 == 0 else CardType.BASIC,
+             media_attachments=[f'img/{i}.png'] if i % 10 == 0 else [])
+        for i in range(1200)
+    ])
+    db.session.commit()
+    return deck
+
+
+def _gzip_json(payload):
+    return gzip.compress(json.dumps(payload).encode())
+
+
+def test_gzip_request_body(client, headers, deck):
+    """A gzipped JSON body is decompressed before the view reads it"""
+    cards = [{'front_content': 'Q', 'back_content': 'A'}, {'front_content': 'Q2', 'back_content': 'A2'}]
+    body = {'format': 'json', 'data': {'cards': cards}}
+
+    response = client.post(
+        f'/api/decks/{deck.id}/import', data=_gzip_json(body),
+        headers=dict(headers, **{'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+    )
+
+    assert response.status_code == 201
+    assert Card.query.filter_by(deck_id=deck.id).count() == 1202
+
+
+def test_decompressed_size_cap(app, client, headers, deck):
+    """Reading stops with 413 once the decompressed body passes the cap"""
+    app.wsgi_app.max_bytes = 64 * 1024
+    body = {'format': 'csv', 'data': 'Front,Back\n' + 'Q,A\n' * 100000}
+
+    response = client.post(
+        f'/api/decks/{deck.id}/import', data=_gzip_json(body),
+        headers=dict(headers, **{'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+    )
+
+    assert response.status_code == 413
+    assert Card.query.filter_by(deck_id=deck.id).count() == 1200
+
+
+def test_invalid_encodings(client, headers, deck):
+    corrupt = client.post(
+        f'/api/decks/{deck.id}/import', data=b'not gzip at all',
+        headers=dict(headers, **{'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+    )
+    unsupported = client.post(
+        f'/api/decks/{deck.id}/import', data=b'{}',
+        headers=dict(headers, **{'Content-Encoding': 'br', 'Content-Type': 'application/json'})
+    )
+
+    assert corrupt.status_code == 400
+    assert unsupported.status_code == 415
+
+
+def test_response_compression_threshold(client, headers, deck):
+    """Bodies above COMPRESS_MIN_SIZE are gzipped for clients that accept it"""
+    large = client.get(f'/api/decks/{deck.id}/cards?per_page=100', headers=dict(headers, **GZIP))
+    plain = client.get(f'/api/decks/{deck.id}/cards?per_page=100', headers=headers)
+    small = client.get('/api/health', headers=GZIP)
+
+    assert large.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in large.headers['Vary']
+    assert json.loads(gzip.decompress(large.get_data())) == plain.get_json()
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_csv_export_streamed(app, client, headers, deck):
+    """The CSV export is streamed, compressed chunk by chunk, with the rows of the buffered export"""
+    response = client.get(f'/api/decks/{deck.id}/export?format=csv', headers=dict(headers, **GZIP), buffered=False)
+
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'gzip'
+    chunks = list(response.response)
+    assert len([chunk for chunk in chunks if chunk]) > 1
+    text = gzip.decompress(b''.join(chunks)).decode()
+    assert text == CardImportExportService.export_deck_to_csv(deck.id)
+    assert len(list(csv.reader(io.StringIO(text)))) == 1201
+
+
+def test_json_export_streamed(app, client, headers, deck):
+    """The streamed JSON export is the document of export_deck_to_json"""
+    response = client.get(f'/api/decks/{deck.id}/export', headers=headers)
+
+    assert response.is_streamed
+    exported = response.get_json()
+    assert exported['total_cards'] == 1200
+    assert exported == json.loads(app.json.dumps(CardImportExportService.export_deck_to_json(deck.id)))
+
+
+class _Interrupted:
+    """Query result whose second partition fails like a cancelled statement"""
+
+    def __init__(self, result):
+        self.result = result
+
+    def __getattr__(self, name):
+        return getattr(self.result, name)
+
+    def mappings(self):
+        return _Interrupted(self.result.mappings())
+
+    def partitions(self):
+        partitions = self.result.partitions()
+        yield next(partitions)
+        raise OperationalError('FETCH', {}, Exception('canceling statement due to statement timeout'))
+
+
+@pytest.mark.parametrize('format_type', ['json', 'csv'])
+def test_interrupted_export_ends_with_marker(client, headers, deck, monkeypatch, format_type):
+    """A database error after the response started ends the stream with an error marker"""
+    execute = db.session.execute
+    monkeypatch.setattr(db.session, 'execute', lambda *args, **kwargs: _Interrupted(execute(*args, **kwargs)))
+
+    response = client.get(f'/api/decks/{deck.id}/export?format={format_type}', headers=headers)
+
+    assert response.status_code == 200
+    if format_type == 'json':
+        exported = response.get_json()
+        assert exported['error'] == 'Export interrupted: database error'
+        assert 'total_cards' not in exported and len(exported['cards']) == 500
+    else:
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        assert rows[-1] == ['#ERROR', 'Export interrupted: database error']
+        assert len(rows) == 502
+
+
+def test_compressed_etag_is_weak(app, client):
+    """The gzip body cannot share a strong ETag with the identity body"""
+    @app.route('/strong-etag')
+    def strong_etag():
+        response = app.response_class('x' * 4096, mimetype='text/plain')
+        response.set_etag('v1')
+        return response
+
+    compressed = client.get('/strong-etag', headers=GZIP)
+    identity = client.get('/strong-etag')
+
+    assert compressed.headers['ETag'] == 'W/"v1"'
+    assert identity.headers['ETag'] == '"v1"'
@@ -0,0 +1,94 @@
+"""
+Unit tests for ETag / conditional GET support
+"""
+import pytest
+from app import db
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+
+
+@pytest.fixture
+def deck(app, user_with_preferences):
+    """Create test deck with a card"""
+    deck = Deck(title='Test Deck', user_id=user_with_preferences.id)
+    db.session.add(deck)
+    db.session.commit()
+    db.session.add(Card(front_content='Q', back_content='A', deck_id=deck.id))
+    db.session.commit()
+    return deck
+
+
+@pytest.mark.parametrize('url', ['/api/decks', '/api/decks/{id}', '/api/decks/{id}/cards'])
+def test_matching_etag_returns_304(client, headers, deck, url):
+    """A request carrying the current ETag gets an empty 304"""
+    url = url.format(id=deck.id)
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    second = client.get(url, headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_card_update_changes_etag(client, headers, deck):
+    """Editing a card invalidates the deck ETag"""
+    etag = client.get(f'/api/decks/{deck.id}', headers=headers).headers['ETag']
+
+    card = Card.query.filter_by(deck_id=deck.id).first()
+    card.back_content = 'Changed'
+    db.session.commit()
+
+    response = client.get(f'/api/decks/{deck.id}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_review_changes_card_list_etag(client, headers, user, deck):
+    """Review counts are part of card payloads, so reviews change the ETag"""
+    url = f'/api/decks/{deck.id}/cards'
+    etag = client.get(url, headers=headers).headers['ETag']
+
+    card = Card.query.filter_by(deck_id=deck.id).first()
+    db.session.add(CardReview(card_id=card.id, user_id=user.id, quality=4))
+    db.session.commit()
+
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['items'][0]['review_count'] == 1
+
+
+def test_missing_deck_is_not_conditional(client, headers):
+    """Unknown decks fall through to the view's 404"""
+    response = client.get('/api/decks/999', headers={**headers, 'If-None-Match': '*'})
+    assert response.status_code == 404
+
+
+def test_study_queue_body_etag(client, headers, deck):
+    """The study queue answers unchanged payloads with 304"""
+    first = client.get('/api/study/queue', headers=headers)
+    second = client.get('/api/study/queue', headers={**headers, 'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 304
+
+
+def test_cached_body_matches_etag(client, headers, user, deck):
+    """A write the cache's version counters miss (another process) still gives a fresh body"""
+    first = client.get('/api/decks', headers=headers)
+    assert first.get_json()['pagination']['total'] == 1
+
+    # Core INSERT on a separate connection: no ORM flush, so no version bump
+    with db.engine.begin() as conn:
+        conn.execute(Deck.__table__.insert().values(
+            title='Elsewhere', user_id=user.id, created_at=db.func.now(), updated_at=db.func.now()
+        ))
+
+    second = client.get('/api/decks', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['X-Cache'] == 'MISS'
+    assert second.get_json()['pagination']['total'] == 2
+
+    third = client.get('/api/decks', headers={**headers, 'If-None-Match': second.headers['ETag']})
+    assert third.status_code == 304
@@ -0,0 +1,123 @@
+"""
+Unit tests for connection pool configuration and telemetry
+"""
+import sqlite3
+import pytest
+from sqlalchemy import exc as sa_exc, text
+from app import create_app, db
+from app.utils.db_pool import InstrumentedQueuePool, PoolMetrics, pool_metrics, statement_timeout
+from config import TestingConfig
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create test application with a file database and a small queue pool"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_ENGINE_OPTIONS', {
+        'pool_size': 1,
+        'max_overflow': 0,
+        'pool_timeout': 0.05,
+        'pool_pre_ping': True,
+    })
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start each test with empty pool metrics"""
+    pool_metrics.reset()
+
+
+class TestPoolMetrics:
+    """Tests for the metric counters"""
+
+    def test_checkout_histogram(self):
+        metrics = PoolMetrics()
+        metrics.record_checkout(0.0005)
+        metrics.record_checkout(0.05)
+        metrics.record_checkout(2.0)
+
+        snapshot = metrics.snapshot()
+        assert snapshot['checkouts'] == 3
+        assert snapshot['wait_max_ms'] == 2000.0
+        assert snapshot['wait_histogram'] == {
+            '<=1ms': 1, '<=10ms': 0, '<=100ms': 1, '<=1000ms': 0, '>1000ms': 1
+        }
+
+
+class TestInstrumentedQueuePool:
+    """Tests for checkout instrumentation"""
+
+    def test_records_checkouts_and_timeouts(self, tmp_path):
+        pool = InstrumentedQueuePool(
+            lambda: sqlite3.connect(str(tmp_path / 'pool.db')),
+            pool_size=1, max_overflow=0, timeout=0.05
+        )
+        connection = pool.connect()
+        with pytest.raises(sa_exc.TimeoutError):
+            pool.connect()
+        connection.close()
+
+        snapshot = pool_metrics.snapshot()
+        assert snapshot['checkouts'] == 1
+        assert snapshot['checkout_timeouts'] == 1
+
+    def test_engine_uses_instrumented_pool(self, app):
+        assert isinstance(db.engine.pool, InstrumentedQueuePool)
+        assert db.engine.pool.size() == 1
+
+
+class TestPoolHealthEndpoint:
+    """Tests for /api/health/db"""
+
+    def test_reports_pool_state(self, client):
+        response = client.get('/api/health/db')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['primary']['pool'] == 'InstrumentedQueuePool'
+        assert data['primary']['size'] == 1
+        assert data['replicas'] == []
+        assert 'checkout_timeouts' in data['metrics']
+
+    def test_pool_exhaustion_returns_503(self, client, headers):
+        db.session.close()  # Return the fixture's connection to the pool
+        held = db.engine.connect()  # Take the only pooled connection
+        try:
+            response = client.get('/api/decks', headers=headers)
+        finally:
+            held.close()
+
+        assert response.status_code == 503
+        assert pool_metrics.snapshot()['checkout_timeouts'] == 1
+
+
+class TestStatementTimeout:
+    """Tests for the per-endpoint statement timeout"""
+
+    def test_reapplied_after_commit(self, app, monkeypatch):
+        """Every transaction the view begins gets the timeout, not only the first"""
+        applied = []
+        monkeypatch.setattr('app.utils.db_pool._set_statement_timeout',
+                            lambda connection, timeout_ms: applied.append(timeout_ms))
+
+        @statement_timeout('study')
+        def view():
+            db.session.execute(text('SELECT 1'))
+            db.session.commit()
+            db.session.execute(text('SELECT 1'))
+            db.session.commit()
+
+        db.session.commit()
+        with app.test_request_context():
+            view()
+        db.session.execute(text('SELECT 1'))
+        db.session.commit()
+
+        assert applied == [2000, 2000]
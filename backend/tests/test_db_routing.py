@@ -0,0 +1,87 @@
+"""
+Unit tests for read-replica routing with read-your-writes stickiness
+
+Uses two SQLite files: the primary and a replica that never receives writes,
+so any row missing from the replica shows which database served a read.
+"""
+import pytest
+from app import create_app, db, response_cache
+from app.models.user import User
+from app.models.deck import Deck
+from app.utils.db_routing import is_sticky, replica_engines
+from config import TestingConfig
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create test application with one replica"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_REPLICA_URIS', [f"sqlite:///{tmp_path / 'replica.db'}"])
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(replica_engines()[0])
+        yield app
+        db.session.remove()
+        db.drop_all()
+        replica_engines()[0].dispose()
+
+
+@pytest.fixture
+def user(app):
+    """Create test user on the primary and copy it to the replica"""
+    user = User(username='testuser', email='test@example.com')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.commit()
+
+    row = db.session.execute(db.select(User.__table__)).mappings().one()
+    with replica_engines()[0].begin() as conn:
+        conn.execute(User.__table__.insert(), [dict(row)])
+    return user
+
+
+@pytest.fixture
+def public_deck(app, user):
+    """Public deck that exists on the primary only (replica lag)"""
+    deck = Deck(title='Primary Deck', user_id=user.id, is_public=True)
+    db.session.add(deck)
+    db.session.commit()
+    return deck
+
+
+class TestReadReplicaRouting:
+    """Tests for routing of @read_replica endpoints"""
+
+    def test_read_only_endpoint_uses_replica(self, client, headers, public_deck):
+        response = client.get('/api/decks/public', headers=headers)
+
+        assert response.status_code == 200
+        assert response.get_json()['pagination']['total'] == 0
+
+    def test_other_endpoints_use_primary(self, client, headers, public_deck):
+        response = client.get('/api/decks', headers=headers)
+
+        assert response.status_code == 200
+        assert response.get_json()['pagination']['total'] == 1
+
+    def test_reads_stick_to_primary_after_own_write(self, client, headers, user, public_deck):
+        response = client.post('/api/decks', json={'title': 'New Deck', 'is_public': True}, headers=headers)
+        assert response.status_code == 201
+        assert is_sticky(user.id)
+
+        response = client.get('/api/decks/public', headers=headers)
+        assert response.get_json()['pagination']['total'] == 2
+
+        response_cache.backend.delete(f'replica-sticky:{user.id}')
+        response = client.get('/api/decks/public', headers=headers)
+        assert response.get_json()['pagination']['total'] == 0
+
+    def test_writes_go_to_primary(self, app, user):
+        db.session.add(Deck(title='Written', user_id=user.id))
+        db.session.commit()
+
+        with replica_engines()[0].connect() as conn:
+            replica_count = conn.execute(db.select(db.func.count()).select_from(Deck.__table__)).scalar()
+        assert replica_count == 0
+        assert Deck.query.count() == 1
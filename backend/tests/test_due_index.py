@@ -0,0 +1,217 @@
+"""
+Unit tests for the in-process due card index
+"""
+import random
+from datetime import datetime, timedelta
+import pytest
+from flask import g
+from sqlalchemy import update
+from app import db, response_cache
+from app.models.user import User
+from app.models.user_preferences import UserPreferences
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_state import CardState
+from app.services.spaced_repetition import SpacedRepetitionService
+from app.utils.cache import MemoryCacheBackend, SQLiteCacheBackend
+from app.utils.due_index import DueHeap, get_due_index
+
+pytestmark = pytest.mark.usefixtures('shared_cache')
+
+
+@pytest.fixture
+def user(app):
+    """
+    User with two decks of six cards each.
+
+    Cards 0-2 of each deck are due (deck A overdue by hours, deck B by days),
+    cards 3-4 are due next week and card 5 is new.
+    """
+    now = datetime.utcnow()
+    user = User(username='testuser', email='test@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserPreferences(user_id=user.id, daily_review_limit=100, new_cards_per_day=10))
+    for title, unit in (('A', 'hours'), ('B', 'days')):
+        deck = Deck(title=title, user_id=user.id)
+        db.session.add(deck)
+        db.session.flush()
+        cards = [Card(deck_id=deck.id, front_content=f'{title}{i}', back_content='A') for i in range(6)]
+        db.session.add_all(cards)
+        db.session.flush()
+        for i, card in enumerate(cards[:5]):
+            next_review = now - timedelta(**{unit: 3 - i}) if i < 3 else now + timedelta(days=7 + i)
+            db.session.add(CardState(card_id=card.id, user_id=user.id, repetitions=1, next_review=next_review))
+    db.session.commit()
+    return user
+
+
+def _next_request():
+    """Forget request-scoped state (pytest-flask keeps one request context per test)"""
+    g.pop('user_contexts', None)
+    db.session.expire_all()
+
+
+def _ids(cards):
+    return [card.id for card in cards]
+
+
+def test_heap_matches_sorted_order():
+    """Random inserts, updates and removals keep (next_review, card_id) order"""
+    rng = random.Random(7)
+    heap = DueHeap()
+    reference = {}
+    for step in range(2000):
+        card_id = rng.randint(1, 300)
+        if step % 5 == 4:
+            heap.remove(card_id)
+            reference.pop(card_id, None)
+        else:
+            next_review = rng.randint(0, 50)
+            heap.set(card_id, card_id % 3, next_review, 2.5, 1, 0)
+            reference[card_id] = next_review
+
+    expected = sorted(reference, key=lambda card_id: (reference[card_id], card_id))
+    assert len(heap) == len(reference)
+    assert heap.due(50) == expected
+    assert heap.due(20, limit=5) == [c for c in expected if reference[c] <= 20][:5]
+    assert heap.due(50, deck_id=1) == [c for c in expected if c % 3 == 1]
+
+
+def test_same_results_as_sql(app, user):
+    """Due and new cards from the index equal the SQL scans, with and without a deck"""
+    service = SpacedRepetitionService(db.session)
+    store = app.extensions['due_index']
+    deck_ids = [deck.id for deck in Deck.query.filter_by(user_id=user.id)]
+    calls = [lambda d=d, k=k: service.get_due_cards(user.id, d, limit=k) for d in [None] + deck_ids for k in (2, 4, 100)]
+    calls += [lambda d=d: service.get_new_cards(user.id, d, limit=5) for d in [None] + deck_ids]
+
+    from_index = [_ids(call()) for call in calls]
+    store.max_bytes = 0
+    from_sql = [_ids(call()) for call in calls]
+
+    assert from_index == from_sql
+    # Deck B's cards are the most overdue
+    assert from_index[2][:6] != sorted(from_index[2][:6])
+
+
+def test_queue_requests_skip_scheduling_queries(app, user, statements):
+    """Once loaded, the index answers queue requests; only the chosen cards are loaded"""
+    service = SpacedRepetitionService(db.session)
+    service.get_study_queue(user.id)
+    statements.clear()
+
+    queue = service.get_study_queue(user.id)
+
+    assert queue['due_count'] == 8
+    assert not any('card_states' in sql for sql in statements)
+
+
+def test_review_updates_index_in_place(client, headers, user, statements):
+    """A review commits, moves the card in the index and the next queue reflects it"""
+    service = SpacedRepetitionService(db.session)
+    first = service.get_due_cards(user.id, limit=1)[0]
+    index = get_due_index(user.id)
+    statements.clear()
+
+    response = client.post('/api/study/review', json={'card_id': first.id, 'quality': 5}, headers=headers)
+    _next_request()
+
+    assert response.status_code == 201
+    assert get_due_index(user.id) is index
+    assert first.id not in _ids(service.get_due_cards(user.id, limit=8))
+    reloads = [sql for sql in statements if 'LEFT OUTER JOIN card_states' in sql]
+    assert reloads == []
+
+
+def test_reviewing_a_new_card_schedules_it(app, user):
+    """A new card leaves the new list once reviewed"""
+    service = SpacedRepetitionService(db.session)
+    new_card = service.get_new_cards(user.id, limit=1)[0]
+
+    service.process_review(new_card.id, user.id, quality=4)
+
+    assert new_card.id not in _ids(service.get_new_cards(user.id))
+    assert get_due_index(user.id).heap.get(new_card.id) is not None
+
+
+def test_rolled_back_review_is_not_applied(app, user):
+    """Only committed reviews reach the index"""
+    service = SpacedRepetitionService(db.session)
+    first = service.get_due_cards(user.id, limit=1)[0]
+
+    service.process_review(first.id, user.id, quality=5, commit=False)
+    db.session.rollback()
+
+    assert _ids(service.get_due_cards(user.id, limit=1)) == [first.id]
+
+
+def test_other_changes_drop_the_index(app, user):
+    """A new card, or a review written elsewhere, reloads the index"""
+    service = SpacedRepetitionService(db.session)
+    deck = Deck.query.filter_by(user_id=user.id).first()
+    index = get_due_index(user.id)
+
+    card = Card(deck_id=deck.id, front_content='Q', back_content='A')
+    db.session.add(card)
+    db.session.commit()
+
+    assert card.id in _ids(service.get_new_cards(user.id))
+    assert get_due_index(user.id) is not index
+
+    index = get_due_index(user.id)
+    with db.engine.begin() as conn:
+        conn.execute(update(CardState).where(CardState.user_id == user.id).values(next_review=None))
+    response_cache.bump(user.id, ['reviews'])
+
+    assert get_due_index(user.id) is not index
+    assert service.get_due_cards(user.id, limit=3) == service.get_new_cards(user.id, limit=3)
+
+
+def test_memory_budget_evicts_least_recently_used(app, user):
+    """Indexes beyond the memory budget are evicted oldest first"""
+    store = app.extensions['due_index']
+    other = User(username='other', email='other@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+
+    get_due_index(user.id)
+    store.max_bytes = store.total_bytes + 1
+    get_due_index(other.id)
+
+    assert list(store.entries) == [other.id]
+    assert store.total_bytes <= store.max_bytes
+
+
+def test_disabled(app, user):
+    """DUE_INDEX_MEMORY_MB=0 keeps every request on the SQL path"""
+    app.extensions['due_index'].max_bytes = 0
+
+    assert get_due_index(user.id) is None
+    assert len(SpacedRepetitionService(db.session).get_due_cards(user.id)) == 8
+
+
+def test_commits_from_other_processes_drop_the_index(app, user, shared_cache):
+    """A review committed by another worker bumps the shared counters, so the index reloads"""
+    service = SpacedRepetitionService(db.session)
+    due = service.get_due_cards(user.id)
+    index = get_due_index(user.id)
+
+    # The other worker's commit: the state row and the shared cache file, not this process
+    with db.engine.begin() as conn:
+        conn.execute(update(CardState).where(CardState.card_id == due[0].id).values(
+            next_review=datetime.utcnow() + timedelta(days=30), version=CardState.version + 1
+        ))
+    SQLiteCacheBackend(shared_cache.path).bump_versions(user.id, ['reviews'])
+    _next_request()
+
+    assert get_due_index(user.id) is not index
+    assert _ids(service.get_due_cards(user.id)) == _ids(due[1:])
+
+
+def test_not_used_without_a_shared_backend(app, user):
+    """A per-process cache backend would miss other workers' commits, so queues come from SQL"""
+    response_cache.backend = MemoryCacheBackend()
+
+    assert get_due_index(user.id) is None
+    assert len(SpacedRepetitionService(db.session).get_due_cards(user.id)) == 8
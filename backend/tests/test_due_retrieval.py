@@ -0,0 +1,118 @@
+"""
+Unit tests for the index-ordered due card retrieval on card_states
+"""
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_state import CardState
+from app.services.spaced_repetition import SpacedRepetitionService
+
+
+@pytest.fixture
+def decks(app, user):
+    """
+    Two decks of ten cards each, with scheduled states, and a deck of another user.
+
+    Deck A: cards 0-5 due (card i overdue by 10 - i days), 6-7 due later, 8-9 new
+    Deck B: cards 0-2 due (card i overdue by i + 1 hours), 3-9 new
+    Another user's deck has overdue cards and a state for one of deck A's new cards.
+    """
+    now = datetime.utcnow()
+    other = User(username='other', email='other@example.com', password_hash='x')
+    db.session.add(other)
+    deck_a = Deck(title='A', user_id=user.id)
+    deck_b = Deck(title='B', user_id=user.id)
+    db.session.add_all([deck_a, deck_b])
+    db.session.flush()
+    foreign = Deck(title='Foreign', user_id=other.id)
+    db.session.add(foreign)
+    db.session.flush()
+
+    def cards(deck):
+        cards = [Card(deck_id=deck.id, front_content=f'Q{i}', back_content='A') for i in range(10)]
+        db.session.add_all(cards)
+        db.session.flush()
+        return cards
+
+    def schedule(card, next_review, user_id=user.id):
+        db.session.add(CardState(card_id=card.id, user_id=user_id, repetitions=1, next_review=next_review))
+
+    a_cards, b_cards, foreign_cards = cards(deck_a), cards(deck_b), cards(foreign)
+    for i, card in enumerate(a_cards[:6]):
+        schedule(card, now - timedelta(days=10 - i))
+    for card in a_cards[6:8]:
+        schedule(card, now + timedelta(days=3))
+    for i, card in enumerate(b_cards[:3]):
+        schedule(card, now - timedelta(hours=i + 1))
+    for card in foreign_cards:
+        schedule(card, now - timedelta(days=30), user_id=other.id)
+    schedule(a_cards[8], now - timedelta(days=30), user_id=other.id)
+    db.session.commit()
+    return a_cards, b_cards
+
+
+def _plan(statement, parameters):
+    """EXPLAIN QUERY PLAN detail lines of a statement"""
+    plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters or ())
+    return [row[-1] for row in plan]
+
+
+def test_most_overdue_first(app, user, decks):
+    """Due cards come in next_review order across decks, then new cards"""
+    a_cards, b_cards = decks
+
+    due = SpacedRepetitionService(db.session).get_due_cards(user.id, limit=20)
+
+    expected_due = a_cards[:6] + list(reversed(b_cards[:3]))
+    expected_new = a_cards[8:] + b_cards[3:]
+    assert [card.id for card in due] == [card.id for card in expected_due + expected_new][:20]
+
+
+def test_limit_stops_the_due_scan(app, user, decks):
+    """The first k due cards are returned without new cards when k are due"""
+    a_cards, _ = decks
+
+    due = SpacedRepetitionService(db.session).get_due_cards(user.id, limit=4)
+
+    assert [card.id for card in due] == [card.id for card in a_cards[:4]]
+
+
+def test_deck_filter_and_new_cards(app, user, decks):
+    """deck_id restricts both scans; other users' states do not schedule a card"""
+    a_cards, b_cards = decks
+    service = SpacedRepetitionService(db.session)
+
+    due = service.get_due_cards(user.id, deck_id=a_cards[0].deck_id, limit=100)
+    new = service.get_new_cards(user.id, deck_id=b_cards[0].deck_id, limit=2)
+
+    assert [card.id for card in due] == [card.id for card in a_cards[:6] + a_cards[8:]]
+    assert [card.id for card in new] == [card.id for card in b_cards[3:5]]
+
+
+def test_study_queue_new_cards(app, user, decks):
+    """The queue's new cards are the user's unscheduled cards in deck order"""
+    a_cards, b_cards = decks
+
+    queue = SpacedRepetitionService(db.session).get_study_queue(user.id)
+
+    assert queue['new_count'] == 9
+    assert [card['id'] for card in queue['new_cards']] == [card.id for card in a_cards[8:] + b_cards[3:]]
+
+
+def test_scans_follow_indexes(app, user, decks, selects):
+    """Both scans read rows in index order: no sort step, due cards via idx_card_state_due"""
+    # The SQL path, as used when the in-process due index is disabled
+    app.extensions['due_index'].max_bytes = 0
+    db.session.execute(db.text('ANALYZE'))
+    del selects[:]
+
+    SpacedRepetitionService(db.session).get_due_cards(user.id, limit=50)
+
+    plans = [_plan(statement, parameters) for statement, parameters in selects if 'FROM cards' in statement]
+    assert len(plans) == 2
+    assert any('idx_card_state_due' in line for line in plans[0])
+    for plan in plans:
+        assert not any('TEMP B-TREE' in line for line in plan), plan
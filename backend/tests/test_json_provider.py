@@ -0,0 +1,65 @@
+"""
+Unit tests for the JSON providers and row-based card serialization
+"""
+import pytest
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card, CardType
+from app.services.card_projection import get_deck_card_rows
+from app.utils.json_provider import FastJSONProvider, StdlibJSONProvider
+
+
+@pytest.fixture
+def deck(app):
+    """Create a deck with two cards"""
+    user = User(username='testuser', email='test@example.com')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.commit()
+    deck = Deck(title='Test Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.commit()
+    db.session.add_all([
+        Card(front_content='Q1', back_content='A1', deck_id=deck.id),
+        Card(front_content='Q2', back_content='A2', deck_id=deck.id, card_type=CardType.REVERSE),
+    ])
+    db.session.commit()
+    return deck
+
+
+@pytest.mark.parametrize('provider_class', [StdlibJSONProvider, FastJSONProvider])
+def test_native_types(app, provider_class):
+    """Datetimes are ISO 8601 and enums serialize to their value"""
+    provider = provider_class(app)
+    data = provider.loads(provider.dumps({
+        'at': datetime(2024, 1, 2, 3, 4, 5, 678),
+        'type': CardType.CLOZE
+    }))
+
+    assert data == {'at': '2024-01-02T03:04:05.000678', 'type': 'cloze'}
+
+
+@pytest.mark.parametrize('provider_class', [StdlibJSONProvider, FastJSONProvider])
+def test_card_rows_match_to_dict(app, deck, provider_class):
+    """Row serialization produces the same payload as Card.to_dict()"""
+    provider = provider_class(app)
+    rows = provider.loads(provider.dumps(get_deck_card_rows(deck.id)))
+    dicts = provider.loads(provider.dumps([card.to_dict() for card in deck.cards.order_by(Card.id)]))
+
+    assert rows == dicts
+
+
+def test_deck_endpoint_includes_cards(app, deck):
+    """GET /api/decks/<id> still returns the full deck-with-cards payload"""
+    token = create_access_token(identity=str(deck.user_id))
+    response = app.test_client().get(
+        f'/api/decks/{deck.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['card_count'] == 2
+    assert [card['card_type'] for card in data['cards']] == ['basic', 'reverse']
@@ -0,0 +1,197 @@
+"""
+Unit tests for the due-card reminder scheduler
+"""
+import json
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.card_state import CardState
+from app.models.user_preferences import UserPreferences
+from app.services.notifications import (
+    NotificationScheduler, NotificationSink, _local_ranges, create_sink
+)
+from app.services.spaced_repetition import SpacedRepetitionService
+
+
+class ListSink(NotificationSink):
+    """Sink collecting notifications in memory"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, notifications):
+        self.sent.extend(notifications)
+
+
+def _make_user(name, tz='UTC', reminder='09:00', due=1, new=1, future=0, review_limit=100):
+    """Create a user with preferences and cards in the given review states"""
+    user = User(username=name, email=f'{name}@example.com')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.flush()
+
+    prefs = UserPreferences.create_default(user.id)
+    prefs.timezone = tz
+    prefs.daily_review_limit = review_limit
+    if reminder is None:
+        prefs.set_notification_setting('daily_reminder', False)
+    else:
+        prefs.set_notification_setting('reminder_time', reminder)
+    db.session.add(prefs)
+
+    deck = Deck(title=f'{name} deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    for index in range(due + new + future):
+        card = Card(deck_id=deck.id, front_content=f'Q{index}', back_content=f'A{index}')
+        db.session.add(card)
+        db.session.flush()
+        if index < due:
+            next_review = now - timedelta(days=1)
+        elif index < due + new:
+            continue
+        else:
+            next_review = now + timedelta(days=3)
+        db.session.add(CardReview(
+            card_id=card.id, user_id=user.id, quality=4,
+            reviewed_at=now - timedelta(days=2), next_review=next_review
+        ))
+        db.session.add(CardState(
+            card_id=card.id, user_id=user.id, repetitions=1,
+            next_review=next_review, last_reviewed_at=now - timedelta(days=2)
+        ))
+
+    db.session.commit()
+    return user
+
+
+def _window(hour, minute=0, day=None):
+    """Fifteen minute UTC window starting at the given time (today by default)"""
+    day = day or datetime.now(timezone.utc).date()
+    start = datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+    return start, start + timedelta(minutes=15)
+
+
+class TestReminderMinute:
+    """Tests for the derived reminder_minute column"""
+
+    def test_synced_on_insert_and_update(self, app):
+        user = _make_user('alice', reminder='07:45')
+        prefs = UserPreferences.query.filter_by(user_id=user.id).first()
+        assert prefs.reminder_minute == 7 * 60 + 45
+
+        prefs.set_notification_setting('daily_reminder', False)
+        db.session.commit()
+        assert prefs.reminder_minute is None
+
+    def test_invalid_reminder_time_fails_validation(self, app):
+        prefs = UserPreferences.create_default(1)
+        prefs.set_notification_setting('reminder_time', '25:00')
+        assert prefs.validate() == (False, "Reminder time must be in HH:MM format")
+
+
+class TestLocalRanges:
+    """Tests for converting UTC windows to local minutes"""
+
+    def test_offset_zone(self):
+        start, end = _window(14)
+        assert _local_ranges(start, end, ZoneInfo('Asia/Kolkata')) == [(19 * 60 + 30, 19 * 60 + 45)]
+
+    def test_window_crossing_local_midnight(self):
+        start, end = _window(23, 50)
+        assert _local_ranges(start, end, timezone.utc) == [(23 * 60 + 50, 24 * 60), (0, 5)]
+
+    def test_daylight_saving_time(self):
+        winter = _local_ranges(*_window(14, day=date(2026, 1, 15)), ZoneInfo('America/New_York'))
+        summer = _local_ranges(*_window(14, day=date(2026, 7, 15)), ZoneInfo('America/New_York'))
+        assert winter == [(9 * 60, 9 * 60 + 15)]
+        assert summer == [(10 * 60, 10 * 60 + 15)]
+
+
+class TestScheduler:
+    """Tests for NotificationScheduler"""
+
+    def test_selects_users_by_local_reminder_time(self, app):
+        # 14:00 UTC in January is 09:00 in New York (EST)
+        window = _window(14, day=date(2026, 1, 15))
+        utc = _make_user('utc', tz='UTC', reminder='14:00', due=0)
+        new_york = _make_user('nyc', tz='America/New_York', reminder='09:05', due=0)
+        _make_user('tokyo', tz='Asia/Tokyo', reminder='09:00', due=0)
+        _make_user('off', tz='UTC', reminder=None, due=0)
+        _make_user('nothing_due', tz='UTC', reminder='14:10', due=0, new=0, future=2)
+
+        sink = ListSink()
+        sent = NotificationScheduler(db.session, sink).run_window(*window)
+
+        assert sent == 2
+        assert {n['user_id'] for n in sink.sent} == {utc.id, new_york.id}
+        by_user = {n['user_id']: n for n in sink.sent}
+        assert by_user[new_york.id]['reminder_time'] == '09:05'
+        assert by_user[new_york.id]['scheduled_for'] == '2026-01-15T14:15:00+00:00'
+
+    def test_due_count_matches_due_cards(self, app):
+        user = _make_user('alice', due=3, new=2, future=4)
+        scheduler = NotificationScheduler(db.session, ListSink())
+
+        due, new = scheduler.get_due_counts([user.id], datetime.utcnow())[user.id]
+
+        assert (due, new) == (3, 2)
+        assert due + new == len(SpacedRepetitionService(db.session).get_due_cards(user.id))
+
+    def test_due_count_capped_by_daily_limit(self, app):
+        _make_user('alice', due=3, new=2, review_limit=4, reminder='14:00')
+        sink = ListSink()
+        NotificationScheduler(db.session, sink).run_window(*_window(14))
+        assert sink.sent[0]['due_cards'] == 4
+
+    def test_query_count_independent_of_user_count(self, app):
+        def count_queries(user_count):
+            for index in range(user_count):
+                _make_user(f'user{user_count}_{index}', reminder='14:00', due=1, new=0)
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                sink = ListSink()
+                NotificationScheduler(db.session, sink, batch_size=100).run_window(*_window(14))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            db.session.query(UserPreferences).delete()
+            db.session.commit()
+            return len(statements), len(sink.sent)
+
+        few_queries, few_sent = count_queries(2)
+        many_queries, many_sent = count_queries(20)
+
+        assert (few_sent, many_sent) == (2, 20)
+        assert few_queries == many_queries
+
+    def test_file_sink_writes_json_lines(self, app, tmp_path):
+        user = _make_user('alice', reminder='14:00')
+        path = tmp_path / 'reminders.jsonl'
+
+        NotificationScheduler(db.session, create_sink(f'file:{path}')).run_window(*_window(14))
+
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)['user_id'] for line in lines] == [user.id]
+
+    def test_rejects_invalid_bucket_and_sink(self, app):
+        with pytest.raises(ValueError):
+            NotificationScheduler(db.session, ListSink(), bucket_minutes=7)
+        with pytest.raises(ValueError):
+            create_sink('carrier-pigeon')
+
+    def test_cli_runs_once(self, app, tmp_path):
+        path = tmp_path / 'reminders.jsonl'
+        result = app.test_cli_runner().invoke(
+            args=['notifications', 'run', '--once', '--sink', f'file:{path}']
+        )
+        assert result.exit_code == 0, result.output
@@ -0,0 +1,137 @@
+"""
+Unit tests for password hashing
+"""
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, password_hasher
+from app.models.user import User
+from app.utils.password_hashing import PasswordHasherBusy, hash_parameters
+
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+    password_hasher.shutdown()
+
+
+def _configure(app, **settings):
+    app.config.update(settings)
+    password_hasher.init_app(app)
+
+
+def _login(client, password='secret123'):
+    return client.post('/api/auth/login', json={'username': 'testuser', 'password': password})
+
+
+def _create_user(password_hash):
+    user = User(username='testuser', email='test@example.com', password_hash=password_hash)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+class TestPasswordHasher:
+    """Tests for PasswordHasher"""
+
+    def test_bcrypt_round_trip(self, app):
+        hashed = password_hasher.hash('secret123')
+        assert hash_parameters(hashed) == ('bcrypt', 4)
+        assert password_hasher.verify(hashed, 'secret123')
+        assert not password_hasher.verify(hashed, 'secret124')
+
+    def test_bcrypt_uses_whole_password(self, app):
+        # bcrypt alone ignores everything after 72 bytes
+        hashed = password_hasher.hash('x' * 72 + 'tail-one')
+        assert not password_hasher.verify(hashed, 'x' * 72 + 'tail-two')
+
+    @pytest.mark.parametrize('algorithm, cost_key, cost', [
+        ('pbkdf2', 'PASSWORD_PBKDF2_ITERATIONS', 1000),
+        ('scrypt', 'PASSWORD_SCRYPT_N', 1024),
+    ])
+    def test_configured_algorithm_and_cost(self, app, algorithm, cost_key, cost):
+        _configure(app, PASSWORD_HASH_ALGORITHM=algorithm, **{cost_key: cost})
+        hashed = password_hasher.hash('secret123')
+        assert hash_parameters(hashed) == (algorithm, cost)
+        assert password_hasher.verify(hashed, 'secret123')
+        assert not password_hasher.needs_rehash(hashed)
+
+    def test_needs_rehash_when_cost_changes(self, app):
+        hashed = password_hasher.hash('secret123')
+        _configure(app, PASSWORD_BCRYPT_ROUNDS=5)
+        assert password_hasher.needs_rehash(hashed)
+        assert password_hasher.verify(hashed, 'secret123')
+
+    def test_unknown_algorithm_rejected(self, app):
+        with pytest.raises(ValueError):
+            _configure(app, PASSWORD_HASH_ALGORITHM='md5')
+
+    def test_process_pool(self, app):
+        _configure(app, PASSWORD_HASH_WORKERS=1)
+        hashed = password_hasher.hash('secret123')
+        assert password_hasher.verify(hashed, 'secret123')
+        assert password_hasher._executor is not None
+
+    def test_busy_when_queue_is_full(self, app):
+        _configure(app, PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=0)
+        password_hasher._slots.acquire()
+        try:
+            with pytest.raises(PasswordHasherBusy):
+                password_hasher.hash('secret123')
+        finally:
+            password_hasher._slots.release()
+
+    def test_timed_out_job_keeps_its_slot(self, app):
+        """A job the caller stopped waiting for still counts until it finishes"""
+        _configure(app, PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=0,
+                   PASSWORD_HASH_TIMEOUT=0.001, PASSWORD_BCRYPT_ROUNDS=10)
+        with pytest.raises(PasswordHasherBusy, match='timed out'):
+            password_hasher.hash('secret123')
+        with pytest.raises(PasswordHasherBusy, match='in progress'):
+            password_hasher.hash('secret123')
+
+        # Released by the job itself once the pool has run it
+        assert password_hasher._slots.acquire(timeout=30)
+        password_hasher._slots.release()
+
+
+class TestLogin:
+    """Tests for hashing in the auth endpoints"""
+
+    def test_register_uses_configured_algorithm(self, client):
+        response = client.post('/api/auth/register', json={
+            'username': 'testuser', 'email': 'test@example.com', 'password': 'secret123'
+        })
+        assert response.status_code == 201
+        assert hash_parameters(User.query.one().password_hash) == ('bcrypt', 4)
+
+    def test_legacy_hash_upgraded_on_login(self, client):
+        user = _create_user(generate_password_hash('secret123'))
+
+        assert _login(client).status_code == 200
+
+        db.session.refresh(user)
+        assert hash_parameters(user.password_hash) == ('bcrypt', 4)
+        assert _login(client).status_code == 200
+
+    def test_failed_login_keeps_hash(self, client):
+        legacy = generate_password_hash('secret123')
+        user = _create_user(legacy)
+
+        assert _login(client, 'wrong-password').status_code == 401
+
+        db.session.refresh(user)
+        assert user.password_hash == legacy
+
+    def test_login_returns_503_when_busy(self, app, client):
+        _create_user(generate_password_hash('secret123'))
+        _configure(app, PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=0)
+        password_hasher._slots.acquire()
+        try:
+            assert _login(client).status_code == 503
+        finally:
+            password_hasher._slots.release()
@@ -0,0 +1,117 @@
+"""
+Query plan checks for the hot review and session queries
+
+Runs the real service/route code on seeded data, captures the SQL it issues and
+fails if SQLite's EXPLAIN QUERY PLAN shows a full scan of card_reviews or
+study_sessions, or if the index added for the query shape is not used.
+"""
+import re
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.study_session import StudySession
+from app.services.spaced_repetition import SpacedRepetitionService
+from app.services.review_archive import ReviewArchiveService
+
+
+HOT_TABLES = ('card_reviews', 'study_sessions')
+
+
+@pytest.fixture
+def seeded(app):
+    """Several users with cards, review history and finished sessions"""
+    now = datetime.utcnow()
+    users = []
+    for u in range(5):
+        user = User(username=f'user{u}', email=f'user{u}@example.com')
+        user.set_password('testpass')
+        db.session.add(user)
+        db.session.flush()
+        deck = Deck(title=f'Deck {u}', user_id=user.id)
+        db.session.add(deck)
+        db.session.flush()
+        for c in range(40):
+            card = Card(deck_id=deck.id, front_content=f'Q{c}', back_content=f'A{c}')
+            db.session.add(card)
+            db.session.flush()
+            for r in range(5):
+                reviewed_at = now - timedelta(days=r * 3 + c % 3)
+                db.session.add(CardReview(
+                    card_id=card.id, user_id=user.id, quality=(c + r) % 6,
+                    reviewed_at=reviewed_at, next_review=reviewed_at + timedelta(days=2)
+                ))
+        for s in range(30):
+            start = now - timedelta(days=s)
+            db.session.add(StudySession(
+                user_id=user.id, deck_id=deck.id, start_time=start,
+                end_time=start + timedelta(minutes=10)
+            ))
+        users.append(user)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    return users
+
+
+def _plan(statement, parameters):
+    """EXPLAIN QUERY PLAN detail lines of a statement"""
+    plan = db.session.connection().exec_driver_sql(
+        f'EXPLAIN QUERY PLAN {statement}', parameters or ()
+    )
+    return [row[-1] for row in plan]
+
+
+def _assert_index_searches(statements, expected_indexes):
+    """Fail on full scans of hot tables and require the expected indexes to be used"""
+    hot = [(s, p) for s, p in statements if any(t in s for t in HOT_TABLES)]
+    assert hot, 'expected queries on the hot tables'
+
+    used = []
+    for statement, parameters in hot:
+        plan = _plan(statement, parameters)
+        scans = [line for line in plan if re.match(rf"SCAN ({'|'.join(HOT_TABLES)})\b", line)]
+        assert scans == [], statement
+        used.extend(plan)
+
+    for index in expected_indexes:
+        assert any(index in line for line in used), f'{index} not used'
+
+
+def test_due_cards_and_latest_review(seeded, selects):
+    user = seeded[0]
+    service = SpacedRepetitionService(db.session)
+    card = Card.query.join(Deck).filter(Deck.user_id == user.id).first()
+    del selects[:]
+
+    service.get_due_cards(user.id)
+    service.get_latest_review(card.id, user.id)
+
+    _assert_index_searches(selects, ['idx_review_user_card_time'])
+
+
+def test_review_stats_and_streak_dates(seeded, selects):
+    user = seeded[1]
+    del selects[:]
+
+    SpacedRepetitionService(db.session).get_review_stats(user.id)
+    ReviewArchiveService(db.session).get_review_dates(user.id)
+
+    _assert_index_searches(selects, ['idx_review_user_day'])
+
+
+def test_active_session_lookup(app, seeded, selects):
+    user = seeded[2]
+    db.session.add(StudySession(user_id=user.id, deck_id=user.decks.first().id))
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    del selects[:]
+
+    response = app.test_client().get('/api/study/session/current', headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['session'] is not None
+    _assert_index_searches(selects, ['idx_session_active'])
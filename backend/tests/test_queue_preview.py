@@ -0,0 +1,104 @@
+"""
+Unit tests for the next-interval preview of queued cards
+"""
+import random
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_state import CardState
+from app.services.spaced_repetition import (
+    NEW_CARD_STATE, SpacedRepetitionService, calculate_sm2, preview_sm2_batch
+)
+
+
+@pytest.fixture
+def user(app):
+    """User with three due cards in different states and two new cards"""
+    now = datetime.utcnow()
+    user = User(username='testuser', email='test@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    deck = Deck(title='Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    cards = [Card(deck_id=deck.id, front_content=f'Q{i}', back_content='A') for i in range(5)]
+    db.session.add_all(cards)
+    db.session.flush()
+    for card, (ease_factor, interval, repetitions) in zip(cards, [(2.5, 1, 1), (1.3, 6, 2), (2.8, 15, 4)]):
+        db.session.add(CardState(
+            card_id=card.id, user_id=user.id, ease_factor=ease_factor, interval=interval,
+            repetitions=repetitions, next_review=now - timedelta(hours=1)
+        ))
+    db.session.commit()
+    return user
+
+
+def _expected(state):
+    results = [calculate_sm2(quality, *state) for quality in range(6)]
+    return {
+        'intervals': [result['interval'] for result in results],
+        'ease_factors': [result['ease_factor'] for result in results],
+    }
+
+
+def test_batch_matches_calculate_sm2():
+    """Every quality of every state gives what calculate_sm2 gives"""
+    rng = random.Random(3)
+    states = [NEW_CARD_STATE] + [
+        (round(rng.uniform(1.3, 3.5), 2), rng.randint(1, 400), rng.randint(0, 12)) for _ in range(500)
+    ]
+
+    assert preview_sm2_batch(states) == [_expected(state) for state in states]
+
+
+def test_identical_states_are_computed_once():
+    """Cards sharing a state share the computed preview"""
+    previews = preview_sm2_batch([NEW_CARD_STATE, (2.5, 6, 2), NEW_CARD_STATE])
+
+    assert previews[0] is previews[2]
+    assert previews[0] == {'intervals': [1, 1, 1, 1, 1, 1], 'ease_factors': [1.7, 1.96, 2.18, 2.36, 2.5, 2.6]}
+
+
+def test_queue_preview(client, headers, user):
+    """Each queued card carries the preview of its own state; new cards use the first review state"""
+    response = client.get('/api/study/queue?preview=true', headers=headers)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    states = {state.card_id: (state.ease_factor, state.interval, state.repetitions)
+              for state in CardState.query.filter_by(user_id=user.id)}
+    for card in data['queue'] + data['due_cards'] + data['new_cards']:
+        assert card['preview'] == _expected(states.get(card['id'], NEW_CARD_STATE))
+    assert data['due_count'] == 5
+
+
+def test_preview_matches_submitted_review(client, headers, user):
+    """The previewed interval is what the review then schedules"""
+    card = client.get('/api/study/queue?preview=1', headers=headers).get_json()['queue'][2]
+
+    review = client.post('/api/study/review', json={'card_id': card['id'], 'quality': 4}, headers=headers)
+
+    assert review.get_json()['review']['interval'] == card['preview']['intervals'][4]
+    assert review.get_json()['review']['ease_factor'] == card['preview']['ease_factors'][4]
+
+
+def test_without_preview(client, headers, user):
+    """The queue is unchanged unless preview is requested"""
+    data = client.get('/api/study/queue', headers=headers).get_json()
+
+    assert all('preview' not in card for card in data['queue'])
+
+
+def test_preview_reads_states_from_the_due_index(app, user, statements, shared_cache):
+    """With the due index loaded, only unscheduled cards are looked up in card_states"""
+    service = SpacedRepetitionService(db.session)
+    service.get_study_queue(user.id)
+    statements.clear()
+
+    service.get_study_queue(user.id, preview=True)
+
+    state_queries = [sql for sql in statements if 'FROM card_states' in sql]
+    assert len(state_queries) == 1
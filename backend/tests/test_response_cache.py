@@ -0,0 +1,150 @@
+"""
+Unit tests for the response cache and its per-user invalidation
+"""
+import runpy
+import time
+from types import SimpleNamespace
+import pytest
+from app import db, response_cache
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.utils.cache import MemoryCacheBackend, SQLiteCacheBackend
+from config import ProductionConfig, config
+
+
+@pytest.fixture
+def deck(app, user_with_preferences):
+    """Create test deck"""
+    deck = Deck(title='Test Deck', user_id=user_with_preferences.id)
+    db.session.add(deck)
+    db.session.commit()
+    return deck
+
+
+class TestMemoryCacheBackend:
+    """Tests for the in-process LRU backend"""
+
+    def test_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set('a', 1, ttl=60)
+        backend.set('b', 2, ttl=60)
+        backend.get('a')  # 'a' becomes most recently used
+        backend.set('c', 3, ttl=60)
+
+        assert backend.get('a') == 1
+        assert backend.get('b') is None
+        assert backend.get('c') == 3
+
+    def test_ttl_expiry(self):
+        backend = MemoryCacheBackend()
+        backend.set('a', 1, ttl=0)
+        time.sleep(0.01)
+
+        assert backend.get('a') is None
+
+    def test_versions(self):
+        backend = MemoryCacheBackend()
+        assert backend.get_versions(1, ['cards', 'decks']) == (0, 0)
+
+        backend.bump_versions(1, ['cards'])
+
+        assert backend.get_versions(1, ['cards', 'decks']) == (1, 0)
+        assert backend.get_versions(2, ['cards']) == (0,)
+
+
+class TestSQLiteCacheBackend:
+    """Tests for the shared local store backend"""
+
+    def test_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        first = SQLiteCacheBackend(path)
+        second = SQLiteCacheBackend(path)
+
+        first.set('key', {'value': 1}, ttl=60)
+        first.bump_versions(7, ['reviews'])
+
+        assert second.get('key') == {'value': 1}
+        assert second.get_versions(7, ['reviews', 'cards']) == (1, 0)
+
+
+class TestResponseCache:
+    """Tests for cached endpoints and version-based invalidation"""
+
+    def test_second_request_is_served_from_cache(self, client, headers, deck):
+        first = client.get('/api/decks', headers=headers)
+        second = client.get('/api/decks', headers=headers)
+
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert first.get_json() == second.get_json()
+
+    def test_params_are_part_of_key(self, client, headers, deck):
+        client.get('/api/decks', headers=headers)
+        response = client.get('/api/decks?per_page=5', headers=headers)
+
+        assert response.headers['X-Cache'] == 'MISS'
+
+    def test_card_write_invalidates_deck_list(self, client, headers, deck):
+        client.get('/api/decks', headers=headers)
+
+        db.session.add(Card(front_content='Q', back_content='A', deck_id=deck.id))
+        db.session.commit()
+
+        response = client.get('/api/decks', headers=headers)
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json()['items'][0]['card_count'] == 1
+
+    def test_review_write_only_invalidates_dependent_scopes(self, client, headers, user, deck):
+        card = Card(front_content='Q', back_content='A', deck_id=deck.id)
+        db.session.add(card)
+        db.session.commit()
+        client.get('/api/decks', headers=headers)
+        client.get('/api/reviews/stats', headers=headers)
+
+        db.session.add(CardReview(card_id=card.id, user_id=user.id, quality=4))
+        db.session.commit()
+
+        assert client.get('/api/decks', headers=headers).headers['X-Cache'] == 'HIT'
+        stats = client.get('/api/reviews/stats', headers=headers)
+        assert stats.headers['X-Cache'] == 'MISS'
+        assert stats.get_json()['reviewed_today'] == 1
+
+    def test_other_users_writes_do_not_invalidate(self, client, headers, user, deck):
+        client.get('/api/decks', headers=headers)
+
+        other = User(username='other', email='other@example.com')
+        other.set_password('testpass')
+        db.session.add(other)
+        db.session.commit()
+        db.session.add(Deck(title='Other Deck', user_id=other.id))
+        db.session.commit()
+
+        assert client.get('/api/decks', headers=headers).headers['X-Cache'] == 'HIT'
+
+    def test_rollback_does_not_invalidate(self, client, headers, user, deck):
+        client.get('/api/decks', headers=headers)
+        before = response_cache.versions(user.id, ['decks'])
+
+        deck.title = 'Renamed'
+        db.session.flush()
+        db.session.rollback()
+
+        assert response_cache.versions(user.id, ['decks']) == before
+
+
+def test_multi_worker_serving_needs_shared_backend(monkeypatch):
+    """Production shares the cache between workers; gunicorn rejects per-process caches"""
+    on_starting = runpy.run_path('gunicorn.conf.py')['on_starting']
+    server = SimpleNamespace(cfg=SimpleNamespace(workers=4))
+    assert ProductionConfig.RESPONSE_CACHE_BACKEND == 'sqlite'
+    assert SQLiteCacheBackend.shared and not MemoryCacheBackend.shared
+
+    monkeypatch.setenv('FLASK_ENV', 'production')
+    on_starting(server)
+
+    monkeypatch.setattr(config['production'], 'RESPONSE_CACHE_BACKEND', 'memory')
+    with pytest.raises(RuntimeError):
+        on_starting(server)
+    on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=1)))
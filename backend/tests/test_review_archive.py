@@ -0,0 +1,115 @@
+"""
+Unit tests for review history archival
+"""
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.review_archive import CardReviewSummary, ReviewDailyActivity
+from app.services.review_archive import ReviewArchiveService, partition_name
+
+
+@pytest.fixture
+def cards(app, user):
+    """Deck with two cards: one with old history, one reviewed once long ago"""
+    deck = Deck(title='Test Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    history = Card(deck_id=deck.id, front_content='Q1', back_content='A1')
+    single = Card(deck_id=deck.id, front_content='Q2', back_content='A2')
+    db.session.add_all([history, single])
+    db.session.flush()
+
+    now = datetime.utcnow()
+    # Three consecutive days a year and a half ago, then one recent review
+    for days_ago, quality in ((500, 2), (499, 4), (498, 5), (1, 4)):
+        db.session.add(CardReview(
+            card_id=history.id, user_id=user.id, quality=quality,
+            reviewed_at=now - timedelta(days=days_ago)
+        ))
+    db.session.add(CardReview(
+        card_id=single.id, user_id=user.id, quality=3,
+        reviewed_at=now - timedelta(days=600)
+    ))
+    db.session.commit()
+    return history, single
+
+
+def _snapshot(client, headers, deck_id):
+    """API values that archival must not change"""
+    cards = client.get(f'/api/decks/{deck_id}/cards', headers=headers).get_json()['items']
+    deck_stats = client.get(f'/api/analytics/deck/{deck_id}', headers=headers).get_json()
+    streak = client.get('/api/analytics/streak', headers=headers).get_json()
+    return (
+        sorted((c['id'], c['review_count']) for c in cards),
+        deck_stats['average_accuracy'],
+        deck_stats['mastery_levels'],
+        streak['longest_streak'],
+        streak['current_streak']
+    )
+
+
+class TestArchiveReviews:
+    """Tests for ReviewArchiveService.archive_reviews"""
+
+    def test_archives_old_reviews_but_keeps_latest(self, app, user, cards):
+        history, single = cards
+        result = ReviewArchiveService(db.session).archive_reviews(older_than_days=365)
+
+        assert result == {'archived': 3, 'batches': 1}
+        assert CardReview.query.filter_by(card_id=history.id).count() == 1
+        assert CardReview.query.filter_by(card_id=single.id).count() == 1
+
+        summary = CardReviewSummary.query.filter_by(card_id=history.id).one()
+        assert (summary.review_count, summary.correct_count, summary.quality_sum) == (3, 2, 11)
+        assert ReviewDailyActivity.query.filter_by(user_id=user.id).count() == 3
+
+    def test_api_results_unchanged(self, client, headers, cards):
+        deck_id = cards[0].deck_id
+        before = _snapshot(client, headers, deck_id)
+
+        ReviewArchiveService(db.session).archive_reviews(older_than_days=365, batch_size=1)
+
+        assert _snapshot(client, headers, deck_id) == before
+        assert before[3] == 3  # Longest streak comes from archived days
+
+    def test_repeated_runs_accumulate(self, app, cards):
+        history, _ = cards
+        service = ReviewArchiveService(db.session)
+        service.archive_reviews(older_than_days=499)
+        service.archive_reviews(older_than_days=365)
+
+        summary = CardReviewSummary.query.filter_by(card_id=history.id).one()
+        assert summary.review_count == 3
+        assert summary.first_reviewed_at < summary.last_reviewed_at
+
+    def test_dry_run(self, app, cards):
+        result = ReviewArchiveService(db.session).archive_reviews(older_than_days=365, dry_run=True)
+
+        assert result['archived'] == 3
+        assert CardReview.query.count() == 5
+
+    def test_rejects_invalid_horizon(self, app):
+        with pytest.raises(ValueError):
+            ReviewArchiveService(db.session).archive_reviews(older_than_days=0)
+
+
+class TestReviewCommands:
+    """Tests for the flask reviews CLI group"""
+
+    def test_archive_command(self, app, cards):
+        result = app.test_cli_runner().invoke(args=['reviews', 'archive', '--older-than-days', '365'])
+
+        assert result.exit_code == 0
+        assert 'Archived 3 reviews' in result.output
+
+    def test_create_partitions_is_noop_without_postgresql(self, app):
+        result = app.test_cli_runner().invoke(args=['reviews', 'create-partitions'])
+
+        assert result.exit_code == 0
+        assert 'No partitions created' in result.output
+
+    def test_partition_name(self):
+        assert partition_name(datetime(2026, 3, 1).date()) == 'card_reviews_y2026m03'
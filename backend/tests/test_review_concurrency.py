@@ -0,0 +1,173 @@
+"""
+Unit tests for optimistic concurrency control of card scheduling state
+"""
+import pytest
+from sqlalchemy import create_engine, event, text
+from app import create_app, db
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.card_state import CardState
+from app.services.spaced_repetition import ReviewConflictError, SpacedRepetitionService
+from app.utils import rate_limit
+from config import TestingConfig
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create test application on a database file other connections can write to"""
+    rate_limit._rate_limit_storage.clear()
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def card(app, user):
+    """Card in a deck of the test user"""
+    deck = Deck(title='Test Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    card = Card(deck_id=deck.id, front_content='Q', back_content='A')
+    db.session.add(card)
+    db.session.commit()
+    return card
+
+
+@pytest.fixture
+def other_client(app):
+    """Separate connection standing in for a concurrent request"""
+    engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    yield engine
+    engine.dispose()
+
+
+def _on_flush(listener, times=None):
+    """Run listener before the session's next flushes (all of them when times is None)"""
+    calls = []
+
+    def before_flush(session, flush_context, instances):
+        if times is None or len(calls) < times:
+            calls.append(1)
+            listener()
+
+    event.listen(db.session, 'before_flush', before_flush)
+    return calls, lambda: event.remove(db.session, 'before_flush', before_flush)
+
+
+class TestVersionedState:
+    """Tests for CardState versions"""
+
+    def test_each_review_increments_version(self, client, headers, card):
+        for expected in (1, 2, 3):
+            response = client.post('/api/reviews', json={'card_id': card.id, 'quality': 4}, headers=headers)
+            assert response.status_code == 201
+            assert response.get_json()['review']['version'] == expected
+
+        state = CardState.query.filter_by(card_id=card.id).one()
+        latest = CardReview.query.order_by(CardReview.id.desc()).first()
+        assert (state.version, state.interval, state.next_review) == (3, latest.interval, latest.next_review)
+
+    def test_stale_expected_version_returns_current_state(self, client, headers, card):
+        body = {'card_id': card.id, 'quality': 4, 'expected_version': 0}
+        assert client.post('/api/study/review', json=body, headers=headers).status_code == 201
+
+        # Second client still shows the never-reviewed card
+        response = client.post('/api/study/review', json=body, headers=headers)
+
+        assert response.status_code == 409
+        assert response.get_json()['current_state']['version'] == 1
+        assert CardReview.query.count() == 1
+
+    def test_matching_expected_version_is_applied(self, client, headers, card):
+        client.post('/api/reviews', json={'card_id': card.id, 'quality': 4}, headers=headers)
+        response = client.post(
+            '/api/reviews', json={'card_id': card.id, 'quality': 5, 'expected_version': 1}, headers=headers
+        )
+        assert response.status_code == 201
+        assert response.get_json()['previous_state']['repetitions'] == 1
+
+    def test_state_created_from_existing_reviews(self, app, card, user):
+        db.session.add(CardReview(
+            card_id=card.id, user_id=user.id, quality=4,
+            ease_factor=2.6, interval=6, repetitions=2
+        ))
+        db.session.commit()
+
+        result = SpacedRepetitionService(db.session).process_review(card.id, user.id, 5)
+
+        assert result['previous_state'] == {'ease_factor': 2.6, 'interval': 6, 'repetitions': 2}
+        assert result['version'] == 1
+
+
+class TestConcurrentReviews:
+    """Tests for reviews racing with another request"""
+
+    def test_concurrent_update_is_retried_on_new_state(self, app, card, user, other_client):
+        service = SpacedRepetitionService(db.session)
+        service.process_review(card.id, user.id, 4)
+
+        def concurrent_review():
+            with other_client.begin() as conn:
+                conn.execute(text(
+                    'UPDATE card_states SET repetitions = 5, version = version + 1 WHERE card_id = :id'
+                ), {'id': card.id})
+
+        calls, remove = _on_flush(concurrent_review, times=1)
+        try:
+            result = service.process_review(card.id, user.id, 4)
+        finally:
+            remove()
+
+        assert len(calls) == 1
+        # Recomputed from the state written by the other request
+        assert result['previous_state']['repetitions'] == 5
+        assert result['version'] == 3
+        assert CardReview.query.count() == 2
+
+    def test_concurrent_first_review_is_retried(self, app, card, user, other_client):
+        def concurrent_first_review():
+            with other_client.begin() as conn:
+                conn.execute(text(
+                    'INSERT INTO card_states (user_id, card_id, ease_factor, interval, repetitions, version, updated_at) '
+                    'VALUES (:user_id, :card_id, 2.5, 1, 1, 1, CURRENT_TIMESTAMP)'
+                ), {'user_id': user.id, 'card_id': card.id})
+
+        calls, remove = _on_flush(concurrent_first_review, times=1)
+        try:
+            result = SpacedRepetitionService(db.session).process_review(card.id, user.id, 4)
+        finally:
+            remove()
+
+        assert result['previous_state']['repetitions'] == 1
+        assert result['version'] == 2
+
+    def test_conflict_after_retries(self, app, client, headers, card, user, other_client):
+        app.config['REVIEW_CONFLICT_RETRIES'] = 2
+        SpacedRepetitionService(db.session).process_review(card.id, user.id, 4)
+
+        def concurrent_review():
+            with other_client.begin() as conn:
+                conn.execute(text('UPDATE card_states SET version = version + 1'))
+
+        calls, remove = _on_flush(concurrent_review)
+        try:
+            response = client.post('/api/study/review', json={'card_id': card.id, 'quality': 4}, headers=headers)
+        finally:
+            remove()
+
+        assert len(calls) == 3
+        assert response.status_code == 409
+        assert response.get_json()['current_state']['version'] == 4
+        assert CardReview.query.count() == 1
+
+    def test_service_raises_conflict(self, app, card, user):
+        service = SpacedRepetitionService(db.session)
+        service.process_review(card.id, user.id, 4)
+        with pytest.raises(ReviewConflictError) as excinfo:
+            service.process_review(card.id, user.id, 4, expected_version=0)
+        assert excinfo.value.current_state['version'] == 1
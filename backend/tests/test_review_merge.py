@@ -0,0 +1,149 @@
+"""
+Unit tests for merging late (offline) reviews into a card's history
+"""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import db
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.card_state import CardState
+from app.models.review_archive import CardReviewSummary
+from app.services.spaced_repetition import NEW_CARD_STATE, SpacedRepetitionService, calculate_sm2
+from app.utils.due_index import get_due_index
+
+
+@pytest.fixture
+def card(user):
+    """A card of the test user"""
+    deck = Deck(title='Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    card = Card(deck_id=deck.id, front_content='Q', back_content='A')
+    db.session.add(card)
+    db.session.commit()
+    return card
+
+
+def _days_ago(days):
+    return datetime.utcnow().replace(microsecond=0) - timedelta(days=days)
+
+
+def _replay(reviews):
+    """SM-2 states of (reviewed_at, quality) reviews applied in time order"""
+    state, chain = NEW_CARD_STATE, []
+    for reviewed_at, quality in sorted(reviews):
+        result = calculate_sm2(quality, *state, reviewed_at=reviewed_at)
+        state = (result['ease_factor'], result['interval'], result['repetitions'])
+        chain.append(state + (result['next_review'],))
+    return chain
+
+
+def _history(user, card):
+    reviews = CardReview.query.filter_by(user_id=user.id, card_id=card.id).order_by(CardReview.reviewed_at)
+    return [(r.ease_factor, r.interval, r.repetitions, r.next_review) for r in reviews]
+
+
+def test_late_review_replays_later_history(app, user, card):
+    """Inserting a review gives the history and state of reviewing in time order"""
+    service = SpacedRepetitionService(db.session)
+    online = [(_days_ago(30), 4), (_days_ago(20), 5), (_days_ago(10), 3), (_days_ago(2), 5)]
+    for reviewed_at, quality in online:
+        service.process_review(card.id, user.id, quality, reviewed_at=reviewed_at)
+    version = CardState.query.filter_by(user_id=user.id, card_id=card.id).one().version
+
+    late = (_days_ago(25), 1)
+    result = service.process_review(card.id, user.id, late[1], reviewed_at=late[0])
+
+    expected = _replay(online + [late])
+    assert _history(user, card) == expected
+    state = CardState.query.filter_by(user_id=user.id, card_id=card.id).one()
+    assert (state.ease_factor, state.interval, state.repetitions, state.next_review) == expected[-1]
+    assert state.last_reviewed_at == online[-1][0]
+    assert state.version == version + 1
+    assert result['replayed_reviews'] == 3
+    assert result['previous_state'] == dict(zip(('ease_factor', 'interval', 'repetitions'), expected[0][:3]))
+    assert (result['ease_factor'], result['interval'], result['repetitions']) == expected[1][:3]
+
+
+def test_only_later_reviews_are_rewritten(app, user, card, statements):
+    """Reviews before the insertion point are neither loaded nor updated"""
+    service = SpacedRepetitionService(db.session)
+    for days in range(16, 0, -2):
+        service.process_review(card.id, user.id, 4, reviewed_at=_days_ago(days))
+    statements.clear()
+
+    result = service.process_review(card.id, user.id, 2, reviewed_at=_days_ago(5))
+
+    assert result['replayed_reviews'] == 2
+    updates = [sql for sql in statements if sql.startswith('UPDATE card_reviews')]
+    assert len(updates) == 1
+    assert _history(user, card) == _replay(
+        [(_days_ago(days), 4) for days in range(16, 0, -2)] + [(_days_ago(5), 2)]
+    )
+
+
+def test_review_before_all_history(app, user, card):
+    """A review older than every stored review starts from a new card's state"""
+    service = SpacedRepetitionService(db.session)
+    service.process_review(card.id, user.id, 5, reviewed_at=_days_ago(3))
+
+    result = service.process_review(card.id, user.id, 0, reviewed_at=_days_ago(9))
+
+    assert result['previous_state'] == dict(zip(('ease_factor', 'interval', 'repetitions'), NEW_CARD_STATE))
+    assert _history(user, card) == _replay([(_days_ago(3), 5), (_days_ago(9), 0)])
+
+
+def test_merge_updates_due_index(app, user, card, shared_cache):
+    """The committed merge moves the card in the due index to its replayed schedule"""
+    service = SpacedRepetitionService(db.session)
+    for days in (12, 6):
+        service.process_review(card.id, user.id, 5, reviewed_at=_days_ago(days))
+    index = get_due_index(user.id)
+
+    service.process_review(card.id, user.id, 0, reviewed_at=_days_ago(8))
+
+    state = CardState.query.filter_by(user_id=user.id, card_id=card.id).one()
+    assert get_due_index(user.id) is index
+    assert index.states([card.id])[card.id] == (state.ease_factor, state.interval, state.repetitions)
+    assert [c.id for c in service.get_due_cards(user.id)] == [card.id]
+
+
+def test_insertion_into_archived_history_is_rejected(client, headers, user, card):
+    """Archived reviews keep no SM-2 state, so nothing can be replayed from them"""
+    service = SpacedRepetitionService(db.session)
+    service.process_review(card.id, user.id, 4, reviewed_at=_days_ago(5))
+    db.session.add(CardReviewSummary(
+        user_id=user.id, card_id=card.id, review_count=3, correct_count=3, quality_sum=12,
+        first_reviewed_at=_days_ago(100), last_reviewed_at=_days_ago(60)
+    ))
+    db.session.commit()
+
+    response = client.post('/api/reviews', json={
+        'card_id': card.id, 'quality': 3, 'reviewed_at': _days_ago(70).isoformat()
+    }, headers=headers)
+
+    assert response.status_code == 400
+    assert CardReview.query.filter_by(card_id=card.id).count() == 1
+
+
+def test_api_accepts_client_timestamps(client, headers, user, card):
+    """Both review endpoints take reviewed_at; future and timezone-aware times are normalised"""
+    first = client.post('/api/study/review', json={
+        'card_id': card.id, 'quality': 4,
+        'reviewed_at': (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    }, headers=headers)
+    future = client.post('/api/reviews', json={
+        'card_id': card.id, 'quality': 5, 'reviewed_at': (datetime.utcnow() + timedelta(days=3)).isoformat()
+    }, headers=headers)
+    late = client.post('/api/reviews', json={
+        'card_id': card.id, 'quality': 2, 'reviewed_at': _days_ago(4).isoformat()
+    }, headers=headers)
+    invalid = client.post('/api/reviews', json={'card_id': card.id, 'quality': 2, 'reviewed_at': 'yesterday'},
+                          headers=headers)
+
+    assert first.status_code == 201 and first.get_json()['replayed_reviews'] == 0
+    assert datetime.fromisoformat(first.get_json()['review']['reviewed_at']) < _days_ago(1)
+    assert datetime.fromisoformat(future.get_json()['review']['reviewed_at']) <= datetime.utcnow()
+    assert late.status_code == 201 and late.get_json()['replayed_reviews'] == 2
+    assert invalid.status_code == 400
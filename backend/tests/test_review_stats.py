@@ -0,0 +1,143 @@
+"""
+Unit tests for the single-query review statistics
+"""
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.user import User
+from app.models.user_preferences import UserPreferences
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.card_state import CardState
+from app.services.spaced_repetition import SpacedRepetitionService
+
+
+@pytest.fixture
+def decks(app, user):
+    """
+    Two decks with a mix of card states, an empty deck, and reviews by another user.
+
+    Deck A: 2 new, 1 overdue (reviewed twice, once today), 1 due later
+    Deck B: 1 new, 2 overdue
+    """
+    now = datetime.utcnow()
+    other = User(username='other', email='other@example.com', password_hash='x')
+    db.session.add(other)
+    deck_a = Deck(title='A', user_id=user.id)
+    deck_b = Deck(title='B', user_id=user.id)
+    empty = Deck(title='Empty', user_id=user.id)
+    db.session.add_all([deck_a, deck_b, empty])
+    db.session.flush()
+
+    def card(deck):
+        card = Card(deck_id=deck.id, front_content='Q', back_content='A')
+        db.session.add(card)
+        db.session.flush()
+        return card
+
+    def review(card, reviewed_at, next_review, user_id=user.id):
+        db.session.add(CardReview(
+            card_id=card.id, user_id=user_id, quality=4,
+            reviewed_at=reviewed_at, next_review=next_review
+        ))
+        # Reviews are made in order; the state follows the latest one
+        state = CardState.query.filter_by(card_id=card.id, user_id=user_id).first()
+        if state is None:
+            state = CardState(card_id=card.id, user_id=user_id)
+            db.session.add(state)
+        state.next_review = next_review
+        state.last_reviewed_at = reviewed_at
+
+    card(deck_a)
+    new_a = card(deck_a)
+    review(new_a, now, now - timedelta(days=1), user_id=other.id)
+    overdue_a = card(deck_a)
+    review(overdue_a, now - timedelta(days=5), now - timedelta(days=4))
+    review(overdue_a, now, now - timedelta(hours=1))
+    later_a = card(deck_a)
+    review(later_a, now - timedelta(days=2), now + timedelta(days=3))
+
+    card(deck_b)
+    for _ in range(2):
+        review(card(deck_b), now - timedelta(days=3), now - timedelta(days=1))
+    db.session.commit()
+    return deck_a, deck_b, empty
+
+
+def test_user_stats(app, user, decks):
+    """Counts cover all decks; other users' reviews are ignored"""
+    stats = SpacedRepetitionService(db.session).get_review_stats(user.id)
+
+    assert stats == {
+        'total_cards': 7,
+        'due_cards': 6,
+        'reviewed_today': 1,
+        'cards_with_reviews': 4,
+        'new_cards': 3,
+    }
+
+
+def test_deck_stats(app, user, decks):
+    """deck_id restricts every count to that deck"""
+    deck_a, deck_b, empty = decks
+    service = SpacedRepetitionService(db.session)
+
+    assert service.get_review_stats(user.id, deck_a.id) == {
+        'total_cards': 4, 'due_cards': 3, 'reviewed_today': 1, 'cards_with_reviews': 2, 'new_cards': 2
+    }
+    assert service.get_review_stats(user.id, empty.id) == {
+        'total_cards': 0, 'due_cards': 0, 'reviewed_today': 0, 'cards_with_reviews': 0, 'new_cards': 0
+    }
+
+
+def test_matches_due_cards(app, user, decks):
+    """due_cards agrees with the study queue's due card selection"""
+    service = SpacedRepetitionService(db.session)
+
+    for deck_id in (None,) + tuple(deck.id for deck in decks):
+        assert service.get_review_stats(user.id, deck_id)['due_cards'] == len(service.get_due_cards(user.id, deck_id))
+
+
+def test_due_cards_capped_at_daily_limit(app, user, decks):
+    """due_cards never exceeds what the queue serves"""
+    db.session.add(UserPreferences(user_id=user.id, daily_review_limit=2))
+    db.session.commit()
+
+    assert SpacedRepetitionService(db.session).get_review_stats(user.id)['due_cards'] == 2
+
+
+def test_single_query(app, user, decks, statements):
+    """All counts come from one statement and no Card rows are loaded"""
+    SpacedRepetitionService(db.session).get_review_stats(user.id)
+
+    aggregate = [sql for sql in statements if 'card_reviews' in sql or 'FROM cards' in sql]
+    assert len(aggregate) == 1
+    assert 'cards.front_content' not in aggregate[0]
+
+
+def test_by_deck(app, user, decks, statements):
+    """One grouped query returns every deck, including empty ones"""
+    deck_a, deck_b, empty = decks
+    service = SpacedRepetitionService(db.session)
+    expected = {deck.id: service.get_review_stats(user.id, deck.id) for deck in decks}
+    del statements[:]
+
+    by_deck = service.get_review_stats_by_deck(user.id)
+
+    assert by_deck == expected
+    assert len([sql for sql in statements if 'card_reviews' in sql]) == 1
+
+
+def test_stats_endpoint_group_by_deck(client, user, decks):
+    """group_by=deck lists per-deck counts; other values are rejected"""
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    response = client.get('/api/reviews/stats?group_by=deck', headers=headers)
+
+    assert response.status_code == 200
+    rows = response.get_json()['decks']
+    assert [row['deck_id'] for row in rows] == sorted(deck.id for deck in decks)
+    assert sum(row['total_cards'] for row in rows) == 7
+    assert client.get('/api/reviews/stats?group_by=card', headers=headers).status_code == 400
@@ -0,0 +1,56 @@
+"""
+Startup import budget: modules that must not load when a worker boots
+"""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Migration tooling is only needed by `flask db`, rare services by their endpoints
+DEFERRED_MODULES = (
+    'alembic',
+    'flask_migrate',
+    'mako',
+    'app.services.card_import_export',
+    'app.services.card_generation',
+    'app.services.cloze_card',
+    'app.services.image_occlusion',
+    'app.services.notifications',
+    'app.services.study_pack',
+)
+
+
+def _startup_modules():
+    """Names of the modules imported while creating the app and serving /api/health"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         "from app import create_app\n"
+         "app = create_app('testing')\n"
+         "assert app.test_client().get('/api/health').status_code == 200\n"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return {
+        line.rsplit('|', 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and 'self [us]' not in line
+    }
+
+
+def test_deferred_modules_not_imported_at_startup():
+    modules = _startup_modules()
+    loaded = sorted(
+        name for name in modules
+        if any(name == deferred or name.startswith(deferred + '.') for deferred in DEFERRED_MODULES)
+    )
+    assert loaded == []
+
+
+def test_migrate_commands_still_available(tmp_path):
+    env = dict(os.environ, FLASK_APP='run.py', DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    result = subprocess.run(
+        [sys.executable, '-m', 'flask', 'db', 'heads'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert '(head)' in result.stdout
@@ -0,0 +1,230 @@
+"""
+Unit tests for streaming multipart imports
+"""
+import csv
+import gzip
+import io
+import json
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card, CardType
+from app.services.card_import_export import CardImportExportService, iter_csv_rows, iter_json_cards
+
+BOUNDARY = 'neuroflash-test-boundary'
+
+
+@pytest.fixture
+def deck(user):
+    """Empty deck"""
+    deck = Deck(title='Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.commit()
+    return deck
+
+
+@pytest.fixture
+def inserts(app):
+    """Parameter set counts of the INSERT statements into cards"""
+    batches = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO cards'):
+            batches.append(len(parameters) if executemany else 1)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield batches
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def _multipart(content, filename, fields=None):
+    """Multipart body with optional form fields followed by one file"""
+    body = b''
+    for name, value in (fields or {}).items():
+        body += (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                 f'{value}\r\n').encode()
+    body += (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+             f'Content-Type: application/octet-stream\r\n\r\n').encode()
+    return body + content + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def _upload(client, deck, headers, content, filename, fields=None, query='', **extra):
+    return client.post(
+        f'/api/decks/{deck.id}/import{query}', data=_multipart(content, filename, fields),
+        headers=dict(headers, **{'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'}, **extra)
+    )
+
+
+def _chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_csv_rows_across_chunks():
+    """Quoted newlines, multi-byte characters and a BOM survive arbitrary chunk boundaries"""
+    rows = [['Front', 'Back'], ['Qué', 'line one\nline two'], ['漢字', 'A, "quoted"']]
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    data = b'\xef\xbb\xbf' + output.getvalue().encode()
+
+    for size in (1, 3, 7, len(data)):
+        assert list(iter_csv_rows(_chunked(data, size))) == rows
+
+
+def test_json_cards_across_chunks():
+    """Array and export documents decode card by card whatever the chunking"""
+    cards = [{'front_content': f'Q{i} é', 'back_content': 'A', 'card_data': {'n': 1234567}} for i in range(5)]
+    documents = [
+        json.dumps(cards).encode(),
+        json.dumps({'deck': {'title': 'T', 'tags': ['a', {'b': '[]'}]}, 'cards': cards, 'total_cards': 5},
+                   indent=2).encode(),
+    ]
+
+    for data in documents:
+        for size in (1, 5, len(data)):
+            assert list(iter_json_cards(_chunked(data, size))) == cards
+
+
+@pytest.mark.parametrize('data', [b'{"cards": [{"front_content": "Q"}', b'[{"a": 1} {"b": 2}]',
+                                  b'{"deck": {}}', b'[1, 2]', b'"cards"'])
+def test_json_cards_malformed(data):
+    with pytest.raises(ValueError):
+        list(iter_json_cards(_chunked(data, 4)))
+
+
+def test_csv_upload(client, headers, deck, inserts):
+    """A large CSV upload is inserted in batches, skipping incomplete rows"""
+    lines = ['Front,Back,Type,Media Attachments']
+    lines += [f'Question {i},"Answer\n{i}",{"reverse" if i % 2 else ""},' for i in range(1200)]
+    lines += ['only front', ',missing front']
+    content = ('\r\n'.join(lines) + '\r\n').encode()
+
+    response = _upload(client, deck, headers, content, 'cards.csv')
+
+    assert response.status_code == 201
+    assert response.get_json()['imported'] == 1200
+    assert response.get_json()['skipped'] == 2
+    assert inserts == [500, 500, 200]
+    assert Card.query.filter_by(deck_id=deck.id).count() == 1200
+    card = Card.query.filter_by(front_content='Question 7').one()
+    assert card.back_content == 'Answer\n7' and card.card_type == CardType.REVERSE
+
+
+def test_json_export_round_trip(app, client, headers, deck):
+    """The JSON export of a deck imports back through the upload path"""
+    db.session.add_all([Card(deck_id=deck.id, front_content=f'Q{i}', back_content=f'A{i}',
+                             card_type=CardType.REVERSE, media_attachments=[f'{i}.png'])
+                        for i in range(30)])
+    db.session.commit()
+    exported = client.get(f'/api/decks/{deck.id}/export', headers=headers).get_data()
+
+    response = _upload(client, deck, headers, exported, 'export', fields={'format': 'json'})
+
+    assert response.status_code == 201
+    assert response.get_json()['imported'] == 30
+    copies = Card.query.filter_by(deck_id=deck.id, front_content='Q3').all()
+    assert len(copies) == 2
+    assert all(card.media_attachments == ['3.png'] and card.card_type == CardType.REVERSE for card in copies)
+
+
+def test_gzip_upload(client, headers, deck):
+    """A gzipped multipart body is decompressed as it is parsed"""
+    content = json.dumps([{'front_content': f'Q{i}', 'back_content': 'A'} for i in range(700)]).encode()
+    body = gzip.compress(_multipart(content, 'cards.json'))
+
+    response = client.post(
+        f'/api/decks/{deck.id}/import', data=body,
+        headers=dict(headers, **{'Content-Type': f'multipart/form-data; boundary={BOUNDARY}',
+                                 'Content-Encoding': 'gzip'})
+    )
+
+    assert response.status_code == 201
+    assert Card.query.filter_by(deck_id=deck.id).count() == 700
+
+
+def test_invalid_uploads(client, headers, deck):
+    """Malformed files are rejected"""
+    unknown = _upload(client, deck, headers, b'Front,Back\nQ,A\n', 'cards.txt')
+    bad_type = _upload(client, deck, headers, b'Front,Back,Type\nQ,A,flashy\n', 'cards.csv')
+    json_type = _upload(client, deck, headers, b'[{"front_content": "Q", "back_content": "A", "card_type": 1}]',
+                        'cards.json')
+    no_boundary = client.post(f'/api/decks/{deck.id}/import', data=b'x',
+                              headers=dict(headers, **{'Content-Type': 'multipart/form-data'}))
+
+    assert unknown.status_code == 400
+    assert bad_type.status_code == 400
+    assert json_type.status_code == 400 and 'card type' in json_type.get_json()['error']
+    assert no_boundary.status_code == 400
+    assert Card.query.filter_by(deck_id=deck.id).count() == 0
+
+
+def test_malformed_file_keeps_committed_batches(client, headers, deck):
+    """Batches before the malformed part stay imported, and the response says how many"""
+    content = json.dumps([{'front_content': f'Q{i}', 'back_content': 'A'} for i in range(600)]).encode()
+
+    response = _upload(client, deck, headers, content[:-20], 'cards.json')
+
+    assert response.status_code == 400
+    assert response.get_json()['imported'] == 500
+    assert Card.query.filter_by(deck_id=deck.id).count() == 500
+
+
+def test_truncated_upload_keeps_committed_batches(client, headers, deck):
+    """An upload cut off mid-body reports the batches it already committed"""
+    content = b'Front,Back\n' + b''.join(f'Q{i},A\n'.encode() for i in range(1200))
+    body = _multipart(content, 'cards.csv')
+
+    response = client.post(
+        f'/api/decks/{deck.id}/import', data=body[:-len(f'\r\n--{BOUNDARY}--\r\n')],
+        headers=dict(headers, **{'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'})
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()['imported'] == 1000
+    assert Card.query.filter_by(deck_id=deck.id).count() == 1000
+
+
+def test_oversized_upload_keeps_committed_batches(app, client, headers, deck):
+    """Passing the decompression cap mid-upload gives 413 with the committed count"""
+    app.wsgi_app.max_bytes = 128 * 1024
+    content = b'Front,Back\n' + b''.join(f'Q{i},A\n'.encode() for i in range(30000))
+
+    response = client.post(
+        f'/api/decks/{deck.id}/import', data=gzip.compress(_multipart(content, 'cards.csv')),
+        headers=dict(headers, **{'Content-Type': f'multipart/form-data; boundary={BOUNDARY}',
+                                 'Content-Encoding': 'gzip'})
+    )
+
+    assert response.status_code == 413
+    imported = response.get_json()['imported']
+    assert imported > 0 and imported % 500 == 0
+    assert Card.query.filter_by(deck_id=deck.id).count() == imported
+
+
+def test_no_transaction_while_reading_upload(app, user, deck):
+    """The upload is read between batches, with no transaction open"""
+    rows = b'Front,Back\n' + b''.join(f'Q{i},A\n'.encode() for i in range(1200))
+
+    def chunks():
+        for start in range(0, len(rows), 1000):
+            assert not db.session().in_transaction()
+            yield rows[start:start + 1000]
+
+    imported, skipped = CardImportExportService.import_card_stream(deck.id, 'csv', chunks(), user.id)
+
+    assert (imported, skipped) == (1200, 0)
+    assert not db.session().in_transaction()
+
+
+def test_upload_to_other_users_deck(app, client, deck):
+    other = User(username='other', email='other@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(other.id))}'}
+
+    response = _upload(client, deck, headers, b'Front,Back\nQ,A\n', 'cards.csv')
+
+    assert response.status_code == 400
+    assert Card.query.filter_by(deck_id=deck.id).count() == 0
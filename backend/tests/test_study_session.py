@@ -0,0 +1,135 @@
+"""
+Unit tests for study session accounting during review submission
+"""
+import pytest
+from sqlalchemy import event
+from app import db, response_cache
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.study_session import StudySession
+from app.services.study_session import StudySessionService
+
+
+@pytest.fixture
+def deck(app, user):
+    """Deck with three cards"""
+    deck = Deck(title='Test Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    db.session.add_all([
+        Card(deck_id=deck.id, front_content=f'Q{i}', back_content=f'A{i}') for i in range(3)
+    ])
+    db.session.commit()
+    return deck
+
+
+def _start_session(client, headers, deck):
+    response = client.post('/api/study/session/start', json={'deck_id': deck.id}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['session']['id']
+
+
+def _review(client, headers, card_id, quality):
+    response = client.post('/api/study/review', json={'card_id': card_id, 'quality': quality}, headers=headers)
+    assert response.status_code == 201
+    return response
+
+
+def _session(session_id):
+    db.session.expire_all()
+    return db.session.get(StudySession, session_id)
+
+
+class TestSubmitReview:
+    """Tests for session counters on POST /api/study/review"""
+
+    def test_counts_correct_and_incorrect_reviews(self, client, headers, deck):
+        session_id = _start_session(client, headers, deck)
+        cards = Card.query.filter_by(deck_id=deck.id).order_by(Card.id).all()
+
+        _review(client, headers, cards[0].id, 5)
+        _review(client, headers, cards[1].id, 1)
+        _review(client, headers, cards[2].id, 3)
+
+        session = _session(session_id)
+        assert (session.cards_studied, session.correct_count) == (3, 2)
+
+    def test_single_commit_per_review(self, app, client, headers, deck):
+        _start_session(client, headers, deck)
+        card_id = Card.query.filter_by(deck_id=deck.id).first().id
+        commits = []
+        listener = lambda session: commits.append(session)
+        event.listen(db.session, 'after_commit', listener)
+        try:
+            _review(client, headers, card_id, 4)
+        finally:
+            event.remove(db.session, 'after_commit', listener)
+
+        assert len(commits) == 1
+        assert CardReview.query.count() == 1
+
+    def test_review_without_session(self, client, headers, deck):
+        card_id = Card.query.filter_by(deck_id=deck.id).first().id
+        _review(client, headers, card_id, 4)
+        assert CardReview.query.count() == 1
+        assert StudySession.query.count() == 0
+
+    def test_stale_cached_session_is_replaced(self, client, headers, deck, user):
+        first_id = _start_session(client, headers, deck)
+        card_id = Card.query.filter_by(deck_id=deck.id).first().id
+
+        # End the cached session behind the cache's back and start another one
+        _session(first_id).end_session()
+        second = StudySession(user_id=user.id, deck_id=deck.id)
+        db.session.add(second)
+        db.session.commit()
+
+        _review(client, headers, card_id, 4)
+
+        assert _session(first_id).cards_studied == 0
+        assert _session(second.id).cards_studied == 1
+
+    def test_ended_session_is_not_counted(self, client, headers, deck):
+        session_id = _start_session(client, headers, deck)
+        assert client.post('/api/study/session/end', headers=headers).status_code == 200
+        card_id = Card.query.filter_by(deck_id=deck.id).first().id
+
+        _review(client, headers, card_id, 4)
+
+        assert _session(session_id).cards_studied == 0
+
+    def test_invalidates_cached_session_responses(self, client, headers, deck, user):
+        _start_session(client, headers, deck)
+        card_id = Card.query.filter_by(deck_id=deck.id).first().id
+        before = response_cache.versions(user.id, ['sessions'])
+
+        _review(client, headers, card_id, 4)
+
+        assert response_cache.versions(user.id, ['sessions']) != before
+
+
+class TestStudySessionService:
+    """Tests for StudySessionService"""
+
+    def test_active_session_id_is_cached(self, app, deck, user):
+        session = StudySession(user_id=user.id, deck_id=deck.id)
+        db.session.add(session)
+        db.session.commit()
+        service = StudySessionService(db.session)
+
+        assert service.get_active_session_id(user.id) == session.id
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert service.get_active_session_id(user.id) == session.id
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert statements == []
+
+    def test_no_active_session(self, app, user):
+        service = StudySessionService(db.session)
+        assert service.get_active_session_id(user.id) is None
+        assert service.record_review(user.id, correct=True) is False
@@ -0,0 +1,182 @@
+"""
+Unit tests for offline study packs and review upload
+"""
+import gzip
+import json
+from datetime import datetime, timedelta
+import pytest
+from flask import g
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.user_preferences import UserPreferences
+from app.models.deck import Deck
+from app.models.card import Card
+from app.models.card_review import CardReview
+from app.models.card_state import CardState
+from app.services.study_pack import StudyPackService
+
+
+@pytest.fixture
+def user(app):
+    """
+    User introducing two new cards a day, with one deck of eight cards.
+
+    Cards 0-1 are overdue, 2-3 due in 3 and 10 days, 4-7 new; card 0 has an image.
+    """
+    now = datetime.utcnow()
+    user = User(username='testuser', email='test@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserPreferences(user_id=user.id, daily_review_limit=100, new_cards_per_day=2))
+    deck = Deck(title='Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    cards = [Card(deck_id=deck.id, front_content=f'Q{i}', back_content='A') for i in range(8)]
+    cards[0].media_attachments = ['images/heart.png']
+    db.session.add_all(cards)
+    db.session.flush()
+    for card, offset in zip(cards, (-2, -1, 3, 10)):
+        db.session.add(CardState(
+            card_id=card.id, user_id=user.id, ease_factor=2.5, interval=4, repetitions=2,
+            next_review=now + timedelta(days=offset)
+        ))
+    db.session.commit()
+    return user
+
+
+def _cards(user):
+    return Card.query.join(Deck).filter(Deck.user_id == user.id).order_by(Card.id).all()
+
+
+def _pack(response):
+    return json.loads(gzip.decompress(response.get_data()))
+
+
+def test_pack_covers_the_window(client, headers, user):
+    """Cards due in the window and the new cards it introduces, with states and media"""
+    cards = _cards(user)
+
+    response = client.get('/api/sync/study-pack?days=2', headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    assert response.mimetype_params['layout'] == 'application/json'
+    pack = _pack(response)
+    assert pack['days'] == 2 and pack['new_cards_per_day'] == 2
+    assert [deck['title'] for deck in pack['decks']] == ['Deck']
+    assert [card['id'] for card in pack['cards']] == [card.id for card in cards[:2] + cards[4:8]]
+    assert pack['cards'][0]['media_attachments'] == ['images/heart.png']
+    assert pack['cards'][0]['card_type'] == 'basic'
+    assert [state['card_id'] for state in pack['states']] == [cards[0].id, cards[1].id]
+    assert pack['states'][0]['version'] == 1
+
+
+def test_pack_window(app, user):
+    """A longer window adds later due cards; new cards stop at days * new_cards_per_day"""
+    cards = _cards(user)
+    service = StudyPackService(db.session)
+
+    pack = json.loads(gzip.decompress(service.build_pack(user.id, 4, 1)))
+
+    assert [card['id'] for card in pack['cards']] == [card.id for card in cards[:3] + cards[4:8]]
+    assert [state['card_id'] for state in pack['states']] == [card.id for card in cards[:3]]
+
+
+def test_one_query_per_entity_type(app, user, statements):
+    """Decks, cards and states are each read with a single statement"""
+    user_id = user.id
+    statements.clear()
+
+    StudyPackService(db.session).build_pack(user_id, 7, 20)
+
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+    assert len(selects) == 3
+
+
+def test_pack_cached_by_content_version(client, headers, user):
+    """Repeated downloads are served from the cache until the user's content changes"""
+    first = client.get('/api/sync/study-pack', headers=headers)
+    again = client.get('/api/sync/study-pack', headers=headers)
+    not_modified = client.get('/api/sync/study-pack', headers=dict(headers, **{'If-None-Match': first.headers['ETag']}))
+
+    card = _cards(user)[0]
+    client.post('/api/study/review', json={'card_id': card.id, 'quality': 5}, headers=headers)
+    g.pop('user_contexts', None)
+    changed = client.get('/api/sync/study-pack', headers=headers)
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert again.headers['X-Cache'] == 'HIT' and again.get_data() == first.get_data()
+    assert not_modified.status_code == 304
+    assert changed.headers['X-Cache'] == 'MISS'
+    assert _pack(changed)['versions'] != _pack(first)['versions']
+
+
+def test_invalid_days(client, headers, user):
+    for days in ('0', '31', 'week'):
+        assert client.get(f'/api/sync/study-pack?days={days}', headers=headers).status_code == 400
+
+
+def test_upload_reviews(client, headers, user):
+    """Reviews are applied oldest first; late ones merge and bad ones are rejected alone"""
+    cards = _cards(user)
+    now = datetime.utcnow()
+    reviews = [
+        {'card_id': cards[4].id, 'quality': 4, 'reviewed_at': (now - timedelta(hours=1)).isoformat()},
+        {'card_id': cards[4].id, 'quality': 3, 'reviewed_at': (now - timedelta(days=1)).isoformat() + 'Z'},
+        {'card_id': 999999, 'quality': 4, 'reviewed_at': now.isoformat()},
+        {'card_id': cards[0].id, 'quality': 5, 'expected_version': 7},
+    ]
+
+    response = client.post('/api/sync/reviews', json={'reviews': reviews}, headers=headers)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [result['status'] for result in data['results']] == ['applied', 'applied', 'rejected', 'conflict']
+    assert data['applied'] == 2
+    assert data['results'][0]['review']['replayed_reviews'] == 0
+    assert data['results'][3]['current_state']['version'] == 1
+    history = CardReview.query.filter_by(card_id=cards[4].id).order_by(CardReview.reviewed_at).all()
+    assert [review.quality for review in history] == [3, 4]
+
+
+def test_upload_time_bounded_per_review(client, headers, user, monkeypatch):
+    """Each review commits on its own, and every transaction runs under the study timeout"""
+    cards = _cards(user)
+    trace = []
+    monkeypatch.setattr('app.utils.db_pool._set_statement_timeout',
+                        lambda connection, timeout_ms: trace.append(('timeout', timeout_ms)))
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        trace.append(('sql', statement))
+
+    def record_commit(session):
+        trace.append(('commit', None))
+
+    reviews = [{'card_id': card.id, 'quality': 4} for card in cards[4:7]]
+    db.session.commit()
+    event.listen(db.engine, 'before_cursor_execute', record_statement)
+    event.listen(db.session, 'after_commit', record_commit)
+    try:
+        response = client.post('/api/sync/reviews', json={'reviews': reviews}, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_statement)
+        event.remove(db.session, 'after_commit', record_commit)
+
+    assert response.get_json()['applied'] == 3
+    transactions = [[]]
+    for kind, value in trace:
+        if kind == 'commit':
+            transactions.append([])
+        else:
+            transactions[-1].append((kind, value))
+    transactions = [transaction for transaction in transactions if transaction]
+    assert len(transactions) >= len(reviews)
+    assert all(transaction[0] == ('timeout', 2000) for transaction in transactions)
+
+
+def test_upload_validation(client, headers, user):
+    response = client.post('/api/sync/reviews', json={'reviews': [{'card_id': 1, 'quality': 9}]}, headers=headers)
+
+    assert response.status_code == 400
+    assert client.post('/api/sync/reviews', json={'reviews': []}, headers=headers).status_code == 400
@@ -0,0 +1,167 @@
+"""
+Unit tests for the cached user context (row, preferences and owned deck ids)
+"""
+import pytest
+from flask import g
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert, update
+from app import db, response_cache
+from app.models.user import User
+from app.models.user_preferences import UserPreferences
+from app.models.deck import Deck
+from app.models.card import Card
+from app.utils.user_context import get_user_context, owns_deck
+
+
+@pytest.fixture
+def user(app):
+    """User with preferences and one deck of five cards"""
+    user = User(username='testuser', email='test@example.com')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserPreferences(user_id=user.id, daily_review_limit=100, new_cards_per_day=3))
+    deck = Deck(title='Test Deck', user_id=user.id)
+    db.session.add(deck)
+    db.session.flush()
+    db.session.add_all([
+        Card(deck_id=deck.id, front_content=f'Q{i}', back_content=f'A{i}') for i in range(5)
+    ])
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def deck(user):
+    """The user's deck"""
+    return Deck.query.filter_by(user_id=user.id).one()
+
+
+def _count(statements, fragment):
+    return sum(1 for sql in statements if fragment in sql)
+
+
+def _next_request():
+    """Forget request-scoped contexts (pytest-flask keeps one request context per test)"""
+    g.pop('user_contexts', None)
+    db.session.expire_all()
+
+
+def test_queue_reads_preferences_once(client, headers, statements):
+    """get_study_queue and get_due_cards share one preferences lookup per request"""
+    response = client.get('/api/study/queue', headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['new_count'] == 3
+    assert _count(statements, 'FROM user_preferences') == 1
+
+
+def test_context_is_reused_across_requests(client, headers, statements):
+    """A second request needs no user, preferences or ownership queries"""
+    client.get('/api/study/queue', headers=headers)
+    statements.clear()
+
+    response = client.get('/api/study/queue', headers=headers)
+
+    assert response.status_code == 200
+    assert _count(statements, 'FROM user_preferences') == 0
+    assert _count(statements, 'FROM users') == 0
+
+
+def test_ownership_check_uses_cached_deck_ids(client, headers, deck, statements):
+    """Creating cards in an owned deck skips the per-request deck ownership query"""
+    client.post(f'/api/decks/{deck.id}/cards', json={'front_content': 'Q', 'back_content': 'A'}, headers=headers)
+    statements.clear()
+
+    response = client.post(
+        f'/api/decks/{deck.id}/cards', json={'front_content': 'Q2', 'back_content': 'A2'}, headers=headers
+    )
+
+    assert response.status_code == 201
+    assert _count(statements, 'decks.user_id = ?') == 0
+
+
+def test_foreign_deck_is_rejected(client, headers, app):
+    """Decks of other users are not found"""
+    other = User(username='other', email='other@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.flush()
+    foreign = Deck(title='Foreign', user_id=other.id)
+    db.session.add(foreign)
+    db.session.commit()
+
+    response = client.post(f'/api/decks/{foreign.id}/cards', json={'front_content': 'Q'}, headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_new_deck_is_owned_immediately(client, headers, user):
+    """Creating a deck evicts the cached deck ids"""
+    assert client.get('/api/study/queue', headers=headers).status_code == 200
+
+    deck_id = client.post('/api/decks', json={'title': 'New'}, headers=headers).get_json()['id']
+    response = client.post(f'/api/decks/{deck_id}/cards', json={'front_content': 'Q', 'back_content': 'A'}, headers=headers)
+
+    assert response.status_code == 201
+
+
+def test_deck_created_outside_the_session_is_found(app, user):
+    """Ownership misses are re-checked, e.g. for decks created by another worker"""
+    get_user_context(user.id)
+    _next_request()
+    with db.engine.begin() as conn:
+        deck_id = conn.execute(
+            insert(Deck).values(title='Elsewhere', user_id=user.id, is_public=False).returning(Deck.id)
+        ).scalar()
+
+    assert owns_deck(user.id, deck_id)
+    assert deck_id in get_user_context(user.id).deck_ids
+    assert not owns_deck(user.id, deck_id + 1)
+
+
+def test_preference_change_is_seen_after_commit(client, headers, user):
+    """Committing new preferences evicts the cached context"""
+    assert client.get('/api/study/queue', headers=headers).get_json()['new_count'] == 3
+
+    preferences = UserPreferences.query.filter_by(user_id=user.id).one()
+    preferences.new_cards_per_day = 1
+    db.session.commit()
+
+    assert client.get('/api/study/queue', headers=headers).get_json()['new_count'] == 1
+
+
+def test_version_bump_from_another_worker_invalidates(app, user):
+    """Contexts are keyed by the shared preferences/profile/decks version counters"""
+    assert get_user_context(user.id).preference('new_cards_per_day', 20) == 3
+    with db.engine.begin() as conn:
+        conn.execute(update(UserPreferences).where(UserPreferences.user_id == user.id).values(new_cards_per_day=7))
+    _next_request()
+    assert get_user_context(user.id).preference('new_cards_per_day', 20) == 3
+
+    response_cache.bump(user.id, ['preferences'])
+    _next_request()
+
+    assert get_user_context(user.id).preference('new_cards_per_day', 20) == 7
+
+
+def test_ttl_zero_disables_process_cache(app, user, statements):
+    """USER_CONTEXT_CACHE_TTL=0 loads the context once per request"""
+    app.extensions['user_contexts'].ttl = 0
+
+    get_user_context(user.id)
+    get_user_context(user.id)
+    _next_request()
+    get_user_context(user.id)
+
+    assert _count(statements, 'FROM user_preferences') == 2
+
+
+def test_me_endpoint(client, headers, user):
+    """/auth/me returns the user with preferences, and 404 for a deleted user"""
+    data = client.get('/api/auth/me', headers=headers).get_json()
+
+    assert data['username'] == 'testuser'
+    assert data['preferences']['new_cards_per_day'] == 3
+
+    missing = {'Authorization': f'Bearer {create_access_token(identity="999")}'}
+    assert client.get('/api/auth/me', headers=missing).status_code == 404